@@ -0,0 +1,424 @@
+"""
+取得後の処理（結合・派生指標・スクリーニング）のスケールベンチマーク
+
+合成した生データ・縦持ち財務諸表・data CSV（1,000行ずつのシャード、一部の銘柄は後のシャードで更新）を
+4,000 / 15,000 / 100,000 社の規模で作成し、取得後の各段階の実行時間とピークメモリを計測します。
+結果はベースライン（benchmark_baseline.json）と比較し、許容倍率を超えて遅く・重くなった段階を
+回帰として報告するため、本番の取得・結合で問題になる前に性能の劣化を検出できます。
+
+計測する段階:
+- derived_metrics: 派生指標・成長率の計算（metrics.build_output_frame）
+- read_shards: シャードCSVの読み込み（combine_latest_csv.read_export_csv）
+- dedupe: 結合と銘柄コードの重複除去（combine_latest_csv.combine_frames）
+- combine: 全シャードの結合と保存（combine_csv_files、集計・検索インデックスなし）
+- combine_incremental: シャードに変更が無い場合の差分結合（combine_csv_files(incremental=True)）
+- aggregates / ranks: 業種・市場別の集計、パーセンタイル順位（metrics）
+- screen_load: 結合済みCSVの読み込みとインデックス作成（screener.ScreeningEngine）
+- screen: 代表的なスクリーニング条件の評価と、条件ごとの並べ替えの列での上位50件の抽出
+- name_search: 会社名の入力補完（name_index.NameIndex.search）
+
+使用例:
+    $ python benchmark.py                                   # 全規模を計測してベースラインと比較
+    $ python benchmark.py --sizes 4000,15000 --no-memory    # 小規模のみ・時間のみ
+    $ python benchmark.py --save-baseline                   # 結果をベースラインとして保存
+    $ python benchmark.py --output Export/benchmark.json    # 結果をJSONで保存
+
+Note:
+    - 時間は --repeats 回のうち最短、メモリは tracemalloc で計測した1回分のピーク（計測時は遅くなるため別に実行）
+    - ベースラインは計測したマシンに依存するため、比較は同じ環境（CI のランナーなど）で行う
+
+依存関係:
+    - numpy / pandas: 合成データの作成と各段階の処理
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from log_setup import setup_logging
+from schema import GROWTH_ITEMS, OUTPUT_COLUMNS, RAW_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [4000, 15000, 100000]
+DEFAULT_REPEATS = 3
+
+# シャード1つあたりの行数と、後のシャードで再取得（更新）される銘柄の割合
+SHARD_ROWS = 1000
+DUPLICATE_RATIO = 0.02
+
+# 合成データの日本株の割合（4桁コードは最大9,000社、残りは米国株のティッカー）
+JP_RATIO = 0.3
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# ベースラインに対してこの倍率を超え、かつ差が下限以上なら回帰とする
+# （同じマシンでもファイルI/Oを含む段階は実行ごとに1.5倍程度揺らぐため、倍率は2倍）
+DEFAULT_TOLERANCE = 2.0
+MIN_REGRESSION_SECONDS = 0.01
+MIN_REGRESSION_MB = 1.0
+
+# screen 段階で評価する条件（共有URLと同じパラメータ（screener.RANGE_PARAMS / SET_PARAMS）, 並べ替えの列, 降順か）
+SCREEN_QUERIES = [
+    ("pbrMax=1&roeMin=8", "ROE", True),
+    ("ncrMin=50&marketType=JP", "ネットキャッシュ比率", True),
+    ("industries=電気機器,情報・通信業&peMax=15", "PER(会予)", False),
+    ("mcMin=100000&omMin=10", "ROE", True),
+    ("company=会社1", "時価総額", True),
+]
+
+# name_search 段階の検索語
+NAME_QUERIES = ["会社12", "ｶｲｼｬ", "company 42", "7203", "AB", "会社99"]
+
+INDUSTRIES = ["電気機器", "情報・通信業", "化学", "機械", "小売業", "サービス業", "銀行業", "輸送用機器", "医薬品", "建設業"]
+MARKETS = {"JP": ["プライム", "スタンダード", "グロース"], "US": ["NYSE", "NASDAQ"]}
+PREFECTURES = ["東京都", "大阪府", "愛知県", "神奈川県", "福岡県"]
+FISCAL_PERIODS = ["2022-03-31", "2023-03-31", "2024-03-31", "2025-03-31"]
+
+
+def _us_ticker(number):
+    """0 始まりの番号から米国株風のティッカー（A, B, ..., Z, AA, AB, ...）を作成"""
+    letters = ""
+    number += 1
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def generate_dataset(rows, seed=0):
+    """
+    合成の生データと縦持ち財務諸表を作成
+
+    Args:
+        rows (int): 銘柄数
+        seed (int): 乱数のシード
+
+    Returns:
+        tuple: (生データ（RAW_COLUMNS）, 縦持ち財務諸表（STATEMENT_COLUMNS、年次4期 × GROWTH_ITEMS）)
+    """
+    rng = np.random.default_rng(seed)
+    jp_rows = min(int(rows * JP_RATIO), 9000)
+    market_types = np.array(["JP"] * jp_rows + ["US"] * (rows - jp_rows))
+    codes = [str(1000 + i) for i in range(jp_rows)] + [_us_ticker(i) for i in range(rows - jp_rows)]
+    names = [f"会社{i}" if i < jp_rows else f"Company {i}" for i in range(rows)]
+
+    raw_df = pd.DataFrame(np.nan, index=range(rows), columns=RAW_COLUMNS)
+    raw_df["会社名"] = names
+    raw_df["銘柄コード"] = codes
+    raw_df["市場タイプ"] = market_types
+    raw_df["業種"] = rng.choice(INDUSTRIES, rows)
+    raw_df["優先市場"] = np.where(
+        market_types == "JP", rng.choice(MARKETS["JP"], rows), rng.choice(MARKETS["US"], rows)
+    )
+    raw_df["都道府県"] = np.where(market_types == "JP", rng.choice(PREFECTURES, rows), None)
+    raw_df["決算月"] = np.where(market_types == "JP", "3月", "12月")
+
+    numeric = [c for c in RAW_COLUMNS if raw_df[c].isna().all()]
+    raw_df[numeric] = rng.lognormal(mean=20, sigma=2, size=(rows, len(numeric)))
+    ratios = {"PBR": (0.3, 5), "PER(会予)": (3, 60), "PER(過去12ヶ月)": (3, 60), "配当利回り": (0, 0.06)}
+    for column, (low, high) in ratios.items():
+        raw_df[column] = rng.uniform(low, high, rows)
+    for column in ["営業利益率", "純利益率", "ROE"]:
+        raw_df[column] = rng.normal(0.08, 0.1, rows)
+    # 欠損（未取得の項目）を含める
+    raw_df[numeric] = raw_df[numeric].mask(rng.random((rows, len(numeric))) < 0.05)
+
+    periods = len(FISCAL_PERIODS)
+    items = len(GROWTH_ITEMS)
+    statements_df = pd.DataFrame(
+        {
+            "銘柄コード": np.repeat(codes, periods * items),
+            "頻度": "annual",
+            "決算期": np.tile(np.repeat(FISCAL_PERIODS, items), rows),
+            "項目": np.tile(GROWTH_ITEMS, rows * periods),
+            "値": rng.lognormal(mean=22, sigma=1.5, size=rows * periods * items),
+        }
+    )
+    return raw_df, statements_df
+
+
+def write_shards(df, export_dir, seed=0):
+    """
+    出力データを SHARD_ROWS 行ずつの data CSV に分割して保存
+
+    Args:
+        df (pd.DataFrame): 出力データ
+        export_dir (str): 保存先ディレクトリ
+        seed (int): 乱数のシード（更新される銘柄の選択）
+
+    Returns:
+        list: 保存したCSVのパス（結合順）
+            - DUPLICATE_RATIO の銘柄は値を変えて最後のシャードに再度含める（重複除去の対象）
+    """
+    rng = np.random.default_rng(seed)
+    updated = df.sample(frac=DUPLICATE_RATIO, random_state=seed).copy()
+    updated["時価総額"] *= rng.uniform(0.9, 1.1, len(updated))
+    frames = [df.iloc[i : i + SHARD_ROWS] for i in range(0, len(df), SHARD_ROWS)] + [updated]
+
+    paths = []
+    for part, frame in enumerate(frames, start=1):
+        market = "japanese" if part % 2 else "us"
+        path = os.path.join(export_dir, f"{market}_stocks_data_{part}_20251020_120000.csv")
+        frame.to_csv(path, index=False, encoding="utf-8-sig")
+        paths.append(path)
+    return paths
+
+
+def measure(fn, repeats=DEFAULT_REPEATS, memory=True, setup=None):
+    """
+    関数の実行時間（repeats 回の最短）とピークメモリを計測
+
+    Args:
+        fn (callable): 計測する関数（引数なし）
+        repeats (int): 時間を計測する回数
+        memory (bool): Trueの場合、tracemalloc で1回実行してピークメモリを計測
+        setup (callable, optional): 各回の実行前に呼ぶ準備（計測に含めない）
+
+    Returns:
+        tuple: (最後の実行結果, {"seconds": 秒, "peak_mb": MB or None})
+    """
+    result = None
+    timings = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = round(peak / (1024 * 1024), 1)
+    return result, {"seconds": round(min(timings), 4), "peak_mb": peak_mb}
+
+
+def run_size(rows, work_dir, repeats=DEFAULT_REPEATS, memory=True):
+    """
+    1つの規模で全段階を計測
+
+    Args:
+        rows (int): 銘柄数
+        work_dir (str): 合成データ・結合ファイルの作業ディレクトリ
+        repeats (int): 時間を計測する回数
+        memory (bool): ピークメモリも計測する
+
+    Returns:
+        dict: 段階名 -> {"seconds", "peak_mb"}
+    """
+    from combine_latest_csv import combine_csv_files, combine_frames, read_export_csv
+    from metrics import add_percentile_ranks, build_output_frame, compute_group_aggregates
+    from screener import ScreeningEngine, load_snapshot, parse_query
+
+    export_dir = os.path.join(work_dir, str(rows))
+    os.makedirs(export_dir, exist_ok=True)
+    raw_df, statements_df = generate_dataset(rows)
+    results = {}
+
+    def run(stage, fn, **kwargs):
+        result, results[stage] = measure(fn, repeats, memory, **kwargs)
+        logger.info(f"[{rows}] {stage}: {results[stage]['seconds']:.4f}秒 / {results[stage]['peak_mb']} MB")
+        return result
+
+    df = run("derived_metrics", lambda: build_output_frame(raw_df, statements_df))
+    paths = write_shards(df.reindex(columns=OUTPUT_COLUMNS), export_dir)
+    frames = run("read_shards", lambda: [read_export_csv(path) for path in paths])
+    combined_df = run("dedupe", lambda: combine_frames(frames))
+
+    output_file = os.path.join(export_dir, "20251020_combined.csv")
+    run("combine", lambda: combine_csv_files(paths, output_file, aggregates=False, names=False))
+
+    # 差分結合: マニフェストを作成してから、シャードに変更が無い再結合（結合・書き直しを省略）
+    incremental_file = os.path.join(export_dir, "20251020_incremental_combined.csv")
+    state_dir = os.path.join(export_dir, ".combine_state")
+    incremental = {"aggregates": False, "names": False, "incremental": True, "state_dir": state_dir}
+    combine_csv_files(paths, incremental_file, **incremental)
+    run("combine_incremental", lambda: combine_csv_files(paths, incremental_file, **incremental))
+
+    run("aggregates", lambda: compute_group_aggregates(combined_df))
+    run("ranks", lambda: add_percentile_ranks(combined_df))
+
+    engine = run("screen_load", lambda: ScreeningEngine(load_snapshot(output_file)))
+    queries = [(parse_query(query), column, descending) for query, column, descending in SCREEN_QUERIES]
+    run(
+        "screen",
+        lambda: [engine.top(engine.screen(query), column, 50, descending) for query, column, descending in queries],
+    )
+    run("name_search", lambda: [engine.names.search(query) for query in NAME_QUERIES])
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS, memory=True, work_dir=None):
+    """
+    全規模のベンチマークを実行
+
+    Args:
+        sizes (list): 銘柄数のリスト
+        repeats (int): 時間を計測する回数
+        memory (bool): ピークメモリも計測する
+        work_dir (str, optional): 作業ディレクトリ（未指定時は一時ディレクトリを作成して削除）
+
+    Returns:
+        dict: {"environment": 実行環境, "results": {銘柄数: {段階名: 計測値}}}
+    """
+    environment = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeats": repeats,
+        "date": time.strftime("%Y-%m-%d"),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for rows in sizes:
+            start = time.time()
+            results[str(rows)] = run_size(rows, tmp, repeats, memory)
+            logger.info(f"{rows}社: {time.time() - start:.1f}秒")
+    return {"environment": environment, "results": results}
+
+
+def compare_results(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    ベースラインと比較し、回帰した段階を返す
+
+    Args:
+        current (dict): run_benchmarks の戻り値
+        baseline (dict): ベースライン（同じ形式）
+        tolerance (float): 許容する倍率（例: 2.0 = 2倍まで）
+
+    Returns:
+        list: (銘柄数, 段階名, 指標, ベースライン, 今回) のリスト
+            - 両方に存在する規模・段階のみ比較。差が MIN_REGRESSION_SECONDS / MIN_REGRESSION_MB 未満は無視
+    """
+    regressions = []
+    for rows, stages in current["results"].items():
+        for stage, values in stages.items():
+            base = baseline.get("results", {}).get(rows, {}).get(stage)
+            if not base:
+                continue
+            for metric, floor in (("seconds", MIN_REGRESSION_SECONDS), ("peak_mb", MIN_REGRESSION_MB)):
+                now, before = values.get(metric), base.get(metric)
+                if now is None or before is None:
+                    continue
+                if now > before * tolerance and now - before >= floor:
+                    regressions.append((rows, stage, metric, before, now))
+    return regressions
+
+
+def format_table(current, baseline=None):
+    """計測結果（とベースラインとの比）を表形式の文字列にする"""
+    lines = [f"{'rows':>7}  {'stage':<20} {'seconds':>9} {'peak_mb':>8} {'x_sec':>8} {'x_mb':>8}"]
+    for rows, stages in current["results"].items():
+        for stage, values in stages.items():
+            base = (baseline or {}).get("results", {}).get(rows, {}).get(stage, {})
+            ratios = []
+            for metric in ("seconds", "peak_mb"):
+                now, before = values.get(metric), base.get(metric)
+                ratios.append(f"{now / before:.2f}" if now is not None and before else "-")
+            memory = "-" if values["peak_mb"] is None else f"{values['peak_mb']:.1f}"
+            lines.append(f"{rows:>7}  {stage:<20} {values['seconds']:>9.4f} {memory:>8} {ratios[0]:>8} {ratios[1]:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 回帰が無い場合（またはベースラインを保存した場合）True
+    """
+    parser = argparse.ArgumentParser(
+        description="結合・派生指標・スクリーニングの実行時間とメモリを合成データで計測します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python benchmark.py                                  # 計測してベースラインと比較（回帰があれば終了コード1）
+  python benchmark.py --sizes 4000,15000 --no-memory   # 小規模のみ・時間のみ
+  python benchmark.py --save-baseline                  # 結果をベースラインとして保存
+        """,
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help=f"銘柄数（カンマ区切り、デフォルト: {','.join(str(size) for size in DEFAULT_SIZES)}）",
+    )
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help=f"時間の計測回数 (デフォルト: {DEFAULT_REPEATS})")
+    parser.add_argument("--no-memory", action="store_true", help="ピークメモリを計測しない（tracemalloc の実行を省略）")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="ベースラインのJSON (デフォルト: benchmark_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="今回の結果をベースラインとして保存（比較しない）")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"回帰とみなすベースラインに対する倍率 (デフォルト: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument("--output", default=None, help="今回の結果を保存するJSON")
+    parser.add_argument("--work-dir", default=None, help="合成データの作業ディレクトリの親（デフォルト: システムの一時ディレクトリ）")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error("--sizes はカンマ区切りの整数で指定してください")
+    if not sizes or min(sizes) <= 0 or args.repeats <= 0:
+        parser.error("--sizes, --repeats は正の整数である必要があります")
+
+    setup_logging()
+    # 各段階のモジュールのINFOログ（読み込み・結合の進捗）は計測結果の表示を埋もれさせるため抑制
+    for name in ("combine_latest_csv", "metrics", "screener", "name_index", "export_manifest"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    current = run_benchmarks(sizes, args.repeats, not args.no_memory, args.work_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(format_table(current))
+        logger.info(f"✅ ベースラインを保存しました: {args.baseline}")
+        return True
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_table(current, baseline))
+    if baseline is None:
+        logger.warning(f"⚠️ ベースラインがありません（--save-baseline で作成）: {args.baseline}")
+        return True
+
+    regressions = compare_results(current, baseline, args.tolerance)
+    for rows, stage, metric, before, now in regressions:
+        unit = "秒" if metric == "seconds" else "MB"
+        logger.error(f"❌ 回帰: {rows}社 {stage} {before}{unit} → {now}{unit} ({now / before:.2f}倍)")
+    if not regressions:
+        logger.info(f"✅ 回帰はありません（許容倍率 {args.tolerance}）")
+    return not regressions
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
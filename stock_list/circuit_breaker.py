@@ -0,0 +1,205 @@
+"""
+外部サービスごとのサーキットブレーカー
+
+郵便番号API（digital-address.app）や Yahoo Finance が不調な間、タイムアウトを
+待つ呼び出しを繰り返さないよう、直近の呼び出しの失敗率（遅い呼び出しを含む）が
+しきい値を超えたら呼び出しを遮断します。
+
+状態:
+- closed: 通常どおり呼び出す。直近 window 件の失敗率が failure_threshold 以上で open へ
+- open: 呼び出さずに即座に CircuitOpenError を送出。reset_timeout 秒後に half_open へ
+- half_open: 試行の呼び出しを1件だけ通し、成功すれば closed、失敗すれば再び open へ
+
+使用例:
+    >>> breaker = get_breaker("digital-address", slow_call_seconds=5)
+    >>> breaker.call(requests.get, url, timeout=10)   # open の間は CircuitOpenError
+    >>> log_summary()                                  # 実行サマリーに状態を出力
+"""
+
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 既定値: 直近20件中、5件以上の呼び出しがあり失敗率50%以上で遮断し、60秒後に試行
+DEFAULT_WINDOW = 20
+DEFAULT_MIN_CALLS = 5
+DEFAULT_FAILURE_THRESHOLD = 0.5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが open のため呼び出しを遮断した"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} のサーキットブレーカーが open です（{retry_after:.0f}秒後に再試行）")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """1つの外部サービスに対するサーキットブレーカー
+
+    Args:
+        name (str): サービス名（ログ・サマリーに表示）
+        window (int): 失敗率を計算する直近の呼び出し数
+        min_calls (int): 失敗率を判定するのに必要な最小呼び出し数
+        failure_threshold (float): open にする失敗率（0〜1）
+        slow_call_seconds (float, optional): この秒数以上かかった成功も失敗として数える
+        reset_timeout (float): open から half_open に移るまでの秒数
+
+    Note:
+        - スレッドセーフ（pipeline.py の並列取得で共有可能）
+    """
+
+    def __init__(
+        self,
+        name,
+        window=DEFAULT_WINDOW,
+        min_calls=DEFAULT_MIN_CALLS,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        slow_call_seconds=None,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._outcomes = collections.deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.open_count = 0
+
+    @property
+    def state(self):
+        """現在の状態（open で reset_timeout を過ぎていれば half_open）"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self.open_count += 1
+
+    def before_call(self):
+        """呼び出し前の確認（遮断する場合は CircuitOpenError を送出）
+
+        Raises:
+            CircuitOpenError: open、または half_open で試行中の呼び出しがある場合
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, success, duration=None):
+        """呼び出し結果を記録し、状態を更新
+
+        Args:
+            success (bool): 呼び出しが成功したか
+            duration (float, optional): 呼び出しにかかった秒数（slow_call_seconds 以上は失敗扱い）
+        """
+        slow = success and self.slow_call_seconds is not None and duration is not None
+        slow = slow and duration >= self.slow_call_seconds
+        failed = not success or slow
+
+        with self._lock:
+            self.calls += 1
+            self.failures += not success
+            self.slow_calls += slow
+
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open()
+                    logger.warning(f"🔌 {self.name}: 試行の呼び出しが失敗したため再び遮断します")
+                else:
+                    self._state = CLOSED
+                    self._trial_in_flight = False
+                    self._outcomes.clear()
+                    logger.info(f"🔌 {self.name}: 回復を確認したため遮断を解除します")
+                return
+
+            self._outcomes.append(failed)
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                rate = sum(self._outcomes) / len(self._outcomes)
+                if rate >= self.failure_threshold:
+                    self._open()
+                    self._outcomes.clear()
+                    logger.warning(
+                        f"🔌 {self.name}: 直近の失敗率 {rate:.0%} のため {self.reset_timeout:.0f}秒間 呼び出しを遮断します"
+                    )
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) をサーキットブレーカー経由で呼び出し
+
+        Returns:
+            fn の戻り値
+
+        Raises:
+            CircuitOpenError: 遮断中
+            Exception: fn が送出した例外（失敗として記録）
+        """
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def summary(self):
+        """実行サマリー用の1行の状態表示"""
+        return (
+            f"{self.name}: {self.state}（呼び出し {self.calls} / 失敗 {self.failures} / 低速 {self.slow_calls} / "
+            f"遮断 {self.rejected} / open {self.open_count}回）"
+        )
+
+
+_registry_lock = threading.Lock()
+_registry = {}
+
+
+def get_breaker(name, **kwargs):
+    """名前ごとに共有するサーキットブレーカーを取得（初回呼び出し時に kwargs で作成）"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = CircuitBreaker(name, **kwargs)
+        return _registry[name]
+
+
+def log_summary(log=logger):
+    """作成済みの全サーキットブレーカーの状態をログ出力"""
+    with _registry_lock:
+        breakers = list(_registry.values())
+    for breaker in breakers:
+        level = logging.WARNING if breaker.open_count or breaker.rejected else logging.INFO
+        log.log(level, f"サーキットブレーカー {breaker.summary()}")
@@ -0,0 +1,133 @@
+"""
+stock_list 統合コマンドラインツール
+
+株式リスト取得・分割・財務データ収集・CSV結合などの各スクリプトを、
+1つのエントリポイントからサブコマンドとして実行します。
+
+各サブコマンドのモジュールは実行時にのみインポートするため、pandas/yfinance を
+使わないコマンド（split, inspect など）は軽量に起動します。
+
+使用例:
+    $ python cli.py list-jp                          # JPXから日本株リストを取得
+    $ python cli.py list-us                          # SECから米国株リストを取得
+    $ python cli.py split -i stocks_all.json -s 1000 # 株式リストを分割
+    $ python cli.py inspect stocks_1.json            # 株式リストの内訳を表示
+    $ python cli.py fetch stocks_1.json              # 財務データを収集
+    $ python cli.py combine --market-type JP         # CSVを結合
+    $ python cli.py derive Export/japanese_stocks_raw_1_20251020_123456.csv  # 派生指標を再計算
+    $ python cli.py pipeline --market JP --part 1    # リスト取得から結合までを1プロセスで実行
+    $ python cli.py screen --market-type JP -q "pbrMax=1&roeMin=8"  # スクリーニング
+    $ python cli.py serve --market-type JP --port 8000  # スクリーニングAPIを起動
+    $ python cli.py schedule stocks_all.json -o stocks_due.json  # 当日の取得計画を作成
+    $ python cli.py export --compact                 # 古いCSVを月ごとのアーカイブに圧縮
+    $ python cli.py prices --market-type JP          # 株価のみを更新
+    $ python cli.py names Export/20251020_names.json とよた  # 会社名・銘柄コードをあいまい検索
+    $ python cli.py bench --sizes 4000,15000         # 結合・スクリーニングのベンチマーク
+    $ python cli.py similar --market-type JP 7203    # 財務指標の近い類似企業
+    $ python cli.py split --help                     # サブコマンドのヘルプ
+"""
+
+import importlib
+import os
+import sys
+
+# サブコマンド: (モジュール名, 関数名, 説明)
+COMMANDS = {
+    "list-jp": ("get_jp_stocklist", "main", "JPX公式データから日本株リストを取得（stocks_all.json）"),
+    "list-us": ("get_us_stocklist", "main", "SECの公開データから米国株リストを取得（us_stocks_all.json）"),
+    "split": ("split_stocks", "main", "株式リストJSONを指定サイズのチャンクに分割"),
+    "inspect": ("cli", "inspect_main", "株式リストJSONの件数・市場区分の内訳を表示"),
+    "fetch": ("sumalize", "run_cli", "財務データを取得してCSVに保存"),
+    "combine": ("combine_latest_csv", "main", "指定日付のCSVファイルを結合"),
+    "derive": ("metrics", "main", "生データスナップショットから派生指標を再計算"),
+    "pipeline": ("pipeline", "main", "リスト取得→分割→収集→結合を1プロセスでストリーミング実行"),
+    "screen": ("screener", "main", "結合済みCSVをフロントエンドと同じ条件でスクリーニング"),
+    "serve": ("server", "main", "スクリーニング結果をページ単位で返すHTTP APIを起動"),
+    "schedule": ("scheduler", "main", "決算月と取得状態から当日の財務データ取得計画を作成"),
+    "export": ("export_manifest", "main", "Exportのマニフェストを同期し、古いCSVを月ごとのアーカイブに圧縮"),
+    "prices": ("price_refresh", "main", "株価のみを一括取得し、株価に依存する指標を再計算"),
+    "names": ("name_index", "main", "会社名・銘柄コードを表記ゆれを許容してあいまい検索"),
+    "bench": ("benchmark", "main", "合成データで結合・派生指標・スクリーニングの時間とメモリを計測"),
+    "similar": ("similar", "main", "財務指標を標準化した k 近傍で類似企業を検索"),
+}
+
+
+def print_usage(stream=sys.stdout):
+    """サブコマンド一覧を表示"""
+    stream.write("使用方法: python cli.py <command> [options]\n\nコマンド:\n")
+    for name, (_, _, description) in COMMANDS.items():
+        stream.write(f"  {name:<10} {description}\n")
+    stream.write("\n各コマンドのオプション: python cli.py <command> --help\n")
+
+
+def inspect_main(argv=None):
+    """株式リストJSONの件数と市場区分の内訳を表示（標準ライブラリのみ使用）
+
+    Args:
+        argv (list, optional): 引数リスト（株式リストJSONファイル名、複数指定可）
+
+    Returns:
+        bool: すべてのファイルを読み込めた場合True
+    """
+    import argparse
+    import json
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(prog="cli.py inspect", description=COMMANDS["inspect"][2])
+    parser.add_argument("files", nargs="+", help="株式リストJSONファイル（例: stocks_1.json）")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for path in args.files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stock_list = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            ok = False
+            continue
+
+        markets = Counter(stock.get("市場・商品区分") or "不明" for stock in stock_list)
+        market_types = Counter(stock.get("市場タイプ") or "JP" for stock in stock_list)
+
+        print(f"{path}: {len(stock_list)}社")
+        print("  市場タイプ: " + ", ".join(f"{k} {v}社" for k, v in market_types.most_common()))
+        for market, count in markets.most_common():
+            print(f"  {market}: {count}社")
+
+    return ok
+
+
+def main(argv=None):
+    """サブコマンドを解決して実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        int: 終了コード（0: 成功, 1: 失敗, 2: 引数エラー）
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0 if argv else 2
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        sys.stderr.write(f"不明なコマンドです: {command}\n\n")
+        print_usage(sys.stderr)
+        return 2
+
+    # 同じディレクトリのモジュールをインポートできるようにする（他のディレクトリからの実行に対応）
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    module_name, function_name, _ = COMMANDS[command]
+    module = sys.modules[__name__] if module_name == "cli" else importlib.import_module(module_name)
+    result = getattr(module, function_name)(rest)
+
+    return 1 if result is False else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+列指向の結果バッファ
+
+銘柄ごとの取得結果を辞書のリストとして溜めずに、事前確保した型付きの列配列へ
+直接書き込みます。数値列はNumPyのfloat64配列、繰り返しの多い文字列列は
+カテゴリコード（int32）、その他の文字列列はobject配列で保持します。
+
+主な機能:
+- 事前確保した列配列への1行ずつの書き込み（容量不足時は倍増して再確保）
+- 辞書（append）・タプル（append_row / extend）どちらの形式でも書き込み可能
+- DataFrameへの変換（行辞書の一時リストを作らない）
+
+使用例:
+    >>> buffer = ColumnarBuffer(["会社名", "時価総額"], capacity=1000, string_columns=["会社名"])
+    >>> buffer.append({"会社名": "トヨタ自動車", "時価総額": 4.0e13})
+    >>> len(buffer)
+    1
+    >>> buffer.to_frame()
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def _to_float(value):
+    """値をfloatに変換（None・変換不可の値はNaN）"""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ColumnarBuffer:
+    """事前確保した型付き列配列に結果を書き込むバッファ
+
+    Args:
+        columns (list): 列名（DataFrame変換時の列順）
+        capacity (int): 初期容量（行数）
+        string_columns (iterable): object配列で保持する文字列列
+        categorical_columns (iterable): カテゴリコードで保持する文字列列
+            - それ以外の列はfloat64配列で保持する
+
+    Note:
+        - 辞書のキー文字列や行ごとのオブジェクトを保持しないため、行数が増えてもメモリ使用量は
+          列配列のサイズに比例する
+        - カテゴリ列は値ごとに1つの文字列のみを保持し、各行はint32のコード（欠損は-1）となる
+    """
+
+    __slots__ = ("columns", "_size", "_capacity", "_kinds", "_arrays", "_categories")
+
+    def __init__(self, columns, capacity, string_columns=(), categorical_columns=()):
+        string_columns = set(string_columns)
+        categorical_columns = set(categorical_columns)
+
+        self.columns = list(columns)
+        self._size = 0
+        self._capacity = max(int(capacity), 1)
+        self._kinds = {}
+        self._arrays = {}
+        self._categories = {}
+
+        for column in self.columns:
+            if column in categorical_columns:
+                kind = "category"
+                self._categories[column] = {}
+            elif column in string_columns:
+                kind = "string"
+            else:
+                kind = "numeric"
+            self._kinds[column] = kind
+            self._arrays[column] = self._allocate(kind, self._capacity)
+
+    @staticmethod
+    def _allocate(kind, capacity):
+        """列種別に応じた配列を確保"""
+        if kind == "numeric":
+            return np.full(capacity, np.nan, dtype="float64")
+        if kind == "category":
+            return np.full(capacity, -1, dtype="int32")
+        return np.full(capacity, None, dtype=object)
+
+    def _grow(self):
+        """容量を倍増して配列を再確保"""
+        new_capacity = self._capacity * 2
+        for column, array in self._arrays.items():
+            grown = self._allocate(self._kinds[column], new_capacity)
+            grown[: self._size] = array[: self._size]
+            self._arrays[column] = grown
+        self._capacity = new_capacity
+
+    def _set(self, column, row, value):
+        """1セルを書き込み"""
+        kind = self._kinds[column]
+        if kind == "numeric":
+            self._arrays[column][row] = _to_float(value)
+        elif kind == "category":
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                return
+            codes = self._categories[column]
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(codes)
+            self._arrays[column][row] = code
+        else:
+            self._arrays[column][row] = value
+
+    def append(self, record):
+        """辞書形式の1行を書き込み（columns に無いキーは無視、欠けている列は欠損）
+
+        Args:
+            record (dict): 列名をキーとする1行分のデータ
+        """
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        for column in self.columns:
+            if column in record:
+                self._set(column, row, record[column])
+        self._size += 1
+
+    def append_row(self, values):
+        """columns の順に並んだタプル形式の1行を書き込み
+
+        Args:
+            values (tuple): 1行分の値（columns と同じ順序・長さ）
+        """
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        for column, value in zip(self.columns, values):
+            self._set(column, row, value)
+        self._size += 1
+
+    def extend(self, rows):
+        """タプル形式の複数行を書き込み（list.extend と同じ使い方ができる）
+
+        Args:
+            rows (iterable): append_row に渡すタプルの列
+        """
+        for values in rows:
+            self.append_row(values)
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        """書き込み済み範囲の列をSeriesとして取得
+
+        Args:
+            name (str): 列名
+
+        Returns:
+            pd.Series: 列データ（カテゴリ列はCategorical）
+        """
+        array = self._arrays[name][: self._size]
+        if self._kinds[name] == "category":
+            categories = list(self._categories[name])
+            return pd.Series(pd.Categorical.from_codes(array, categories=categories), name=name)
+        return pd.Series(array, name=name)
+
+    def to_frame(self):
+        """書き込み済みの行をDataFrameに変換
+
+        Returns:
+            pd.DataFrame: columns の列順のDataFrame
+                - 数値列はfloat64、カテゴリ列はcategory、文字列列はobject
+        """
+        return pd.DataFrame({name: self.column(name) for name in self.columns}, columns=self.columns)
@@ -7,24 +7,24 @@ Purpose:
 - Exportディレクトリから最新のCSVファイルを特定
 - 複数のCSVファイルを結合して一つの統合ファイルを作成
 - 日付_combined.csv形式でファイル名を生成
+- 差分結合（--incremental）: 前回結合したCSVの一覧と銘柄コード（マニフェスト）をコミット対象外の
+  ディレクトリ（.combine_state/）に保存し、CSVに変更が無ければ結合・書き直しを省略。
+  変更があった場合は前回の結合ファイルに変更のあったCSVの行だけを反映
+- 会社名・銘柄コードの検索インデックス（*_names.json、name_index.py）を付帯ファイルとして保存
 """
 
 import os
-import glob
+import hashlib
+import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import argparse
 import logging
 
-# ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("combine_csv.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
+from log_setup import setup_logging
+from name_index import names_filename, save_name_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,13 +40,14 @@ def get_latest_csv_files(export_dir="./Export", target_date=None, market_type=No
 
     Returns:
         list: 最新のCSVファイルのリスト（対象日付のもののみ）
-            - 更新日時でソート済み（最新順）
+            - ファイル名の取得日時でソート済み（最新順）
             - 空リストの場合は該当ファイルなし
 
     Note:
         - ファイル名パターン: "japanese_stocks_data_*.csv" または "us_stocks_data_*.csv"
-        - 対象日付が含まれるファイルのみを抽出
-        - 各ファイルの詳細情報（更新日時）をログ出力
+        - Export/manifest.json（export_manifest.py）から対象日付のファイルを検索
+          （ディレクトリが変更されていた場合のみ、ファイル名の一覧と同期してから検索）
+        - 各ファイルの詳細情報（取得日時・行数）をログ出力
 
     Examples:
         >>> files = get_latest_csv_files("./Export", "20251020")
@@ -55,27 +56,7 @@ def get_latest_csv_files(export_dir="./Export", target_date=None, market_type=No
         >>> files[0]
         './Export/japanese_stocks_data_1_20251020_123456.csv'
     """
-    # CSVファイルのパターンを定義（市場タイプに応じて）
-    if market_type == "US":
-        patterns = [os.path.join(export_dir, "us_stocks_data_*.csv")]
-    elif market_type == "JP":
-        patterns = [os.path.join(export_dir, "japanese_stocks_data_*.csv")]
-    else:
-        # 両方のパターンを検索
-        patterns = [
-            os.path.join(export_dir, "japanese_stocks_data_*.csv"),
-            os.path.join(export_dir, "us_stocks_data_*.csv"),
-        ]
-
-    # すべてのパターンからCSVファイルを取得
-    all_csv_files = []
-    for pattern in patterns:
-        all_csv_files.extend(glob.glob(pattern))
-
-    if not all_csv_files:
-        pattern_str = " または ".join(patterns)
-        logger.warning(f"CSVファイルが見つかりません: {pattern_str}")
-        return []
+    from export_manifest import find_shards
 
     # 対象日付を決定
     if target_date is None:
@@ -83,24 +64,22 @@ def get_latest_csv_files(export_dir="./Export", target_date=None, market_type=No
 
     logger.info(f"対象日付: {target_date}")
 
-    # 今日の日付のファイルのみをフィルタリング
-    csv_files = [f for f in all_csv_files if target_date in os.path.basename(f)]
+    if not os.path.isdir(export_dir):
+        logger.warning(f"CSVファイルが見つかりません: {export_dir}")
+        return []
 
-    if not csv_files:
+    shards = find_shards(export_dir, target_date, market_type)
+    if not shards:
         logger.warning(f"⚠️  {target_date} のCSVファイルが見つかりません")
-        logger.info(f"全{len(all_csv_files)}個のファイルから検索しましたが、該当なし")
         return []
 
-    # ファイルの更新日時でソート（最新順）
-    csv_files.sort(key=os.path.getmtime, reverse=True)
-
-    # 各ファイルの情報をログ出力
-    logger.info(f"✅ {target_date} のCSVファイル: {len(csv_files)}個")
-    for i, file in enumerate(csv_files):
-        mod_time = datetime.fromtimestamp(os.path.getmtime(file))
-        logger.info(f"  {i + 1}. {os.path.basename(file)} (更新日時: {mod_time})")
+    # 各ファイルの情報をログ出力（取得日時の新しい順）
+    logger.info(f"✅ {target_date} のCSVファイル: {len(shards)}個")
+    for i, (file, entry) in enumerate(shards):
+        fetched_at = datetime.strptime(entry["timestamp"], "%Y%m%d_%H%M%S")
+        logger.info(f"  {i + 1}. {os.path.basename(file)} (取得日時: {fetched_at}, {entry['rows']}行)")
 
-    return csv_files
+    return [file for file, _ in shards]
 
 
 def get_today_date():
@@ -120,13 +99,380 @@ def get_today_date():
     return datetime.now().strftime("%Y%m%d")
 
 
-def combine_csv_files(csv_files, output_file):
+def read_export_csv(csv_file, **read_options):
+    """
+    Export ディレクトリのCSVファイルを読み込み（BOMを除去）
+
+    Args:
+        csv_file (str): CSVファイルのパス
+        **read_options: pd.read_csv に渡す追加の引数
+
+    Returns:
+        pd.DataFrame: 読み込んだデータ
+    """
+    logger.info(f"読み込み中: {os.path.basename(csv_file)}")
+
+    # CSVファイルを読み込み（日本語対応）
+    df = pd.read_csv(csv_file, encoding="utf-8", **read_options)
+
+    # BOM（Byte Order Mark）を除去
+    if df.columns[0].startswith("\ufeff"):
+        df.columns = [df.columns[0].replace("\ufeff", "")] + df.columns[1:].tolist()
+
+    # データの基本情報をログ出力
+    logger.info(f"  - 行数: {len(df)}, 列数: {len(df.columns)}")
+    return df
+
+
+def combine_frames(frames):
+    """
+    複数のDataFrameを結合し、銘柄コードの重複を除去
+
+    Args:
+        frames (list): 結合するDataFrameのリスト（後ろのものほど優先）
+
+    Returns:
+        pd.DataFrame: 結合後のデータ（銘柄コードが重複する場合は後のデータを保持）
+    """
+    logger.info("CSVファイルを結合中...")
+    combined_df = pd.concat(frames, ignore_index=True)
+
+    # 重複データの除去（銘柄コードベース）
+    if "銘柄コード" in combined_df.columns:
+        before_dedup = len(combined_df)
+        # CSVから読んだ数値コード（7203）とメモリ上の文字列コード（"7203"）を同一視する
+        combined_df = combined_df[~combined_df["銘柄コード"].astype(str).duplicated(keep="last")]
+        after_dedup = len(combined_df)
+        logger.info(f"重複除去: {before_dedup} → {after_dedup} 行 ({before_dedup - after_dedup}行を除去)")
+
+    return combined_df
+
+
+def save_combined(combined_df, output_file):
+    """
+    結合済みデータを保存し、統計情報をログ出力
+
+    Args:
+        combined_df (pd.DataFrame): 結合済みデータ
+        output_file (str): 出力ファイル名（パスを含む）
+            - 出力ディレクトリが存在しない場合は自動作成
+    """
+    # 出力ディレクトリを作成
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    # 結合されたデータを保存
+    combined_df.to_csv(output_file, index=False, encoding="utf-8")
+
+    logger.info(f"✅ 結合完了: {output_file}")
+    logger.info(f"   - 総行数: {len(combined_df)}")
+    logger.info(f"   - 総列数: {len(combined_df.columns)}")
+    logger.info(f"   - ファイルサイズ: {os.path.getsize(output_file) / (1024 * 1024):.2f} MB")
+
+
+def aggregates_filename(output_file):
+    """
+    結合ファイル名から業種・市場別集計の付帯ファイル名を生成
+
+    Args:
+        output_file (str): 結合ファイルのパス（例: "Export/20251020_jp_combined.csv"）
+
+    Returns:
+        str: 集計ファイルのパス（例: "Export/20251020_jp_aggregates.csv"）
+    """
+    root, ext = os.path.splitext(output_file)
+    if root.endswith("_combined"):
+        root = root[: -len("_combined")]
+    return f"{root}_aggregates{ext or '.csv'}"
+
+
+def save_aggregates(combined_df, output_file):
+    """
+    業種・市場ごとの集計値（件数・平均・四分位・中央値）を付帯ファイルとして保存
+
+    Args:
+        combined_df (pd.DataFrame): 結合済みデータ
+        output_file (str): 結合ファイルのパス（集計ファイル名の元になる）
+
+    Returns:
+        str: 保存した集計ファイルのパス
+    """
+    from metrics import compute_group_aggregates
+
+    aggregates = compute_group_aggregates(combined_df)
+    aggregates_file = aggregates_filename(output_file)
+    aggregates.to_csv(aggregates_file, index=False, encoding="utf-8")
+    logger.info(f"✅ 業種・市場別の集計を保存: {aggregates_file} ({len(aggregates)}行)")
+    return aggregates_file
+
+
+def add_rank_columns(combined_df):
+    """
+    主要指標（PBR・PER・ROE・配当利回りなど）のパーセンタイル順位列を追加
+
+    Args:
+        combined_df (pd.DataFrame): 結合済みデータ
+
+    Returns:
+        pd.DataFrame: "{指標}_全体順位", "{指標}_業種内順位" 列を追加したデータ
+    """
+    from metrics import add_percentile_ranks
+
+    ranked = add_percentile_ranks(combined_df)
+    logger.info(f"パーセンタイル順位列を追加しました: {len(ranked.columns) - len(combined_df.columns)}列")
+    return ranked
+
+
+def combined_filename(target_date, market_type=None):
+    """
+    結合ファイル名を生成
+
+    Args:
+        target_date (str): 対象日付（YYYYMMDD形式）
+        market_type (str, optional): 市場タイプ（"JP" または "US"、未指定: 両方）
+
+    Returns:
+        str: ファイル名（例: "20251020_jp_combined.csv"）
+    """
+    if market_type == "US":
+        return f"{target_date}_us_combined.csv"
+    if market_type == "JP":
+        return f"{target_date}_jp_combined.csv"
+    return f"{target_date}_combined.csv"
+
+
+# 差分結合のマニフェストの保存先（Export/ はCIでコミットされるため別のディレクトリ、.gitignore 済み）
+DEFAULT_STATE_DIR = ".combine_state"
+
+
+def combine_manifest_path(output_file, state_dir=DEFAULT_STATE_DIR):
+    """
+    差分結合のマニフェストのパスを生成
+
+    Args:
+        output_file (str): 結合ファイルのパス（例: "Export/20251020_jp_combined.csv"）
+        state_dir (str): マニフェストの保存先ディレクトリ
+
+    Returns:
+        str: マニフェストのパス（例: ".combine_state/20251020_jp_combined.manifest.json"）
+    """
+    root = os.path.splitext(os.path.basename(output_file))[0]
+    return os.path.join(state_dir, f"{root}.manifest.json")
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """ファイル内容のSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_combine_manifest(output_file, state_dir=DEFAULT_STATE_DIR):
+    """差分結合のマニフェストを読み込み（無い・読み込めない場合は空の dict）"""
+    manifest_path = combine_manifest_path(output_file, state_dir)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ 差分結合のマニフェストを読み込めないため全CSVを結合します: {e}")
+        return {}
+
+
+def save_combine_manifest(output_file, manifest, state_dir=DEFAULT_STATE_DIR):
+    """差分結合のマニフェストを保存"""
+    manifest_path = combine_manifest_path(output_file, state_dir)
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def record_combined_output(output_file, options, state_dir=DEFAULT_STATE_DIR):
+    """
+    保存した結合ファイルのサイズ・更新日時と結合時のオプションをマニフェストに記録
+
+    次回の差分結合で、CSVに変更が無く結合ファイルも手を加えられていなければ
+    結合ファイルの書き直しを省略するために使う
+    """
+    manifest = load_combine_manifest(output_file, state_dir)
+    if not manifest:
+        return
+    stat = os.stat(output_file)
+    manifest["output"] = {"path": os.path.basename(output_file), "size": stat.st_size, "mtime": stat.st_mtime}
+    manifest["options"] = options
+    save_combine_manifest(output_file, manifest, state_dir)
+
+
+def combine_incremental(csv_files, output_file, options=None, state_dir=DEFAULT_STATE_DIR):
+    """
+    前回結合したCSVの一覧と比べ、変更があったCSVの行だけを前回の結合ファイルに反映
+
+    Args:
+        csv_files (list): 結合するCSVファイルのリスト（後ろのものほど優先、combine_frames と同じ）
+        output_file (str): 結合ファイルのパス（マニフェストのファイル名の元になる）
+        options (dict, optional): 結合ファイルの内容に影響するオプション（順位列・集計の有無）
+        state_dir (str): マニフェストの保存先ディレクトリ
+
+    Returns:
+        pd.DataFrame or None: 結合後のデータ（combine_frames で全CSVを結合した結果と同じ行・順序）
+            - CSVの一覧・内容とオプションが前回と同じで、結合ファイルも前回保存したままの場合は None
+
+    Note:
+        - サイズか更新日時が変わったCSVはチェックサムを計算し、内容が同じなら変更なしとして扱う
+          （アーティファクトのダウンロードなどで更新日時だけが変わった場合）
+        - マニフェストにはCSVごとの銘柄コードの一覧（ファイル内の順序）を記録し、結合途中の
+          DataFrame は保存しない。前回の結合ファイルを読み込み、追加・変更・削除されたCSVが
+          採用元だった行を除いて、採用元が変わった銘柄の行だけをCSVから読み直して差し替える
+        - 前回の結合ファイルが手を加えられている・オプションが変わった場合は全CSVを結合し直す
+    """
+    manifest = load_combine_manifest(output_file, state_dir)
+    previous = {entry["path"]: entry for entry in manifest.get("shards", [])}
+
+    entries = []
+    changed = []
+    for index, csv_file in enumerate(csv_files):
+        path = os.path.normpath(csv_file)
+        stat = os.stat(path)
+        entry = previous.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            checksum = file_checksum(path)
+            if entry is None or entry["sha256"] != checksum:
+                changed.append(index)
+                entry = {"codes": None}
+            entry = {**entry, "path": path, "size": stat.st_size, "mtime": stat.st_mtime, "sha256": checksum}
+        entries.append(entry)
+
+    paths = [entry["path"] for entry in entries]
+    logger.info(f"差分結合: 変更なし {len(paths) - len(changed)}個 / 追加・変更 {len(changed)}個")
+    reusable = manifest.get("options") == options and _output_unchanged(manifest, output_file)
+    if not changed and paths == list(previous) and reusable:
+        save_combine_manifest(output_file, {**manifest, "shards": entries}, state_dir)
+        logger.info(f"✅ 結合ファイルは最新です: {output_file}")
+        return None
+
+    frames = {index: read_export_csv(csv_files[index]) for index in changed}
+    combined_df = None
+    if reusable and manifest.get("columns") and all(entry.get("codes") is not None for entry in previous.values()):
+        combined_df = _patch_combined(output_file, manifest, entries, frames, csv_files)
+    if combined_df is None:
+        for index, csv_file in enumerate(csv_files):
+            if index not in frames:
+                frames[index] = read_export_csv(csv_file)
+        combined_df = combine_frames([frames[index] for index in range(len(csv_files))])
+    for index, frame in frames.items():
+        entries[index]["codes"] = _shard_codes(frame)
+
+    save_combine_manifest(output_file, {"shards": entries, "columns": list(combined_df.columns)}, state_dir)
+    return combined_df
+
+
+def _shard_codes(df):
+    """CSVの銘柄コードの一覧（ファイル内の順序、文字列）。銘柄コード列が無い場合は None"""
+    if "銘柄コード" not in df.columns:
+        return None
+    return df["銘柄コード"].astype(str).tolist()
+
+
+def _code_owners(entries):
+    """
+    CSVごとの銘柄コードの一覧から、combine_frames で採用される行（後ろのCSV・後ろの行を優先）を求める
+
+    Returns:
+        pd.DataFrame: 銘柄コードをインデックスとし、採用元のCSV（"shard"）と結合後の並び順（"order"）を持つ
+    """
+    codes = [entry["codes"] for entry in entries]
+    shard = np.repeat(np.arange(len(codes)), [len(c) for c in codes])
+    owners = pd.DataFrame({"code": [code for c in codes for code in c], "shard": shard})
+    owners = owners[~owners["code"].duplicated(keep="last")]
+    owners["order"] = owners.index
+    return owners.set_index("code")
+
+
+def _patch_combined(output_file, manifest, entries, frames, csv_files):
+    """
+    前回の結合ファイルのうち採用元が変わらない行を残し、採用元が変わった銘柄の行だけをCSVから差し替える
+
+    Args:
+        output_file (str): 前回保存した結合ファイル
+        manifest (dict): 前回のマニフェスト（CSVごとの銘柄コード・順位列を除いた列の一覧）
+        entries (list): 今回のCSVの一覧（変更があったCSVは銘柄コードが未設定）
+        frames (dict): 読み込んだCSV（CSVの位置 -> DataFrame、追加で読み込んだCSVもここに入る）
+        csv_files (list): 結合するCSVファイルのリスト
+
+    Returns:
+        pd.DataFrame or None: 結合後のデータ（銘柄コード列が無いなど差し替えられない場合は None）
+    """
+    for index, frame in frames.items():
+        entries[index]["codes"] = _shard_codes(frame)
+    if any(entry["codes"] is None for entry in entries):
+        return None
+
+    owners = _code_owners(entries)
+    old_owners = _code_owners(manifest["shards"])
+    paths = np.array([entry["path"] for entry in entries])
+    old_paths = np.array([entry["path"] for entry in manifest["shards"]])
+
+    # 採用元のCSVが同じで、その内容も変わっていない銘柄は前回の結合ファイルの行をそのまま使う
+    owner_path = pd.Series(paths[owners["shard"].to_numpy()], index=owners.index)
+    old_owner_path = pd.Series(old_paths[old_owners["shard"].to_numpy()], index=old_owners.index)
+    kept = owner_path.eq(old_owner_path.reindex(owner_path.index)) & ~owners["shard"].isin(list(frames))
+
+    # 採用元が変わった銘柄の行を読み直す（変更なしのCSVが新たに採用元になった場合はそのCSVも読み込む）
+    for index in np.unique(owners.loc[~kept, "shard"].to_numpy()).tolist():
+        if index not in frames:
+            frames[index] = read_export_csv(csv_files[index])
+            entries[index]["codes"] = _shard_codes(frames[index])
+
+    # 書き直しても値が変わらないよう、浮動小数点数は書き出した値と同じになるように読み込む
+    previous_df = read_export_csv(output_file, float_precision="round_trip")
+    previous_df = previous_df[[column for column in manifest["columns"] if column in previous_df.columns]]
+    previous_codes = previous_df["銘柄コード"].astype(str)
+    parts = [previous_df[previous_codes.isin(kept.index[kept]).to_numpy()]]
+    replaced = kept.index[~kept]
+    for index, frame in frames.items():
+        codes = frame["銘柄コード"].astype(str)
+        wanted = codes.isin(replaced) & codes.map(owners["shard"]).eq(index) & ~codes.duplicated(keep="last")
+        parts.append(frame[wanted.to_numpy()])
+    logger.info(f"差分結合: 前回の結合ファイルから {len(parts[0])}行 / CSVから {sum(len(p) for p in parts[1:])}行")
+
+    combined_df = pd.concat(parts, ignore_index=True)
+    order = combined_df["銘柄コード"].astype(str).map(owners["order"]).to_numpy()
+    combined_df = combined_df.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+    columns = list(dict.fromkeys(manifest["columns"] + combined_df.columns.tolist()))
+    return combined_df[[column for column in columns if column in combined_df.columns]]
+
+
+def _output_unchanged(manifest, output_file):
+    """マニフェストに記録した結合ファイル（と集計ファイル）が、保存した時のまま残っているか"""
+    output = manifest.get("output")
+    if not isinstance(output, dict) or not os.path.exists(output_file):
+        return False
+    if manifest.get("options", {}).get("aggregates") and not os.path.exists(aggregates_filename(output_file)):
+        return False
+    if manifest.get("options", {}).get("names") and not os.path.exists(names_filename(output_file)):
+        return False
+    stat = os.stat(output_file)
+    return output["size"] == stat.st_size and output["mtime"] == stat.st_mtime
+
+
+def combine_csv_files(
+    csv_files, output_file, aggregates=True, ranks=False, incremental=False, names=True, state_dir=DEFAULT_STATE_DIR
+):
     """
     複数のCSVファイルを結合して一つのファイルに保存
 
     Args:
         csv_files (list): 結合するCSVファイルのリスト（絶対パスまたは相対パス）
         output_file (str): 出力ファイル名（パスを含む）
+        aggregates (bool): Trueの場合、業種・市場別の集計を付帯ファイル（*_aggregates.csv）に保存
+        ranks (bool): Trueの場合、主要指標の全銘柄内・業種内パーセンタイル順位の列を追加
+        incremental (bool): Trueの場合、前回結合したCSVから変更が無ければ結合・書き直しを省略し、
+            変更があれば変更のあったCSVの行だけを前回の結合ファイルに反映（combine_incremental）
+        names (bool): Trueの場合、会社名・銘柄コードの検索インデックスを付帯ファイル（*_names.json）に保存
+        state_dir (str): 差分結合のマニフェストの保存先ディレクトリ
 
     Returns:
         bool: 成功した場合True、失敗した場合False
@@ -147,50 +493,27 @@ def combine_csv_files(csv_files, output_file):
         True
     """
     try:
-        combined_data = []
-        total_rows = 0
-
-        for csv_file in csv_files:
-            logger.info(f"読み込み中: {os.path.basename(csv_file)}")
-
-            # CSVファイルを読み込み（日本語対応）
-            df = pd.read_csv(csv_file, encoding="utf-8")
-
-            # BOM（Byte Order Mark）を除去
-            if df.columns[0].startswith("\ufeff"):
-                df.columns = [df.columns[0].replace("\ufeff", "")] + df.columns[1:].tolist()
-
-            # データの基本情報をログ出力
-            logger.info(f"  - 行数: {len(df)}, 列数: {len(df.columns)}")
-
-            combined_data.append(df)
-            total_rows += len(df)
-
-        if not combined_data:
+        if not csv_files:
             logger.error("結合するデータがありません")
             return False
 
-        # データを結合（重複排除）
-        logger.info("CSVファイルを結合中...")
-        combined_df = pd.concat(combined_data, ignore_index=True)
-
-        # 重複データの除去（銘柄コードベース）
-        if "銘柄コード" in combined_df.columns:
-            before_dedup = len(combined_df)
-            combined_df = combined_df.drop_duplicates(subset=["銘柄コード"], keep="last")
-            after_dedup = len(combined_df)
-            logger.info(f"重複除去: {before_dedup} → {after_dedup} 行 ({before_dedup - after_dedup}行を除去)")
-
-        # 出力ディレクトリを作成
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-        # 結合されたデータを保存
-        combined_df.to_csv(output_file, index=False, encoding="utf-8")
-
-        logger.info(f"✅ 結合完了: {output_file}")
-        logger.info(f"   - 総行数: {len(combined_df)}")
-        logger.info(f"   - 総列数: {len(combined_df.columns)}")
-        logger.info(f"   - ファイルサイズ: {os.path.getsize(output_file) / (1024 * 1024):.2f} MB")
+        options = {"aggregates": aggregates, "ranks": ranks, "names": names}
+        if incremental:
+            combined_df = combine_incremental(csv_files, output_file, options, state_dir)
+            if combined_df is None:
+                return True
+        else:
+            # データを結合（重複排除）
+            combined_df = combine_frames([read_export_csv(csv_file) for csv_file in csv_files])
+        if ranks:
+            combined_df = add_rank_columns(combined_df)
+        save_combined(combined_df, output_file)
+        if aggregates:
+            save_aggregates(combined_df, output_file)
+        if names:
+            save_name_index(combined_df, output_file)
+        if incremental:
+            record_combined_output(output_file, options, state_dir)
 
         return True
 
@@ -199,12 +522,15 @@ def combine_csv_files(csv_files, output_file):
         return False
 
 
-def main():
+def main(argv=None):
     """
     メイン実行関数
 
     コマンドライン引数を解析し、CSV結合処理を実行します。
 
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
     Returns:
         bool: 処理成功時True、失敗時False
 
@@ -213,7 +539,13 @@ def main():
         - --export-dir: CSVファイルの入力ディレクトリ（デフォルト: ./Export）
         - --output-dir: 結合ファイルの出力ディレクトリ（デフォルト: ./Export）
         - --date: 対象日付（YYYYMMDD形式、未指定時は今日の日付）
+        - --no-aggregates: 業種・市場別の集計ファイルを作成しない
+        - --no-name-index: 会社名の検索インデックスを作成しない
+        - --ranks: 主要指標のパーセンタイル順位列を追加
+        - --incremental: 前回結合したCSVから変更が無ければ結合・書き直しを省略（デフォルトは常に結合）
+        - --state-dir: 差分結合のマニフェストの保存先（デフォルト: .combine_state、コミットしない）
         - GitHub Actions向けに出力ファイルパスをprint
+        - ログは combine_csv.log と標準エラー出力に出力（呼び出し時に設定）
 
     Examples:
         実行例:
@@ -247,8 +579,35 @@ def main():
         default=None,
         help="市場タイプ (JP: 日本株, US: 米国株, 未指定: 両方)",
     )
+    parser.add_argument(
+        "--no-aggregates",
+        action="store_true",
+        help="業種・市場別の集計ファイル（*_aggregates.csv）を作成しない",
+    )
+    parser.add_argument(
+        "--no-name-index",
+        action="store_true",
+        help="会社名・銘柄コードの検索インデックス（*_names.json）を作成しない",
+    )
+    parser.add_argument(
+        "--ranks",
+        action="store_true",
+        help="主要指標の全銘柄内・業種内パーセンタイル順位の列を追加",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回結合したCSVの一覧・内容から変更が無ければ、結合と結合ファイルの書き直しを省略",
+    )
+    parser.add_argument(
+        "--state-dir",
+        default=DEFAULT_STATE_DIR,
+        help=f"差分結合のマニフェストの保存先 (デフォルト: {DEFAULT_STATE_DIR})",
+    )
+
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args()
+    setup_logging("combine_csv.log")
 
     # 実行開始ログ
     logger.info("=" * 60)
@@ -266,18 +625,20 @@ def main():
         return False
 
     # 出力ファイル名を生成（市場タイプに応じて）
-    if args.market_type == "US":
-        output_filename = f"{target_date}_us_combined.csv"
-    elif args.market_type == "JP":
-        output_filename = f"{target_date}_jp_combined.csv"
-    else:
-        output_filename = f"{target_date}_combined.csv"
-    output_path = os.path.join(args.output_dir, output_filename)
+    output_path = os.path.join(args.output_dir, combined_filename(target_date, args.market_type))
 
     logger.info(f"📁 出力ファイル: {output_path}")
 
     # CSVファイルを結合
-    success = combine_csv_files(csv_files, output_path)
+    success = combine_csv_files(
+        csv_files,
+        output_path,
+        aggregates=not args.no_aggregates,
+        ranks=args.ranks,
+        incremental=args.incremental,
+        names=not args.no_name_index,
+        state_dir=args.state_dir,
+    )
 
     if success:
         logger.info("=" * 60)
@@ -0,0 +1,408 @@
+"""
+Export ディレクトリのマニフェスト（出力CSVの索引）と保存期間の管理
+
+sumalize.py が出力するチャンクごとのCSV（japanese_stocks_data_* / us_stocks_data_* と
+raw / statements）を、ファイル名ごとに日付・市場・パート・行数・チェックサムを記録した
+マニフェスト（Export/manifest.json）で管理します。CSVの結合対象の検索はディレクトリ全体の
+glob とファイルごとの更新日時の取得ではなく、マニフェストの参照で行います。
+
+古いチャンクのCSVは月ごとに1つの圧縮アーカイブ（Export/archive/YYYYMM.zip）にまとめ、
+保存期間を過ぎたアーカイブは削除することで、Export ディレクトリのファイル数と容量を抑えます。
+
+主な機能:
+- 書き込み時の登録（sumalize.save_results が保存したCSVを行数付きで登録）
+- ディレクトリとの同期: 読み込みのたびにファイル名とサイズの一覧をマニフェストの記録と突き合わせ
+  （アーティファクトのダウンロード・手動でのコピーや削除など）、未登録・サイズの変わったCSVを
+  登録し直し・消えたCSVを除外
+- 日付・市場タイプ・種類によるCSVの検索（取得日時の新しい順）
+- 月ごとのアーカイブへの圧縮と、アーカイブの保存期間の管理
+
+使用例:
+    # マニフェストをディレクトリと同期し、登録内容の概要を表示
+    $ python export_manifest.py
+    # 30日より前のCSVを月ごとのアーカイブに圧縮し、12か月より前のアーカイブを削除
+    $ python export_manifest.py --compact --keep-days 30 --max-months 12
+    # 圧縮・削除の対象のみ表示
+    $ python export_manifest.py --compact --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta
+
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+ARCHIVE_DIR = "archive"
+
+# 圧縮せずに残す日数と、アーカイブを残す月数
+DEFAULT_KEEP_DAYS = 30
+DEFAULT_MAX_MONTHS = 12
+
+# チャンクごとのCSVのファイル名（例: japanese_stocks_data_1_20251020_123456.csv）
+SHARD_PATTERN = re.compile(r"^(japanese|us)_stocks_(data|raw|statements)_(.+)_(\d{8})_(\d{6})\.csv$")
+MARKET_PREFIXES = {"japanese": "JP", "us": "US"}
+
+# 同じプロセス内（pipeline.py の並列処理など）でのマニフェストの読み書きを直列化
+_lock = threading.Lock()
+
+
+def parse_shard_filename(filename):
+    """
+    チャンクのCSVファイル名から種類・市場・パート・日付を取得
+
+    Args:
+        filename (str): ファイル名（例: "japanese_stocks_data_1_20251020_123456.csv"）
+
+    Returns:
+        dict or None: {"kind": "data", "market": "JP", "part": "1", "date": "20251020",
+                       "timestamp": "20251020_123456"}（チャンクのCSVでない場合None）
+    """
+    match = SHARD_PATTERN.match(os.path.basename(filename))
+    if match is None:
+        return None
+    prefix, kind, part, date, time_part = match.groups()
+    return {
+        "kind": kind,
+        "market": MARKET_PREFIXES[prefix],
+        "part": part,
+        "date": date,
+        "timestamp": f"{date}_{time_part}",
+    }
+
+
+def file_stats(path, chunk_size=1024 * 1024):
+    """
+    ファイルのサイズ・SHA-256・行数（ヘッダー行を除く）を1回の読み込みで取得
+
+    Returns:
+        tuple: (サイズ, SHA-256, 行数)
+            - 行数は改行の数から算出（セル内に改行を含むCSVでは実際の行数より多くなる）
+    """
+    digest = hashlib.sha256()
+    size = 0
+    newlines = 0
+    last = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            newlines += chunk.count(b"\n")
+            last = chunk
+    if last and not last.endswith(b"\n"):
+        newlines += 1
+    return size, digest.hexdigest(), max(newlines - 1, 0)
+
+
+def manifest_path(export_dir="Export"):
+    """マニフェストファイルのパス"""
+    return os.path.join(export_dir, MANIFEST_FILENAME)
+
+
+def _make_entry(export_dir, filename, rows=None):
+    """マニフェストに記録する1ファイル分の情報を作成"""
+    size, checksum, counted_rows = file_stats(os.path.join(export_dir, filename))
+    return {
+        **parse_shard_filename(filename),
+        "rows": counted_rows if rows is None else int(rows),
+        "size": size,
+        "sha256": checksum,
+        "archive": None,
+    }
+
+
+def _read_manifest(export_dir):
+    path = manifest_path(export_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️ マニフェストを読み込めないため作り直します: {e}")
+        return None
+
+
+def save_manifest(manifest, export_dir="Export"):
+    """マニフェストを保存（一時ファイルに書き込んでから置き換え）"""
+    os.makedirs(export_dir, exist_ok=True)
+    path = manifest_path(export_dir)
+    tmp_path = f"{path}.tmp"
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sync_manifest(manifest, export_dir="Export"):
+    """
+    マニフェストを Export ディレクトリのファイル名・サイズの一覧と突き合わせて更新
+
+    - 未登録のチャンクのCSVと、記録とサイズが異なるCSVを登録（サイズ・チェックサム・行数を計算）
+    - ディレクトリから消えたCSVを除外（アーカイブ済みのものは残す）
+
+    Args:
+        manifest (dict): マニフェスト（その場で更新）
+        export_dir (str): Export ディレクトリ
+
+    Returns:
+        tuple: (追加・登録し直したファイル数, 除外したファイル数)
+
+    Note:
+        - チャンクのCSVはファイル名に取得日時を含み、保存後に書き換えないため、ファイル名とサイズで
+          変更を判定する（更新日時は git の checkout やアーティファクトのダウンロードで変わるため使わない）
+    """
+    files = manifest.setdefault("files", {})
+    on_disk = {}
+    with os.scandir(export_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and SHARD_PATTERN.match(entry.name):
+                on_disk[entry.name] = entry.stat().st_size
+
+    added = [
+        name
+        for name in sorted(on_disk)
+        if name not in files or files[name].get("archive") or files[name].get("size") != on_disk[name]
+    ]
+    for name in added:
+        files[name] = _make_entry(export_dir, name)
+    removed = [name for name, entry in files.items() if name not in on_disk and not entry.get("archive")]
+    for name in removed:
+        del files[name]
+    if added or removed:
+        logger.info(f"マニフェストを同期: 追加 {len(added)}件 / 除外 {len(removed)}件")
+    return len(added), len(removed)
+
+
+def load_manifest(export_dir="Export"):
+    """
+    マニフェストを読み込み（ディレクトリのファイル名・サイズの一覧と同期し、変更があれば保存）
+
+    Args:
+        export_dir (str): Export ディレクトリ
+
+    Returns:
+        dict: {"files": {ファイル名: 情報}, "updated_at": ...}
+            - 情報: kind, market, part, date, timestamp, rows, size, sha256, archive
+              （archive はアーカイブ済みの場合にアーカイブのパス（export_dir からの相対パス）、未圧縮なら None）
+    """
+    with _lock:
+        return _load_manifest(export_dir)
+
+
+def _load_manifest(export_dir):
+    manifest = _read_manifest(export_dir)
+    if not os.path.isdir(export_dir):
+        return manifest or {"files": {}}
+    missing = manifest is None
+    manifest = manifest or {"files": {}}
+    if any(sync_manifest(manifest, export_dir)) or missing:
+        save_manifest(manifest, export_dir)
+    return manifest
+
+
+def register_files(rows_by_path, export_dir="Export"):
+    """
+    書き込んだチャンクのCSVをマニフェストに登録
+
+    Args:
+        rows_by_path (dict): CSVのパス -> 行数（None の場合はファイルから算出）
+        export_dir (str): Export ディレクトリ（CSVはこのディレクトリ直下にあること）
+    """
+    with _lock:
+        manifest = _load_manifest(export_dir)
+        for path, rows in rows_by_path.items():
+            filename = os.path.basename(path)
+            if parse_shard_filename(filename) is None:
+                continue
+            manifest["files"][filename] = _make_entry(export_dir, filename, rows)
+        save_manifest(manifest, export_dir)
+
+
+def find_shards(export_dir="Export", target_date=None, market_type=None, kind="data"):
+    """
+    マニフェストから指定日付のチャンクのCSVを検索
+
+    Args:
+        export_dir (str): Export ディレクトリ
+        target_date (str, optional): 対象日付（YYYYMMDD形式、未指定時は全日付）
+        market_type (str, optional): 市場タイプ（"JP" または "US"、未指定時は両方）
+        kind (str): 種類（"data" / "raw" / "statements"）
+
+    Returns:
+        list: (CSVのパス, 情報) のリスト（ファイル名の取得日時の新しい順、アーカイブ済みのものは除く）
+    """
+    manifest = load_manifest(export_dir)
+    found = [
+        (os.path.join(export_dir, name), entry)
+        for name, entry in manifest["files"].items()
+        if entry["kind"] == kind
+        and not entry.get("archive")
+        and (target_date is None or entry["date"] == target_date)
+        and (market_type is None or entry["market"] == market_type)
+    ]
+    found.sort(key=lambda item: (item[1]["timestamp"], item[0]), reverse=True)
+    return found
+
+
+def _months_ago(today, months):
+    """today の months か月前の月（YYYYMM）"""
+    index = today.year * 12 + (today.month - 1) - months
+    return f"{index // 12:04d}{index % 12 + 1:02d}"
+
+
+def compact_shards(export_dir="Export", keep_days=DEFAULT_KEEP_DAYS, max_months=DEFAULT_MAX_MONTHS, today=None, dry_run=False):
+    """
+    古いチャンクのCSVを月ごとのアーカイブに圧縮し、保存期間を過ぎたアーカイブを削除
+
+    Args:
+        export_dir (str): Export ディレクトリ
+        keep_days (int): 圧縮せずに残す日数（ファイル名の日付が today - keep_days より前のCSVを圧縮）
+        max_months (int, optional): アーカイブを残す月数（None の場合は削除しない）
+        today (datetime, optional): 基準日（未指定時は現在時刻）
+        dry_run (bool): True の場合は対象を数えるのみで、ファイルを変更しない
+
+    Returns:
+        dict: {"compacted": 圧縮したCSV数, "archives": 書き込んだアーカイブ数,
+               "expired": 削除したアーカイブ数, "freed_bytes": 削減したバイト数（目安）}
+
+    Note:
+        - アーカイブ内のファイル名は元のCSVと同じ（zipfile / pandas.read_csv でそのまま読める）
+        - 圧縮したCSVはマニフェストに残し、archive にアーカイブのパスを記録する
+    """
+    today = today or datetime.now()
+    cutoff = (today - timedelta(days=keep_days)).strftime("%Y%m%d")
+    expire_before = _months_ago(today, max_months) if max_months is not None else None
+
+    with _lock:
+        manifest = _load_manifest(export_dir)
+        files = manifest["files"]
+
+        by_month = {}
+        for name, entry in files.items():
+            if not entry.get("archive") and entry["date"] < cutoff:
+                by_month.setdefault(entry["date"][:6], []).append(name)
+
+        summary = {"compacted": 0, "archives": 0, "expired": 0, "freed_bytes": 0}
+        for month, names in sorted(by_month.items()):
+            if expire_before is not None and month < expire_before:
+                # 保存期間を過ぎた月は圧縮せずに削除
+                for name in names:
+                    summary["freed_bytes"] += files[name]["size"]
+                    if not dry_run:
+                        os.remove(os.path.join(export_dir, name))
+                        del files[name]
+                continue
+
+            archive = os.path.join(ARCHIVE_DIR, f"{month}.zip")
+            summary["compacted"] += len(names)
+            summary["archives"] += 1
+            if dry_run:
+                continue
+            os.makedirs(os.path.join(export_dir, ARCHIVE_DIR), exist_ok=True)
+            archive_path = os.path.join(export_dir, archive)
+            before = os.path.getsize(archive_path) if os.path.exists(archive_path) else 0
+            with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+                archived = set(zf.namelist())
+                for name in sorted(names):
+                    if name not in archived:
+                        zf.write(os.path.join(export_dir, name), arcname=name)
+            summary["freed_bytes"] += sum(files[name]["size"] for name in names) - (
+                os.path.getsize(archive_path) - before
+            )
+            for name in names:
+                os.remove(os.path.join(export_dir, name))
+                files[name]["archive"] = archive
+            logger.info(f"📦 {month}: {len(names)}件のCSVを {archive} に圧縮")
+
+        if expire_before is not None:
+            archive_dir = os.path.join(export_dir, ARCHIVE_DIR)
+            expired = {
+                os.path.join(ARCHIVE_DIR, filename)
+                for filename in (os.listdir(archive_dir) if os.path.isdir(archive_dir) else [])
+                if filename.endswith(".zip") and filename[:-4] < expire_before
+            }
+            for archive in sorted(expired):
+                summary["expired"] += 1
+                summary["freed_bytes"] += os.path.getsize(os.path.join(export_dir, archive))
+                if not dry_run:
+                    os.remove(os.path.join(export_dir, archive))
+                    logger.info(f"🗑️ 保存期間を過ぎたアーカイブを削除: {archive}")
+            if not dry_run:
+                for name in [name for name, entry in files.items() if entry.get("archive") in expired]:
+                    del files[name]
+
+        if not dry_run:
+            save_manifest(manifest, export_dir)
+    return summary
+
+
+def main(argv=None):
+    """メイン実行関数
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功した場合True
+    """
+    parser = argparse.ArgumentParser(
+        description="Export ディレクトリのマニフェストを同期し、古いCSVを月ごとのアーカイブに圧縮します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python export_manifest.py                                       # マニフェストを同期して概要を表示
+  python export_manifest.py --compact                             # 30日より前のCSVを圧縮
+  python export_manifest.py --compact --keep-days 7 --max-months 6 --dry-run
+        """,
+    )
+    parser.add_argument("--export-dir", default="Export", help="Export ディレクトリ (デフォルト: Export)")
+    parser.add_argument("--compact", action="store_true", help="古いCSVを月ごとのアーカイブ（archive/YYYYMM.zip）に圧縮")
+    parser.add_argument(
+        "--keep-days", type=int, default=DEFAULT_KEEP_DAYS, help=f"圧縮せずに残す日数 (デフォルト: {DEFAULT_KEEP_DAYS})"
+    )
+    parser.add_argument(
+        "--max-months",
+        type=int,
+        default=DEFAULT_MAX_MONTHS,
+        help=f"アーカイブを残す月数、0以下で削除しない (デフォルト: {DEFAULT_MAX_MONTHS})",
+    )
+    parser.add_argument("--date", default=None, help="基準日（YYYYMMDD形式、未指定時は現在時刻）")
+    parser.add_argument("--dry-run", action="store_true", help="圧縮・削除の対象を表示するのみ")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    if args.compact:
+        today = datetime.strptime(args.date, "%Y%m%d") if args.date else None
+        max_months = args.max_months if args.max_months > 0 else None
+        summary = compact_shards(
+            args.export_dir, keep_days=args.keep_days, max_months=max_months, today=today, dry_run=args.dry_run
+        )
+        label = "（dry-run）" if args.dry_run else ""
+        logger.info(
+            f"圧縮{label}: {summary['compacted']}件 → アーカイブ {summary['archives']}個 / "
+            f"期限切れアーカイブ {summary['expired']}個 / 削減 {summary['freed_bytes'] / (1024 * 1024):.1f} MB"
+        )
+
+    manifest = load_manifest(args.export_dir)
+    files = manifest["files"].values()
+    counts = Counter((entry["date"], entry["market"], entry["kind"]) for entry in files if not entry.get("archive"))
+    for (date, market, kind), count in sorted(counts.items(), reverse=True)[:20]:
+        logger.info(f"  {date} {market} {kind}: {count}件")
+    archived = sum(1 for entry in files if entry.get("archive"))
+    logger.info(f"マニフェスト: {len(manifest['files'])}件（うちアーカイブ済み {archived}件）")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+出力列に基づく取得計画（yfinance エンドポイントの選択）
+
+出力CSVのうち実際に使う列から、銘柄ごとに呼び出す必要のあるエンドポイント
+（info / financials / balance_sheet / history / 郵便番号API / 四半期財務諸表）を
+決定します。使わない列のためのリクエストを省くことで、軽いプロファイルでは
+1銘柄あたりの処理時間を大きく短縮できます。
+
+主な機能:
+- 列 → 必要なエンドポイントの対応表（派生指標・成長率は元になる生データ列を経由して解決）
+- 用途別のプロファイル（full / no-history / valuation）
+- 出力列の一覧からエンドポイントの集合（取得計画）を作成
+
+使用例:
+    >>> plan_endpoints(resolve_columns("valuation"))
+    frozenset({'info'})
+    >>> sorted(plan_endpoints(resolve_columns("no-history")))
+    ['balance_sheet', 'financials', 'info', 'zip']
+
+Note:
+    - info は銘柄の存在確認・会社名・業種の補完にも使うため、常に取得する
+    - 省いたエンドポイントに由来する列は出力CSVに空（NaN）として残る（列構成は変わらない）
+"""
+
+from schema import GROWTH_COLUMNS, OUTPUT_COLUMNS, QUARTERLY_COLUMNS
+
+# エンドポイント
+INFO = "info"
+FINANCIALS = "financials"
+BALANCE_SHEET = "balance_sheet"
+HISTORY = "history"
+ZIP = "zip"
+QUARTERLY = "quarterly"
+
+ALL_ENDPOINTS = frozenset([INFO, FINANCIALS, BALANCE_SHEET, HISTORY, ZIP, QUARTERLY])
+
+# 生データ列 -> 取得に必要なエンドポイント（記載のない列は info のみ）
+COLUMN_ENDPOINTS = {
+    "決算月": {BALANCE_SHEET},
+    "都道府県": {ZIP},
+    "売上高": {FINANCIALS},
+    "営業利益": {FINANCIALS},
+    "当期純利益": {FINANCIALS},
+    "負債": {BALANCE_SHEET},
+    "流動負債": {BALANCE_SHEET},
+    "流動資産": {BALANCE_SHEET},
+    "総負債": {BALANCE_SHEET},
+    "現金及び現金同等物": {BALANCE_SHEET},
+    "投資有価証券": {BALANCE_SHEET},
+    "自己資本": {BALANCE_SHEET},
+    "総資産": {BALANCE_SHEET},
+    "当期純利益(前年度)": {FINANCIALS},
+    "希薄化後平均株式数(前年度)": {FINANCIALS},
+    "株価(前年度末)": {FINANCIALS, HISTORY},
+}
+
+# 派生指標 -> 計算に使う列（metrics.compute_derived_metrics と対応）
+DERIVED_INPUTS = {
+    "自己資本比率": ["自己資本", "総資産"],
+    "ネットキャッシュ": ["流動資産", "投資有価証券", "負債"],
+    "ネットキャッシュ比率": ["ネットキャッシュ", "時価総額"],
+    "EPS(前年度)": ["当期純利益(前年度)", "希薄化後平均株式数(前年度)"],
+    "PER(前年度)": ["EPS(前年度)", "株価(前年度末)"],
+}
+
+# 縦持ち財務諸表から計算する列 -> 必要なエンドポイント
+STATEMENT_COLUMN_ENDPOINTS = {
+    **{column: {FINANCIALS} for column in GROWTH_COLUMNS},
+    # 四半期は年次のバランスシートの期末日で追加取得の要否を判定する
+    **{column: {QUARTERLY, BALANCE_SHEET} for column in QUARTERLY_COLUMNS},
+}
+
+# プロファイル -> 出力列（None は全列）
+PROFILES = {
+    "full": None,
+    # 前年度PER・EPSを除く（株価履歴 history の呼び出しを省略）
+    "no-history": [c for c in OUTPUT_COLUMNS if c not in ("PER(前年度)", "EPS(前年度)")],
+    # info のみで取得できるバリュエーション指標（財務諸表・株価履歴・郵便番号APIを省略）
+    "valuation": [
+        "会社名",
+        "銘柄コード",
+        "業種",
+        "優先市場",
+        "市場タイプ",
+        "時価総額",
+        "PBR",
+        "PER(会予)",
+        "PER(過去12ヶ月)",
+        "配当方向性",
+        "配当利回り",
+        "EPS(過去12ヶ月)",
+        "EPS(予想)",
+        "営業利益率",
+        "純利益率",
+        "ROE",
+    ],
+}
+
+
+def resolve_columns(profile="full", columns=None):
+    """プロファイルまたは列の一覧から出力列を決定
+
+    Args:
+        profile (str): PROFILES のキー（デフォルト: full）
+        columns (list, optional): 出力列の一覧（指定時は profile より優先）
+
+    Returns:
+        list: 出力列（OUTPUT_COLUMNS + QUARTERLY_COLUMNS の順）
+
+    Raises:
+        ValueError: 未知のプロファイル・列名
+    """
+    if columns is None:
+        if profile not in PROFILES:
+            raise ValueError(f"未知のプロファイル: {profile}（{', '.join(PROFILES)}）")
+        columns = PROFILES[profile]
+        if columns is None:
+            return OUTPUT_COLUMNS + QUARTERLY_COLUMNS
+
+    known = OUTPUT_COLUMNS + QUARTERLY_COLUMNS
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError(f"未知の列: {', '.join(unknown)}")
+    wanted = set(columns)
+    return [c for c in known if c in wanted]
+
+
+def plan_endpoints(columns, quarterly=False):
+    """出力列の取得に必要なエンドポイントの集合を作成
+
+    Args:
+        columns (list): 出力列（resolve_columns の戻り値）
+        quarterly (bool): 四半期財務諸表を取得する場合True（False の場合は四半期の列を無視）
+
+    Returns:
+        frozenset: 呼び出すエンドポイント（INFO は常に含む）
+    """
+    endpoints = {INFO}
+    pending = list(columns)
+    seen = set()
+    while pending:
+        column = pending.pop()
+        if column in seen:
+            continue
+        seen.add(column)
+        if column in DERIVED_INPUTS:
+            pending.extend(DERIVED_INPUTS[column])
+        elif column in STATEMENT_COLUMN_ENDPOINTS:
+            if quarterly or column not in QUARTERLY_COLUMNS:
+                endpoints |= STATEMENT_COLUMN_ENDPOINTS[column]
+        else:
+            endpoints |= COLUMN_ENDPOINTS.get(column, set())
+    return frozenset(endpoints)
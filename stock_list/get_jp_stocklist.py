@@ -36,68 +36,97 @@ JPX（日本取引所グループ）の公式ウェブサイトから、
     - openpyxl: .xlsx書き込み
 """
 
-import requests
-import pandas as pd
-import xlrd
-from openpyxl import Workbook
 import json
 import logging
 
-# ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
+from log_setup import setup_logging
+
 logger = logging.getLogger(__name__)
 
 # ファイルのURL
-url = "https://www.jpx.co.jp/markets/statistics-equities/misc/tvdivq0000001vg2-att/data_j.xls"
+JPX_LIST_URL = "https://www.jpx.co.jp/markets/statistics-equities/misc/tvdivq0000001vg2-att/data_j.xls"
+
+# 抽出対象の市場区分
+TARGET_MARKETS = [
+    "プライム（内国株式）",
+    "スタンダード（内国株式）",
+    "グロース（内国株式）",
+]
+
+
+def download_jp_stock_list(url=JPX_LIST_URL, xls_file="tickers.xls", xlsx_file="converted.xlsx"):
+    """JPX公式サイトから上場企業リストを取得
+
+    Args:
+        url (str): JPXの上場銘柄一覧（.xls）のURL
+        xls_file (str): ダウンロードしたファイルの保存先（一時ファイル）
+        xlsx_file (str): .xlsx 変換後のファイルの保存先（一時ファイル）
+
+    Returns:
+        list: 株式情報の辞書のリスト（コード、銘柄名、市場・商品区分、33業種区分）
+
+    Note:
+        - requests / pandas / xlrd / openpyxl はこの関数の呼び出し時にのみインポート
+        - ダウンロードは共有HTTPセッション（http_client.py）を使用
+    """
+    import pandas as pd
+    import xlrd
+    from openpyxl import Workbook
+
+    from http_client import get_session
+
+    # ファイルをダウンロード
+    response = get_session().get(url)
+
+    # ダウンロードしたファイルを一時的なファイルに保存
+    with open(xls_file, "wb") as f:
+        f.write(response.content)
+
+    # .xlsファイルを .xlsx に変換
+    workbook_xls = xlrd.open_workbook(xls_file)
+    sheet_xls = workbook_xls.sheet_by_index(0)
+
+    workbook_xlsx = Workbook()
+    sheet_xlsx = workbook_xlsx.active
+
+    # データを .xls から .xlsx に書き込む
+    for row in range(sheet_xls.nrows):
+        for col in range(sheet_xls.ncols):
+            sheet_xlsx.cell(row=row + 1, column=col + 1).value = sheet_xls.cell_value(row, col)
 
-# ファイルをダウンロード
-response = requests.get(url)
+    # .xlsx ファイルを保存
+    workbook_xlsx.save(xlsx_file)
 
-# ダウンロードしたファイルを一時的なファイルに保存
-xls_file = "tickers.xls"
-with open(xls_file, "wb") as f:
-    f.write(response.content)
+    # 変換された .xlsx ファイルを読み込む
+    data = pd.read_excel(xlsx_file)
 
-# .xlsファイルを .xlsx に変換
-xlsx_file = "converted.xlsx"
-workbook_xls = xlrd.open_workbook(xls_file)
-sheet_xls = workbook_xls.sheet_by_index(0)
+    # 対象市場区分に一致する行を抽出
+    filtered_df = data[data["市場・商品区分"].isin(TARGET_MARKETS)]
 
-workbook_xlsx = Workbook()
-sheet_xlsx = workbook_xlsx.active
+    # 必要な列だけを抽出
+    selected_df = filtered_df[["コード", "銘柄名", "市場・商品区分", "33業種区分"]]
 
-# データを .xls から .xlsx に書き込む
-for row in range(sheet_xls.nrows):
-    for col in range(sheet_xls.ncols):
-        sheet_xlsx.cell(row=row + 1, column=col + 1).value = sheet_xls.cell_value(row, col)
+    # DataFrame を JSON 形式（リストの辞書形式）に変換
+    return selected_df.to_dict(orient="records")
 
-# .xlsx ファイルを保存
-workbook_xlsx.save(xlsx_file)
 
-# 変換された .xlsx ファイルを読み込む
-data = pd.read_excel(xlsx_file)
+def main(argv=None, output_file="stocks_all.json"):
+    """JPXの上場企業リストを取得してJSONファイルに保存
 
-# OR条件を使用して条件に一致する行を抽出
-condition = (
-    (data["市場・商品区分"] == "プライム（内国株式）")
-    | (data["市場・商品区分"] == "スタンダード（内国株式）")
-    | (data["市場・商品区分"] == "グロース（内国株式）")
-)
+    Args:
+        argv (list, optional): 引数リスト（未使用、CLIの呼び出し形式を揃えるため）
+        output_file (str): 出力JSONファイル名（デフォルト: stocks_all.json）
+    """
+    setup_logging()
 
-filtered_df = data[condition]
+    json_list = download_jp_stock_list()
 
-# 必要な列だけを抽出
-selected_df = filtered_df[["コード", "銘柄名", "市場・商品区分", "33業種区分"]]
+    # JSONファイルに保存
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(json_list, f, ensure_ascii=False, indent=2)
 
-# DataFrame を JSON 形式（リストの辞書形式）に変換
-json_list = selected_df.to_dict(orient="records")
+    logger.info(f"JSONファイルに保存しました: {output_file}")
 
-# JSONファイルに保存
-with open("stocks_all.json", "w", encoding="utf-8") as f:
-    json.dump(json_list, f, ensure_ascii=False, indent=2)
 
-logger.info("JSONファイルに保存しました: stocks_all.json")
+if __name__ == "__main__":
+    main()
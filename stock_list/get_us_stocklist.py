@@ -42,12 +42,9 @@ import requests
 import yfinance as yf
 from typing import List, Dict, Optional
 
-# ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
+from log_setup import setup_logging
+from http_client import get_session, install_yf_session
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,7 +77,7 @@ def get_us_ticker_list() -> List[str]:
             "Host": "www.sec.gov",
         }
 
-        response = requests.get(url, headers=headers, timeout=30)
+        response = get_session().get(url, headers=headers, timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -132,11 +129,12 @@ def get_stock_info(ticker: str) -> Optional[Dict[str, str]]:
         - エラー時はNoneを返す
     """
     try:
+        install_yf_session()
         stock = yf.Ticker(ticker)
         info = stock.info
 
         if not info:
-            logger.warning(f"  ⚠️ 情報が取得できませんでした: {ticker}")
+            logger.warning("  ⚠️ 情報が取得できませんでした: %s", ticker)
             return None
 
         # 市場区分を取得
@@ -163,36 +161,30 @@ def get_stock_info(ticker: str) -> Optional[Dict[str, str]]:
             "市場タイプ": "US",
         }
 
-        logger.debug(f"  ✅ {ticker}: {result['銘柄名']} ({market})")
+        logger.debug("  ✅ %s: %s (%s)", ticker, result["銘柄名"], market)
         return result
 
     except Exception as e:
-        logger.warning(f"  ⚠️ {ticker}の情報取得に失敗: {e}")
+        logger.warning("  ⚠️ %sの情報取得に失敗: %s", ticker, e)
         return None
 
 
-def main():
-    """メイン処理
+def iter_us_stock_list(tickers=None, interval=0.5):
+    """ティッカーごとに銘柄情報を取得し、取得できたものから順に返すジェネレータ
 
-    SECの公開データからティッカーリストを取得し、各銘柄の詳細情報を収集してJSONファイルに保存します。
-    """
-    logger.info("=" * 60)
-    logger.info("🚀 米国株リスト取得プロセス開始")
-    logger.info("=" * 60)
+    Args:
+        tickers (List[str], optional): ティッカーシンボルのリスト（未指定時はSECから取得）
+        interval (float): API制限を避けるための銘柄間の待機秒数（デフォルト: 0.5）
 
-    # SECからティッカーリストを取得
-    tickers = get_us_ticker_list()
+    Yields:
+        Dict[str, str]: get_stock_info の戻り値（取得失敗の銘柄はスキップ）
 
-    if not tickers:
-        logger.error("❌ SECからのティッカーリスト取得に失敗しました")
-        return
-
-    logger.info(f"取得対象: {len(tickers)}社")
-    logger.info("⚠️  注意: 大量のデータを取得するため、実行に時間がかかります")
-    logger.info("-" * 60)
+    Note:
+        - 全銘柄の取得完了を待たずに後続処理（pipeline.py の分割・財務データ取得）へ渡せる
+    """
+    if tickers is None:
+        tickers = get_us_ticker_list()
 
-    # 各銘柄の情報を取得
-    stock_list = []
     success_count = 0
     fail_count = 0
 
@@ -200,18 +192,49 @@ def main():
         if i % 100 == 0:
             logger.info(f"[{i}/{len(tickers)}] 進捗: {i}/{len(tickers)} (成功: {success_count}, 失敗: {fail_count})")
         else:
-            logger.debug(f"[{i}/{len(tickers)}] 処理中: {ticker}")
+            logger.debug("[%d/%d] 処理中: %s", i, len(tickers), ticker)
 
         stock_info = get_stock_info(ticker)
         if stock_info:
-            stock_list.append(stock_info)
             success_count += 1
+            yield stock_info
         else:
             fail_count += 1
 
         # API制限を避けるため、少し待機
         if i < len(tickers):
-            time.sleep(0.5)
+            time.sleep(interval)
+
+
+def main(argv=None):
+    """メイン処理
+
+    SECの公開データからティッカーリストを取得し、各銘柄の詳細情報を収集してJSONファイルに保存します。
+
+    Args:
+        argv (list, optional): 引数リスト（未使用、CLIの呼び出し形式を揃えるため）
+    """
+    setup_logging()
+
+    logger.info("=" * 60)
+    logger.info("🚀 米国株リスト取得プロセス開始")
+    logger.info("=" * 60)
+
+    # SECからティッカーリストを取得
+    tickers = get_us_ticker_list()
+
+    if not tickers:
+        logger.error("❌ SECからのティッカーリスト取得に失敗しました")
+        return
+
+    logger.info(f"取得対象: {len(tickers)}社")
+    logger.info("⚠️  注意: 大量のデータを取得するため、実行に時間がかかります")
+    logger.info("-" * 60)
+
+    # 各銘柄の情報を取得
+    stock_list = list(iter_us_stock_list(tickers))
+    success_count = len(stock_list)
+    fail_count = len(tickers) - success_count
 
     logger.info("-" * 60)
     logger.info(f"取得成功: {success_count}社")
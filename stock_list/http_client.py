@@ -0,0 +1,160 @@
+"""
+共有HTTPセッション（接続プール）モジュール
+
+外部APIへのリクエストで1つのセッションを共有し、Keep-Alive による
+TCP/TLS 接続の再利用を行います。郵便番号API・SEC・JPX へのリクエストと、
+yfinance（プロセス全体で1つの YfData に設定するセッション）の両方で使用します。
+
+主な機能:
+- ホストごとの接続プール（プール数・1ホストあたりの最大接続数を設定可能）
+- スレッド間で共有する requests セッションの遅延作成（get_session）
+- yfinance 用の共有セッションの作成と1回だけの設定（install_yf_session）
+- yfinance の Cookie キャッシュの保存先設定（プロセス・ジョブ間で Cookie を再利用）
+
+使用例:
+    >>> from http_client import configure, get_session, install_yf_session
+    >>> configure(pool_maxsize=8, yf_cache_dir="Export/.yf_cache")
+    >>> get_session().get("https://digital-address.app/1000001", timeout=10)
+    >>> install_yf_session()
+    >>> yf.Ticker("7203.T")                     # session を渡さず、設定済みの共有セッションを使用
+
+依存関係:
+    - requests: 接続プール（HTTPAdapter）
+    - curl_cffi: yfinance 用セッション（未インストール時は yfinance の既定セッションを使用）
+"""
+
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 接続プールの既定値（プールを保持するホスト数・1ホストあたりの最大接続数）
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+_lock = threading.Lock()
+_settings = {"pool_connections": POOL_CONNECTIONS, "pool_maxsize": POOL_MAXSIZE}
+_session = None
+_yf_session = None
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """接続プール付きの requests.Session を作成
+
+    Args:
+        pool_connections (int): プールを保持するホスト数
+        pool_maxsize (int): 1ホストあたりの最大接続数（並列スレッド数以上を推奨）
+
+    Returns:
+        requests.Session: http / https に HTTPAdapter を設定したセッション
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_yf_session(pool_maxsize=POOL_MAXSIZE):
+    """yfinance に渡す curl_cffi のセッションを作成
+
+    Args:
+        pool_maxsize (int): curl ハンドルが保持する最大接続数（CURLOPT_MAXCONNECTS）
+
+    Returns:
+        curl_cffi.requests.Session: ブラウザの TLS を模倣するセッション
+
+    Raises:
+        ImportError: curl_cffi が無い場合
+    """
+    from curl_cffi import CurlOpt
+    from curl_cffi import requests as curl_requests
+
+    return curl_requests.Session(impersonate="chrome", curl_options={CurlOpt.MAXCONNECTS: pool_maxsize})
+
+
+def configure(pool_connections=None, pool_maxsize=None, yf_cache_dir=None):
+    """共有セッションの接続プール設定と yfinance の Cookie キャッシュ保存先を変更
+
+    Args:
+        pool_connections (int, optional): プールを保持するホスト数
+        pool_maxsize (int, optional): 1ホストあたりの最大接続数
+        yf_cache_dir (str, optional): yfinance のキャッシュ（Cookie・タイムゾーン）の保存先
+            - 同じディレクトリを使う別プロセス・別ジョブは Cookie を再利用し、取得し直さない
+
+    Note:
+        - 作成済みのセッション（yfinance 用を含む）は閉じ、次回の get_session() / install_yf_session() で
+          新しい設定で作り直す（取得スレッドの開始前に呼び出すこと）
+    """
+    global _session, _yf_session
+    with _lock:
+        if pool_connections is not None:
+            _settings["pool_connections"] = pool_connections
+        if pool_maxsize is not None:
+            _settings["pool_maxsize"] = pool_maxsize
+        for session in (_session, _yf_session):
+            if session is not None:
+                session.close()
+        _session = None
+        _yf_session = None
+
+    if yf_cache_dir:
+        import yfinance as yf
+
+        yf.set_tz_cache_location(yf_cache_dir)
+        logger.info(f"yfinance のキャッシュ保存先: {yf_cache_dir}")
+
+
+def get_session():
+    """共有の requests.Session を取得（初回呼び出し時に作成）
+
+    Returns:
+        requests.Session: 全スレッドで共有する接続プール付きセッション
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session(**_settings)
+        return _session
+
+
+def install_yf_session():
+    """yfinance の共有セッションを作成し、yfinance に1回だけ設定（2回目以降は設定済みのセッションを返す）
+
+    Returns:
+        curl_cffi.requests.Session: ブラウザの TLS を模倣するセッション
+            - 最大接続数は configure(pool_maxsize=...) の設定を使用
+        None: curl_cffi が無い場合（yfinance の既定セッションを使用）
+
+    Note:
+        - yfinance は YfData（プロセス全体で1つ）にセッションを保持し、Ticker(session=...) のたびに
+          全スレッドのセッションを置き換えるため、Ticker・download には session を渡さない
+        - 全スレッドが同じセッション・Cookie・crumb を使う（curl_cffi はスレッドごとに curl ハンドルを作るため、
+          各取得スレッド・timeouts.py のワーカーはそれぞれの接続を再利用する）
+    """
+    global _yf_session
+    with _lock:
+        if _yf_session is None:
+            try:
+                session = create_yf_session(_settings["pool_maxsize"])
+            except ImportError:
+                return None
+            from yfinance.data import YfData
+
+            YfData(session=session)
+            _yf_session = session
+        return _yf_session
+
+
+def close():
+    """共有セッションを閉じる（接続プールを解放）"""
+    global _session, _yf_session
+    with _lock:
+        for session in (_session, _yf_session):
+            if session is not None:
+                session.close()
+        _session = None
+        _yf_session = None
@@ -0,0 +1,124 @@
+"""
+ログ設定ユーティリティ
+
+各スクリプト共通のログ設定を提供します。インポート時には何も設定せず、
+コマンドとして実行されたときにのみ setup_logging を呼び出します。
+
+主な機能:
+- 標準エラー出力 + サイズ上限付きでローテーションするログファイル
+- JSON Lines 形式の構造化ログ（銘柄ごとの ticker / status / duration などを項目として出力）
+- キュー経由の非同期ログ（queued=True）: 呼び出し側スレッドはキューに積むだけで、
+  ファイル・標準エラー出力への書き込みはバックグラウンドスレッドが行う
+
+使用例:
+    >>> setup_logging("Export/stock_data_log.txt", json_file="Export/stock_data_log.jsonl", queued=True)
+    >>> logger.info("取得完了: %s", name, extra={"ticker": "7203.T", "status": "ok", "duration": 1.2})
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# ログファイルのローテーション設定（1ファイルあたりの上限サイズ・保持世代数）
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# 構造化ログに出力する extra 項目（logger.info(..., extra={...}) で指定）
+STRUCTURED_FIELDS = ("ticker", "code", "status", "duration")
+
+
+class JsonFormatter(logging.Formatter):
+    """ログレコードを1行のJSONに変換するフォーマッター
+
+    Note:
+        - time, level, logger, message に加え、STRUCTURED_FIELDS のうちレコードに設定された項目を出力
+        - 日本語はエスケープせずにそのまま出力（ensure_ascii=False）
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _rotating_file_handler(path, max_bytes, backup_count):
+    """親ディレクトリを作成してローテーション付きファイルハンドラーを作成"""
+    log_dir = os.path.dirname(path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+def setup_logging(
+    log_file=None,
+    level=logging.INFO,
+    json_file=None,
+    queued=False,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+):
+    """ルートロガーを設定（標準エラー出力 + 任意のログファイル）
+
+    Args:
+        log_file (str, optional): ログファイルのパス。未指定時は標準エラー出力のみ
+            - 親ディレクトリが存在しない場合は自動作成
+            - max_bytes を超えるとローテーション（log_file.1, log_file.2, ...）
+        level (int): ログレベル（デフォルト: logging.INFO）
+        json_file (str, optional): JSON Lines 形式の構造化ログの出力先（ローテーション付き）
+        queued (bool): Trueの場合、ログ出力をバックグラウンドスレッドに任せる
+            - ルートロガーには QueueHandler のみを設定し、QueueListener が各ハンドラーに書き込む
+            - リスナーはプロセス終了時に停止し、キューに残ったログを書き出す
+        max_bytes (int): ログファイル1つあたりの上限サイズ（バイト）
+        backup_count (int): ローテーションで保持する世代数
+
+    Returns:
+        logging.handlers.QueueListener: queued=True の場合はリスナー（それ以外はNone）
+
+    Note:
+        - 既にハンドラーが設定されている場合は何もしない（logging.basicConfig と同じ挙動）
+    """
+    if logging.getLogger().handlers:
+        return None
+
+    text_formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, _rotating_file_handler(log_file, max_bytes, backup_count))
+    for handler in handlers:
+        handler.setFormatter(text_formatter)
+    if json_file:
+        json_handler = _rotating_file_handler(json_file, max_bytes, backup_count)
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+
+    listener = None
+    if queued:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        # QueueHandler はメッセージ本文のみを組み立て、時刻・レベルの付与はリスナー側のフォーマッターが行う
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers = [queue_handler]
+
+    logging.basicConfig(level=level, handlers=handlers)
+    return listener
@@ -0,0 +1,609 @@
+"""
+派生指標の一括計算モジュール
+
+sumalize.py が収集した生データ（財務諸表・市場データ）から、派生指標を
+pandas/NumPyのベクトル演算でまとめて計算します。
+
+主な機能:
+- 自己資本比率、ネットキャッシュ、ネットキャッシュ比率の一括計算
+- 前年度EPS・前年度PERの一括計算
+- 新しい株価に合わせた株価依存の指標（時価総額・PBR・PER・配当利回り）の一括更新（price_refresh.py）
+- 複数期間の財務諸表（縦持ち）から成長率（前年比・3年CAGR）を一括計算
+- 四半期財務諸表からTTM（直近4四半期合計）と直近四半期末の値を一括計算（四半期が無い銘柄は年次で補完）
+- 既存の生データスナップショット（*_stocks_raw_*.csv）からの再計算（ネットワーク不要）
+- 業種・市場ごとの集計値（件数・平均・四分位・中央値）の一括計算（結合時の付帯ファイル）
+- 主要指標の全銘柄内・業種内パーセンタイル順位の一括計算（結合時の --ranks）
+
+使用例:
+    $ python metrics.py Export/japanese_stocks_raw_1_20251020_123456.csv
+    $ python metrics.py Export/japanese_stocks_raw_1_20251020_123456.csv -o recomputed.csv
+    $ python metrics.py Export/japanese_stocks_raw_1_20251020_123456.csv \
+        --statements Export/japanese_stocks_statements_1_20251020_123456.csv
+
+依存関係:
+    - pandas: データ処理
+    - numpy: ベクトル演算
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from schema import (
+    CATEGORICAL_COLUMNS,
+    GROWTH_ITEMS,
+    LATEST_QUARTER_ITEMS,
+    OUTPUT_COLUMNS,
+    QUARTERLY_COLUMNS,
+    STRING_COLUMNS,
+    TTM_ITEMS,
+)
+from statements import load_statements
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 投資有価証券の評価掛け目（保守的な見積もり）
+INVESTMENT_HAIRCUT = 0.7
+
+# 株価に比例する指標（株価が r 倍になると r 倍）と、反比例する指標（1/r 倍）
+PRICE_PROPORTIONAL_COLUMNS = ["時価総額", "PBR", "PER(会予)", "PER(過去12ヶ月)"]
+PRICE_INVERSE_COLUMNS = ["配当利回り"]
+
+# 集計値を計算するグループ（列名）。"全体" は全銘柄を1グループとして集計
+AGGREGATE_GROUPS = ["業種", "優先市場"]
+
+# 縦持ち集計ファイルの列
+AGGREGATE_COLUMNS = ["集計単位", "グループ", "項目", "件数", "平均", "第1四分位", "中央値", "第3四分位"]
+
+
+# パーセンタイル順位を付ける指標
+RANK_COLUMNS = [
+    "PBR",
+    "PER(会予)",
+    "PER(過去12ヶ月)",
+    "PER(前年度)",
+    "ROE",
+    "配当利回り",
+    "自己資本比率",
+    "ネットキャッシュ比率",
+]
+
+# 順位列の接尾辞（全銘柄内 / 業種内）。例: "PBR_全体順位", "PBR_業種内順位"
+RANK_SUFFIX = "_全体順位"
+GROUP_RANK_SUFFIX = "_業種内順位"
+RANK_GROUP = "業種"
+
+
+def _numeric_column(df, column):
+    """DataFrameの列を数値Seriesとして取得（列が無い場合はNaN）
+
+    Args:
+        df (pd.DataFrame): 対象のDataFrame
+        column (str): 列名
+
+    Returns:
+        pd.Series: float64のSeries（変換できない値はNaN）
+    """
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype="float64")
+    return pd.to_numeric(df[column], errors="coerce").astype("float64")
+
+
+def _nonzero(series):
+    """欠損でも0でもない要素のマスクを返す"""
+    return series.notna() & (series != 0)
+
+
+def calculate_net_cash(current_assets, investments, total_liabilities):
+    """ネットキャッシュを一括計算: 流動資産 + 投資有価証券×70% - 負債
+
+    Args:
+        current_assets (pd.Series): 流動資産
+        investments (pd.Series): 投資有価証券
+        total_liabilities (pd.Series): 総負債
+
+    Returns:
+        pd.Series: ネットキャッシュ額（流動資産または負債が欠損の行はNaN）
+
+    Note:
+        - 投資有価証券は70%で評価（保守的な見積もり）
+        - 流動資産と総負債は必須、投資有価証券はオプション（欠損は0扱い）
+
+    Examples:
+        >>> calculate_net_cash(pd.Series([1e7, 1e7]), pd.Series([5e6, None]), pd.Series([3e6, 3e6])).tolist()
+        [10500000.0, 7000000.0]
+    """
+    net_cash = current_assets + investments.fillna(0) * INVESTMENT_HAIRCUT - total_liabilities
+    return net_cash.where(current_assets.notna() & total_liabilities.notna())
+
+
+def compute_derived_metrics(raw_df):
+    """生データから派生指標を一括計算
+
+    Args:
+        raw_df (pd.DataFrame): 生データ（schema.RAW_COLUMNS の列を含むDataFrame）
+
+    Returns:
+        pd.DataFrame: 派生指標列を追加・上書きした新しいDataFrame
+            - 自己資本比率: 自己資本 / 総資産
+            - ネットキャッシュ: 流動資産 + 投資有価証券×70% - 負債
+            - ネットキャッシュ比率: ネットキャッシュ / 時価総額
+            - EPS(前年度): 当期純利益(前年度) / 希薄化後平均株式数(前年度)
+            - PER(前年度): 株価(前年度末) / EPS(前年度)
+
+    Note:
+        - 行ごとのPythonループを使わず列単位で計算する
+        - 分母が欠損または0の行は欠損（NaN）となる
+        - 前年度EPS/PERは前年度末株価が取得できた行のみ計算する
+    """
+    df = raw_df.copy()
+
+    market_cap = _numeric_column(df, "時価総額")
+    total_equity = _numeric_column(df, "自己資本")
+    total_assets = _numeric_column(df, "総資産")
+
+    # 自己資本比率
+    df["自己資本比率"] = (total_equity / total_assets).where(_nonzero(total_equity) & _nonzero(total_assets))
+
+    # ネットキャッシュとネットキャッシュ比率
+    net_cash = calculate_net_cash(
+        _numeric_column(df, "流動資産"),
+        _numeric_column(df, "投資有価証券"),
+        _numeric_column(df, "負債"),
+    )
+    df["ネットキャッシュ"] = net_cash
+    df["ネットキャッシュ比率"] = (net_cash / market_cap).where(_nonzero(net_cash) & _nonzero(market_cap))
+
+    # 前年度EPSとPER
+    net_income_last_year = _numeric_column(df, "当期純利益(前年度)")
+    shares_last_year = _numeric_column(df, "希薄化後平均株式数(前年度)")
+    price_last_year = _numeric_column(df, "株価(前年度末)")
+
+    valid = _nonzero(net_income_last_year) & _nonzero(shares_last_year) & _nonzero(price_last_year)
+    eps_last_year = (net_income_last_year / shares_last_year).where(valid)
+    df["EPS(前年度)"] = eps_last_year
+    df["PER(前年度)"] = price_last_year / eps_last_year
+
+    return df
+
+
+def stored_prices(raw_df):
+    """生データ取得時点の株価を一括取得
+
+    Args:
+        raw_df (pd.DataFrame): 生データ
+
+    Returns:
+        pd.Series: 株価（float64）
+            - 株価列が無い・欠損の行（株価列の追加前のスナップショット）は
+              PER(過去12ヶ月)×EPS(過去12ヶ月)、次に PER(会予)×EPS(予想) から推定
+    """
+    price = _numeric_column(raw_df, "株価")
+    for per_column, eps_column in (("PER(過去12ヶ月)", "EPS(過去12ヶ月)"), ("PER(会予)", "EPS(予想)")):
+        implied = _numeric_column(raw_df, per_column) * _numeric_column(raw_df, eps_column)
+        price = price.where(_nonzero(price), implied.where(implied > 0))
+    return price
+
+
+def reprice_raw_snapshot(raw_df, new_prices):
+    """新しい株価に合わせて株価に依存する指標を一括更新
+
+    Args:
+        raw_df (pd.DataFrame): 生データ（前回取得時の財務データ・指標）
+        new_prices (pd.Series): 新しい株価（raw_df と同じインデックス、取得できなかった行は NaN）
+
+    Returns:
+        pd.DataFrame: 更新した新しいDataFrame
+            - 時価総額・PBR・PER(会予)・PER(過去12ヶ月): 株価の比率（新 / 旧）を掛ける
+            - 配当利回り: 株価の比率で割る
+            - 株価: 新しい株価
+
+    Note:
+        - 新しい株価が無い行・取得時点の株価が不明な行は更新しない
+        - 財務データ（EPS・自己資本・負債など）は据え置き。ネットキャッシュ比率は
+          compute_derived_metrics（build_output_frame）で更新後の時価総額から再計算する
+        - PER(前年度) は前年度末の株価で計算するため更新しない
+    """
+    df = raw_df.copy()
+    old_prices = stored_prices(df)
+    new_prices = pd.to_numeric(new_prices, errors="coerce").astype("float64")
+    ratio = (new_prices / old_prices).where(_nonzero(old_prices) & (new_prices > 0))
+    repriced = ratio.notna()
+
+    for column in PRICE_PROPORTIONAL_COLUMNS:
+        value = _numeric_column(df, column)
+        df[column] = value.where(~repriced, value * ratio)
+    for column in PRICE_INVERSE_COLUMNS:
+        value = _numeric_column(df, column)
+        df[column] = value.where(~repriced, value / ratio)
+    df["株価"] = _numeric_column(df, "株価").where(~repriced, new_prices)
+    return df
+
+
+def _period_gap_years(later, earlier):
+    """2つの決算期（日付Series）の間隔を年単位で返す"""
+    return (later - earlier).dt.days / 365.25
+
+
+def _latest_periods_wide(statements_df, frequency, items, periods):
+    """縦持ち財務諸表から銘柄ごとの直近N期分を横持ちに展開
+
+    Args:
+        statements_df (pd.DataFrame): 縦持ち財務諸表（銘柄コード, 頻度, 決算期, 項目, 値）
+        frequency (str): 対象の頻度（"annual" または "quarterly"）
+        items (list): 対象の項目名
+        periods (int): 展開する期数（最新期から数える）
+
+    Returns:
+        pd.DataFrame: 銘柄コード（文字列）をインデックス、(値/決算期, 項目, 期番号) を列とするDataFrame
+            - 期番号 0 が最新期
+        None: 対象データが無い場合
+    """
+    df = statements_df[(statements_df["頻度"] == frequency) & statements_df["項目"].isin(items)]
+    if df.empty:
+        return None
+
+    # カテゴリ型で渡されても日付・文字列として比較できるよう変換する
+    df = df.assign(
+        銘柄コード=df["銘柄コード"].astype(str),
+        項目=df["項目"].astype(str),
+        決算期=pd.to_datetime(df["決算期"].astype(str), errors="coerce"),
+        値=pd.to_numeric(df["値"], errors="coerce"),
+    ).dropna(subset=["決算期", "値"])
+    # 同じ銘柄・項目・決算期のレコードが重複していても1期として数える（後に追記された値を優先）
+    df = df.drop_duplicates(["銘柄コード", "項目", "決算期"], keep="last")
+
+    # 銘柄・項目ごとに新しい順の期番号（0: 最新期）を振り、N期分を横持ちにする
+    df = df.sort_values(["銘柄コード", "項目", "決算期"], ascending=[True, True, False])
+    df["期"] = df.groupby(["銘柄コード", "項目"]).cumcount()
+    df = df[df["期"] < periods]
+    return df.set_index(["銘柄コード", "項目", "期"])[["値", "決算期"]].unstack(["項目", "期"])
+
+
+def _wide_column(wide, field, item, lag):
+    """横持ちテーブルから (field, item, lag) の列を取得（無い場合は欠損Series）"""
+    key = (field, item, lag)
+    if key in wide.columns:
+        return wide[key] if field == "値" else pd.to_datetime(wide[key])
+    return pd.Series(np.nan if field == "値" else pd.NaT, index=wide.index)
+
+
+def compute_growth_metrics(statements_df, items=GROWTH_ITEMS):
+    """縦持ちの財務諸表から成長率を一括計算
+
+    Args:
+        statements_df (pd.DataFrame): 縦持ち財務諸表（銘柄コード, 決算期, 項目, 値）
+        items (list): 成長率を計算する項目名（デフォルト: 売上高、営業利益、当期純利益）
+
+    Returns:
+        pd.DataFrame: 銘柄コード（文字列）をインデックスとする成長率テーブル
+            - {項目}成長率(前年比): 最新期 / 前期 - 1
+            - {項目}CAGR(3年): (最新期 / 3期前) ^ (1 / 年数) - 1
+
+    Note:
+        - 銘柄ごとに決算期の新しい順で並べ、最新期から4期分を横持ちに展開して列単位で計算
+        - 基準期の値が0以下の場合は成長率を定義できないためNaN
+        - 決算期の間隔が前年比で約1年、CAGRで約3年でない場合（決算期変更・欠損期）はNaN
+    """
+    columns = [f"{item}成長率(前年比)" for item in items] + [f"{item}CAGR(3年)" for item in items]
+
+    wide = _latest_periods_wide(statements_df, "annual", items, periods=4)
+    if wide is None:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="銘柄コード"), dtype="float64")
+
+    growth = pd.DataFrame(index=wide.index)
+    for item in items:
+        latest, previous, base = (_wide_column(wide, "値", item, lag) for lag in (0, 1, 3))
+        latest_date, previous_date, base_date = (_wide_column(wide, "決算期", item, lag) for lag in (0, 1, 3))
+
+        yoy_gap = _period_gap_years(latest_date, previous_date)
+        yoy_valid = (previous > 0) & yoy_gap.between(0.75, 1.25)
+        growth[f"{item}成長率(前年比)"] = (latest / previous - 1).where(yoy_valid)
+
+        cagr_years = _period_gap_years(latest_date, base_date)
+        cagr_valid = (latest > 0) & (base > 0) & cagr_years.between(2.5, 3.5)
+        growth[f"{item}CAGR(3年)"] = ((latest / base) ** (1 / cagr_years) - 1).where(cagr_valid)
+
+    return growth.reindex(columns=columns).astype("float64")
+
+
+def compute_ttm_metrics(statements_df, flow_items=TTM_ITEMS, stock_items=LATEST_QUARTER_ITEMS):
+    """四半期財務諸表からTTMと直近四半期末の値を一括計算（四半期が無い・古い銘柄は直近の年次決算の値）
+
+    Args:
+        statements_df (pd.DataFrame): 縦持ち財務諸表（銘柄コード, 頻度, 決算期, 項目, 値）
+        flow_items (list): TTM（直近4四半期合計）を計算するフロー項目
+        stock_items (list): 直近四半期末の値を取得するストック項目
+
+    Returns:
+        pd.DataFrame: 銘柄コード（文字列）をインデックスとするテーブル（schema.QUARTERLY_COLUMNS）
+            - 直近四半期: 最新の四半期末日（"YYYY-MM-DD"、年次で補った銘柄は年次の決算期）
+            - {項目}(TTM): 直近4四半期の合計
+            - {項目}(直近四半期): 直近四半期末の値
+
+    Note:
+        - 4四半期が揃わない、または連続していない（最新期と4期前の間隔が約9ヶ月でない）場合はNaN
+        - 四半期のレコードが無い銘柄（年次決算が新しく四半期の取得を省略した場合など）と、
+          最新の四半期末が最新の年次決算期より古い銘柄は、年次決算の値（通期 = 直近12ヶ月）を使用
+    """
+    quarterly = _quarterly_ttm(statements_df, flow_items, stock_items)
+    annual = _annual_ttm(statements_df, flow_items, stock_items)
+    if quarterly is None and annual is None:
+        return pd.DataFrame(columns=QUARTERLY_COLUMNS, index=pd.Index([], name="銘柄コード"))
+    if annual is None:
+        return quarterly.reindex(columns=QUARTERLY_COLUMNS)
+    if quarterly is None:
+        return annual.reindex(columns=QUARTERLY_COLUMNS)
+
+    codes = quarterly.index.union(annual.index)
+    result = quarterly.reindex(index=codes, columns=QUARTERLY_COLUMNS)
+    annual = annual.reindex(index=codes, columns=QUARTERLY_COLUMNS)
+    quarter_end = pd.to_datetime(result["直近四半期"], errors="coerce")
+    annual_end = pd.to_datetime(annual["直近四半期"], errors="coerce")
+    stale = annual_end.notna() & (quarter_end.isna() | (quarter_end < annual_end))
+    result.loc[stale] = annual.loc[stale]
+    return result
+
+
+def _quarterly_ttm(statements_df, flow_items, stock_items):
+    """四半期のレコードからTTM・直近四半期のテーブルを作成（対象データが無い場合None）"""
+    items = list(flow_items) + list(stock_items)
+    wide = _latest_periods_wide(statements_df, "quarterly", items, periods=4)
+    if wide is None:
+        return None
+
+    result = pd.DataFrame(index=wide.index)
+    latest_dates = pd.concat([_wide_column(wide, "決算期", item, 0) for item in items], axis=1)
+    result["直近四半期"] = latest_dates.max(axis=1).dt.strftime("%Y-%m-%d")
+
+    for item in flow_items:
+        quarters = pd.concat([_wide_column(wide, "値", item, lag) for lag in range(4)], axis=1)
+        span_days = (_wide_column(wide, "決算期", item, 0) - _wide_column(wide, "決算期", item, 3)).dt.days
+        valid = quarters.notna().all(axis=1) & span_days.between(250, 300)
+        result[f"{item}(TTM)"] = quarters.sum(axis=1).where(valid)
+
+    for item in stock_items:
+        result[f"{item}(直近四半期)"] = _wide_column(wide, "値", item, 0)
+    return result
+
+
+def _annual_ttm(statements_df, flow_items, stock_items):
+    """最新の年次決算の値から同じ形のテーブルを作成（対象データが無い場合None）"""
+    items = list(flow_items) + list(stock_items)
+    wide = _latest_periods_wide(statements_df, "annual", items, periods=1)
+    if wide is None:
+        return None
+
+    result = pd.DataFrame(index=wide.index)
+    latest_dates = pd.concat([_wide_column(wide, "決算期", item, 0) for item in items], axis=1)
+    result["直近四半期"] = latest_dates.max(axis=1).dt.strftime("%Y-%m-%d")
+    for item in flow_items:
+        result[f"{item}(TTM)"] = _wide_column(wide, "値", item, 0)
+    for item in stock_items:
+        result[f"{item}(直近四半期)"] = _wide_column(wide, "値", item, 0)
+    return result
+
+
+def attach_by_code(df, table):
+    """銘柄コードをインデックスとするテーブルを銘柄コードで結合
+
+    Args:
+        df (pd.DataFrame): 銘柄ごとのDataFrame（銘柄コード列を含む）
+        table (pd.DataFrame): compute_growth_metrics / compute_ttm_metrics の戻り値
+
+    Returns:
+        pd.DataFrame: テーブルの列を追加した新しいDataFrame（該当なしの銘柄はNaN）
+    """
+    df = df.copy()
+    codes = df["銘柄コード"].astype(str)
+    for column in table.columns:
+        df[column] = codes.map(table[column])
+    return df
+
+
+def build_output_frame(raw_df, statements_df=None, quarterly=False):
+    """生データと縦持ち財務諸表から出力CSVの形式のDataFrameを生成
+
+    Args:
+        raw_df (pd.DataFrame): 生データ（RAW_COLUMNS の列を持つ）
+        statements_df (pd.DataFrame, optional): 縦持ち財務諸表。指定時は成長率を計算
+        quarterly (bool): Trueの場合、TTM・直近四半期の列を計算して追加
+
+    Returns:
+        pd.DataFrame: OUTPUT_COLUMNS（quarterly 時は + QUARTERLY_COLUMNS）の列順のDataFrame
+    """
+    columns = OUTPUT_COLUMNS + (QUARTERLY_COLUMNS if quarterly else [])
+    df = compute_derived_metrics(raw_df)
+    if statements_df is not None:
+        df = attach_by_code(df, compute_growth_metrics(statements_df))
+        if quarterly:
+            df = attach_by_code(df, compute_ttm_metrics(statements_df))
+    return df.reindex(columns=columns)
+
+
+def numeric_metric_columns(df):
+    """集計・順位付けの対象となる数値列（銘柄コードなどの識別子を除く）"""
+    excluded = set(STRING_COLUMNS + CATEGORICAL_COLUMNS)
+    return [
+        c
+        for c in df.columns
+        if c not in excluded
+        and not c.endswith((RANK_SUFFIX, GROUP_RANK_SUFFIX))
+        and pd.api.types.is_numeric_dtype(df[c])
+    ]
+
+
+def compute_percentile_ranks(df, columns=RANK_COLUMNS, group_column=RANK_GROUP):
+    """主要指標の全銘柄内・業種内パーセンタイル順位を一括計算
+
+    Args:
+        df (pd.DataFrame): 結合済みの出力データ
+        columns (list): 順位を付ける列（デフォルト: RANK_COLUMNS。存在しない列は無視）
+        group_column (str): グループ内順位の基準列（デフォルト: 業種）
+
+    Returns:
+        pd.DataFrame: df と同じインデックスの順位列
+            - "{列名}_全体順位": 全銘柄内のパーセンタイル（0〜100、値が大きいほど高い）
+            - "{列名}_業種内順位": 同じ業種内のパーセンタイル（業種が欠損の銘柄はNaN）
+
+    Note:
+        - 全列をまとめた float64 ブロックに対し、全体で1回・業種ごとに1回の rank を実行
+        - 同値は平均順位、欠損値は順位なし（NaN）
+        - 順位は値の昇順。PBR・PER のように低いほど割安な指標は「100 - 順位」で読み替える
+          （例: PBR_全体順位 <= 10 が PBR の低い方から1割）
+    """
+    columns = [c for c in columns if c in df.columns]
+    values = pd.DataFrame(df[columns].to_numpy(dtype="float64"), index=df.index, columns=columns)
+
+    overall = values.rank(pct=True) * 100
+    overall.columns = [f"{c}{RANK_SUFFIX}" for c in columns]
+    ranks = [overall]
+
+    if group_column in df.columns:
+        keys = df[group_column]
+        within = values.groupby(keys.astype(str).where(keys.notna()), observed=True).rank(pct=True) * 100
+        within = within.reindex(df.index)
+        within.columns = [f"{c}{GROUP_RANK_SUFFIX}" for c in columns]
+        ranks.append(within)
+
+    return pd.concat(ranks, axis=1)
+
+
+def add_percentile_ranks(df, columns=RANK_COLUMNS, group_column=RANK_GROUP):
+    """compute_percentile_ranks の順位列を df の末尾に追加（既存の順位列は置き換え）
+
+    Returns:
+        pd.DataFrame: 順位列を追加したデータ
+    """
+    ranks = compute_percentile_ranks(df, columns, group_column)
+    return pd.concat([df.drop(columns=ranks.columns, errors="ignore"), ranks], axis=1)
+
+
+def compute_group_aggregates(df, group_columns=AGGREGATE_GROUPS, columns=None):
+    """業種・市場などのグループごとに、全数値列の件数・平均・四分位・中央値を一括計算
+
+    Args:
+        df (pd.DataFrame): 結合済みの出力データ
+        group_columns (list): グループ化する列（デフォルト: 業種, 優先市場）
+        columns (list, optional): 集計する数値列（未指定時は numeric_metric_columns）
+
+    Returns:
+        pd.DataFrame: 縦持ちの集計値（AGGREGATE_COLUMNS）
+            - 集計単位: グループ化した列名（全銘柄の集計は "全体"）
+            - グループ: グループの値（例: "電気機器"）
+            - 項目: 集計した列名（例: "PBR"）
+            - 件数: 欠損でない値の数
+
+    Note:
+        - グループ化1回につき count / mean / quantile をそれぞれ全列まとめて計算（銘柄ごとのループなし）
+        - 個社との比較は (集計単位, グループ, 項目) で結合するだけで行える
+    """
+    columns = columns or numeric_metric_columns(df)
+    # 1つの2次元float64ブロックにまとめ、グループ集計を列ごとではなくブロック単位で実行させる
+    values = pd.DataFrame(df[columns].to_numpy(dtype="float64"), index=df.index, columns=columns)
+
+    tables = []
+    groupings = [("全体", pd.Series("全体", index=df.index))]
+    groupings += [(name, df[name]) for name in group_columns if name in df.columns]
+
+    for name, keys in groupings:
+        grouped = values.groupby(keys.astype(str).where(keys.notna()), observed=True, sort=True)
+        stats = {
+            "件数": grouped.count(),
+            "平均": grouped.mean(),
+            "第1四分位": grouped.quantile(0.25),
+            "中央値": grouped.median(),
+            "第3四分位": grouped.quantile(0.75),
+        }
+        # (グループ, 項目) を行とする縦持ちに変換（欠損の統計量も行として残す）
+        groups = stats["件数"].index
+        table = pd.DataFrame(
+            {
+                "集計単位": name,
+                "グループ": np.repeat(groups.to_numpy(), len(columns)),
+                "項目": np.tile(columns, len(groups)),
+            }
+        )
+        for stat, frame in stats.items():
+            table[stat] = frame.reindex(index=groups, columns=columns).to_numpy().ravel()
+        tables.append(table)
+
+    result = pd.concat(tables, ignore_index=True)
+    result["件数"] = result["件数"].astype("int64")
+    return result[AGGREGATE_COLUMNS]
+
+
+def load_raw_snapshot(path):
+    """生データスナップショットCSVを読み込み
+
+    Args:
+        path (str): *_stocks_raw_*.csv のパス
+
+    Returns:
+        pd.DataFrame: 生データ（銘柄コードは文字列として読み込む）
+    """
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype={"銘柄コード": str})
+    logger.info(f"生データを読み込みました: {path} ({len(df)}行)")
+    return df
+
+
+def recompute_snapshot(raw_path, output_path=None, statements_path=None):
+    """生データスナップショットから出力CSVを再生成（ネットワーク不要）
+
+    Args:
+        raw_path (str): *_stocks_raw_*.csv のパス
+        output_path (str, optional): 出力先。未指定時はファイル名の "_raw_" を "_data_" に置換
+        statements_path (str, optional): *_stocks_statements_*.csv のパス。指定時は成長率
+            （四半期データを含む場合はTTMも）を再計算
+
+    Returns:
+        str: 出力したCSVファイルのパス
+    """
+    if output_path is None:
+        directory, name = os.path.split(raw_path)
+        output_path = os.path.join(directory, name.replace("_raw_", "_data_"))
+
+    statements_df = load_statements(statements_path) if statements_path else None
+    quarterly = statements_df is not None and (statements_df["頻度"] == "quarterly").any()
+    df = build_output_frame(load_raw_snapshot(raw_path), statements_df, quarterly=quarterly)
+    df.to_csv(output_path, index=False, encoding="utf-8-sig")
+
+    logger.info(f"派生指標を再計算して保存しました: {output_path} ({len(df)}行)")
+    return output_path
+
+
+def main(argv=None):
+    """メイン実行関数
+
+    生データスナップショットから派生指標を再計算して出力CSVを生成します。
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+    """
+    parser = argparse.ArgumentParser(description="生データスナップショットから派生指標を再計算します（ネットワーク不要）")
+    parser.add_argument("raw_file", help="生データスナップショット（*_stocks_raw_*.csv）")
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=None,
+        help="出力CSVファイル (デフォルト: 入力ファイル名の _raw_ を _data_ に置換)",
+    )
+    parser.add_argument(
+        "--statements",
+        "-s",
+        default=None,
+        help="縦持ち財務諸表（*_stocks_statements_*.csv）。指定時は成長率も再計算",
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    recompute_snapshot(args.raw_file, args.output, args.statements)
+
+
+if __name__ == "__main__":
+    main()
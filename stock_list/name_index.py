@@ -0,0 +1,349 @@
+"""
+会社名・銘柄コードのあいまい検索インデックス
+
+結合済みCSVの会社名を正規化（全角/半角・カタカナ/ひらがな・大文字/小文字・法人格の表記）し、
+2文字単位（bigram）の転置インデックスを作成します。入力途中の検索語（type-ahead）に対して、
+全行の部分一致スキャンではなく転置リストの集計（np.bincount）で候補を絞り込むため、
+日米約15,000社でも1回の検索が1ミリ秒未満で終わり、表記ゆれ・多少の入力ミスも許容します。
+
+主な機能:
+- normalize_name: 検索用の正規化（NFKC・ひらがな化・法人格と記号の除去）
+- NameIndex.search: 銘柄コードの完全一致・前方一致 > 会社名の完全一致・前方一致・部分一致 >
+  bigram の一致率の順で上位N件を返す
+- NameIndex.contains: 正規化した会社名の部分一致（screener.py の会社名フィルター）
+- 結合時に付帯ファイル（*_names.json、転置リストは差分符号化）として保存し、
+  フロントエンドなどは再計算せずに読み込める
+
+使用例:
+    $ python name_index.py Export/20251020_combined.csv "とよた"
+    $ python name_index.py Export/20251020_names.json "ｿﾆｰ" --limit 5
+
+依存関係:
+    - numpy: 転置リストの集計
+    - pandas: 結合済みCSVからの作成時のみ
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# インデックスの形式のバージョン（*_names.json）
+INDEX_VERSION = 1
+
+# n-gram の長さ
+GRAM_SIZE = 2
+
+# 候補とする bigram の一致率の下限（入力ミス1〜2文字を許容）
+MIN_COVERAGE = 0.5
+
+# 一致率で絞り込んだ上位（limit × この倍数）件のみ完全一致・前方一致などで並べ替える
+CANDIDATE_FACTOR = 4
+
+DEFAULT_LIMIT = 10
+
+# カタカナ（ァ〜ヶ）-> ひらがな。ヵ・ヶ は「か」「け」に寄せる（霞ヶ関 / 霞ケ関）
+_KANA_TABLE = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_KANA_TABLE.update({0x30F5: "か", 0x30F6: "け"})
+
+# 検索語・会社名から除く法人格の表記（NFKC で ㈱ は (株) になる）
+_CORPORATE_JP = re.compile(r"株式会社|有限会社|合同会社|\(株\)|\(有\)")
+_CORPORATE_EN = re.compile(r"\b(?:inc|incorporated|corp|corporation|co|ltd|limited|plc|llc)\b\.?")
+_SYMBOLS = re.compile(r"[\W_]+")
+
+
+def normalize_name(text):
+    """
+    検索用に会社名・検索語を正規化
+
+    Args:
+        text (str): 会社名・検索語
+
+    Returns:
+        str: 正規化した文字列（例: "ﾄﾖﾀ自動車株式会社" -> "とよた自動車"）
+
+    Note:
+        - NFKC で全角英数・半角カナを統一し、小文字化・カタカナのひらがな化を行う
+        - 法人格（株式会社・Inc. など）、空白・記号（・ & . など）を除く
+    """
+    text = unicodedata.normalize("NFKC", str(text)).lower().translate(_KANA_TABLE)
+    text = _CORPORATE_EN.sub(" ", _CORPORATE_JP.sub(" ", text))
+    return _SYMBOLS.sub("", text)
+
+
+def name_grams(text):
+    """正規化済みの文字列の n-gram（重複なし、GRAM_SIZE 未満の文字列はそのもの）"""
+    if len(text) < GRAM_SIZE:
+        return {text} if text else set()
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def names_filename(output_file):
+    """
+    結合ファイル名から会社名インデックスの付帯ファイル名を生成
+
+    Args:
+        output_file (str): 結合ファイルのパス（例: "Export/20251020_jp_combined.csv"）
+
+    Returns:
+        str: インデックスのパス（例: "Export/20251020_jp_names.json"）
+    """
+    root, _ = os.path.splitext(output_file)
+    if root.endswith("_combined"):
+        root = root[: -len("_combined")]
+    return f"{root}_names.json"
+
+
+class NameIndex:
+    """会社名の bigram 転置インデックスと銘柄コードのソート済み索引
+
+    Args:
+        names (list): 会社名（行番号順）
+        codes (list): 銘柄コード（names と同じ長さ）
+        markets (list, optional): 市場タイプ（"JP" / "US"）
+        postings (dict, optional): bigram -> 行番号の昇順配列（未指定時は会社名から作成）
+
+    Note:
+        - 行番号は元のDataFrameの行の位置（screener.py のマスクと同じ並び）
+    """
+
+    def __init__(self, names, codes, markets=None, postings=None):
+        self.names = [str(name) for name in names]
+        self.codes = [str(code) for code in codes]
+        self.markets = list(markets) if markets is not None else [None] * len(self.names)
+        self.size = len(self.names)
+        self._normalized = [normalize_name(name) for name in self.names]
+        self._normalized_codes = [normalize_name(code) for code in self.codes]
+
+        grams = [name_grams(name) for name in self._normalized]
+        self._gram_counts = np.fromiter((len(g) for g in grams), dtype=np.int32, count=self.size)
+        if postings is None:
+            lists = {}
+            for i, name_gram in enumerate(grams):
+                for gram in name_gram:
+                    lists.setdefault(gram, []).append(i)
+            postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in lists.items()}
+        self._postings = postings
+
+        # 銘柄コード・正規化した会社名の前方一致用（(値, 行番号) の昇順）
+        self._code_order = sorted((code, i) for i, code in enumerate(self._normalized_codes))
+        self._name_order = sorted((name, i) for i, name in enumerate(self._normalized))
+
+    @classmethod
+    def from_frame(cls, df):
+        """結合済みデータ（会社名・銘柄コード・市場タイプ列）から作成"""
+        names = df["会社名"].fillna("").astype(str).tolist()
+        codes = df["銘柄コード"].fillna("").astype(str).tolist() if "銘柄コード" in df.columns else [""] * len(df)
+        markets = None
+        if "市場タイプ" in df.columns:
+            markets = [market if isinstance(market, str) else None for market in df["市場タイプ"]]
+        return cls(names, codes, markets)
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict の戻り値から復元（転置リストは再計算しない）"""
+        if data.get("version") != INDEX_VERSION or data.get("gramSize") != GRAM_SIZE:
+            raise ValueError(f"未対応のインデックス形式です: version={data.get('version')}")
+        postings = {gram: np.cumsum(deltas, dtype=np.int32) for gram, deltas in data["postings"].items()}
+        return cls(data["names"], data["codes"], data.get("markets"), postings)
+
+    @classmethod
+    def load(cls, path):
+        """付帯ファイル（*_names.json）から読み込み"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        """JSONで保存できる辞書（転置リストは行番号の差分で保持）"""
+        return {
+            "version": INDEX_VERSION,
+            "gramSize": GRAM_SIZE,
+            "names": self.names,
+            "codes": self.codes,
+            "markets": self.markets,
+            "postings": {gram: np.diff(ids, prepend=0).tolist() for gram, ids in sorted(self._postings.items())},
+        }
+
+    def save(self, path):
+        """付帯ファイルとして保存（区切り文字の空白を省いたJSON）"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    def _prefix_matches(self, order, text, limit):
+        """(値, 行番号) の昇順リストから text で始まるものを最大 limit 件"""
+        matches = []
+        for value, i in order[bisect_left(order, (text, -1)) :]:
+            if not value.startswith(text) or len(matches) >= limit:
+                break
+            matches.append(i)
+        return matches
+
+    def _gram_candidates(self, text, limit):
+        """bigram の一致率（と Dice 係数）の上位の行番号と一致率"""
+        grams = name_grams(text)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return {}
+        counts = np.bincount(np.concatenate(lists), minlength=self.size)
+        candidates = np.flatnonzero(counts >= max(1, math.ceil(len(grams) * MIN_COVERAGE)))
+        if len(candidates) == 0:
+            return {}
+
+        matched = counts[candidates]
+        coverage = matched / len(grams)
+        dice = 2 * matched / (len(grams) + self._gram_counts[candidates])
+        score = coverage + 0.5 * dice
+        if len(candidates) > limit:
+            top = np.argpartition(-score, limit - 1)[:limit]
+            candidates, score = candidates[top], score[top]
+        return dict(zip(candidates.tolist(), score.tolist()))
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        検索語に近い銘柄を上位 limit 件返す
+
+        Args:
+            query (str): 検索語（会社名の一部・読み・銘柄コード。表記ゆれ・入力ミスを許容）
+            limit (int): 返す最大件数
+
+        Returns:
+            list: {"row": 行番号, "会社名", "銘柄コード", "市場タイプ", "score"} のリスト（スコアの降順）
+
+        Note:
+            - スコア: 銘柄コードの完全一致(+4)・前方一致(+2.5)、会社名の完全一致(+3)・前方一致(+2)・
+              部分一致(+1) に bigram の一致率（0〜1.5）を加算
+            - 同じスコアでは会社名の短い銘柄を優先
+        """
+        text = normalize_name(query)
+        if not text or limit <= 0:
+            return []
+
+        pool = limit * CANDIDATE_FACTOR
+        scores = self._gram_candidates(text, pool) if len(text) >= GRAM_SIZE else {}
+        for i in self._prefix_matches(self._name_order, text, pool):
+            scores.setdefault(i, 0.0)
+        for i in self._prefix_matches(self._code_order, text, pool):
+            scores.setdefault(i, 0.0)
+
+        ranked = []
+        for i, score in scores.items():
+            name = self._normalized[i]
+            code = self._normalized_codes[i]
+            if code == text:
+                score += 4
+            elif code.startswith(text):
+                score += 2.5
+            if name == text:
+                score += 3
+            elif name.startswith(text):
+                score += 2
+            elif text in name:
+                score += 1
+            ranked.append((-score, len(name), i))
+        ranked.sort()
+
+        return [
+            {
+                "row": i,
+                "会社名": self.names[i],
+                "銘柄コード": self.codes[i],
+                "市場タイプ": self.markets[i],
+                "score": round(-negative, 4),
+            }
+            for negative, _, i in ranked[:limit]
+        ]
+
+    def contains(self, text):
+        """
+        正規化した会社名に正規化した text を含む行のboolマスク
+
+        Args:
+            text (str): 検索語
+
+        Returns:
+            np.ndarray: 行数と同じ長さのboolマスク
+
+        Note:
+            - bigram の転置リストの積集合で候補を絞ってから部分一致を確認する
+              （1文字の検索語は全行を確認）
+        """
+        text = normalize_name(text)
+        mask = np.zeros(self.size, dtype=bool)
+        if not text:
+            mask[:] = True
+            return mask
+        if len(text) < GRAM_SIZE:
+            candidates = range(self.size)
+        else:
+            lists = sorted((self._postings.get(gram, ()) for gram in name_grams(text)), key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if len(candidates) == 0:
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        hits = [i for i in candidates if text in self._normalized[i]]
+        mask[hits] = True
+        return mask
+
+
+def save_name_index(combined_df, output_file):
+    """
+    会社名インデックスを結合ファイルの付帯ファイル（*_names.json）として保存
+
+    Args:
+        combined_df (pd.DataFrame): 結合済みデータ
+        output_file (str): 結合ファイルのパス（インデックスのファイル名の元になる）
+
+    Returns:
+        str: 保存したインデックスのパス
+    """
+    index = NameIndex.from_frame(combined_df)
+    path = names_filename(output_file)
+    index.save(path)
+    logger.info(f"✅ 会社名インデックスを保存: {path} ({index.size}社 / {len(index._postings)} bigram)")
+    return path
+
+
+def main(argv=None):
+    """コマンドラインから検索
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功した場合True
+    """
+    parser = argparse.ArgumentParser(description="会社名・銘柄コードをあいまい検索します")
+    parser.add_argument("source", help="結合済みCSV（*_combined.csv）または会社名インデックス（*_names.json）")
+    parser.add_argument("query", help="検索語（会社名の一部・読み・銘柄コード）")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"表示件数 (デフォルト: {DEFAULT_LIMIT})")
+    args = parser.parse_args(argv)
+
+    if args.source.endswith(".json"):
+        index = NameIndex.load(args.source)
+    else:
+        from screener import load_snapshot
+
+        index = NameIndex.from_frame(load_snapshot(args.source))
+
+    start = time.perf_counter()
+    results = index.search(args.query, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for result in results:
+        print(f"{result['銘柄コード']:>8}  {result['会社名']}  ({result['市場タイプ']}, {result['score']})")
+    print(f"{len(results)}件 / {index.size}社 ({elapsed:.2f}ms)", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,585 @@
+"""
+ストリーミング・パイプライン
+
+株式リスト取得 → 分割 → 財務データ収集 → 派生指標計算 → CSV結合 を1つのプロセス内で実行します。
+run_fetch.sh のように各ステップを別プロセスで起動し、stocks_all.json → stocks_N.json →
+タイムスタンプ付きCSV → 結合CSV とファイル経由で受け渡す代わりに、銘柄レコードを
+ジェネレータと上限付きキューで次のステージへ直接流します。
+
+主な機能:
+- リスト取得ステージ: JPX（日本株）/ SEC + yfinance（米国株）/ 既存JSONから銘柄を順に生成
+- 分割ステージ: split_stocks.py と同じ番号付けで N 番目のチャンクのみを取り出す
+- 収集ステージ: 上限付きキューを介して sumalize.get_stock_data を実行（--workers でスレッド並列化）
+- 実行時間の上限（--deadline）と未処理リスト（Export/remaining_N.json）: sumalize.py と同じ形式で、
+  打ち切った・Yahoo の遮断中に後回しにした銘柄を書き出し、次回の実行で最初に処理する
+- 派生指標・結合ステージ: 取得結果の列バッファから出力データを一括計算し、重複を除去して保存
+  （--merge-existing 指定時のみ当日の他チャンクのCSVとも結合）
+- ファイルの書き出しは指定されたもののみ（--write-list, --write-shards, --save-part）
+
+ステージの重なり:
+- リスト取得（米国株は1銘柄ずつyfinanceで取得）と財務データ収集は別スレッドで並行して進む
+- キューの上限により、下流が詰まると上流は待機する（メモリ使用量はキューサイズで頭打ち）
+
+使用例:
+    $ python pipeline.py --market JP --part 1                 # 日本株チャンク1を収集して結合
+    $ python pipeline.py --market US --part 2 --chunk-size 500
+    $ python pipeline.py --list-file stocks_sample.json       # 既存リストを使用（リスト取得を省略）
+    $ python pipeline.py --market JP --part 1 --write-list --write-shards --save-part --merge-existing  # run_fetch.sh 相当
+
+出力ファイル:
+    - Export/YYYYMMDD_jp_combined.csv / YYYYMMDD_us_combined.csv: 結合済みデータ（--no-combine で省略）
+    - Export/*_stocks_{data,raw,statements}_N_*.csv: チャンクごとの出力（--save-part 指定時のみ）
+    - Export/remaining_N.json: 未処理の銘柄（打ち切り・後回しがあった場合のみ、全件処理すると削除）
+    - stocks_all.json, stocks_N.json（米国株は us_stocks_*）: 株式リスト（--write-list / --write-shards 指定時のみ）
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import warnings
+
+from log_setup import setup_logging
+import timeouts
+
+logger = logging.getLogger(__name__)
+
+# キューの終端を示す番兵
+_DONE = object()
+
+# ステージ間キューの上限（銘柄数）
+DEFAULT_QUEUE_SIZE = 64
+
+# 市場ごとの株式リストファイルの接頭辞（stocks_all.json / stocks_N.json）
+LIST_PREFIXES = {"JP": "stocks", "US": "us_stocks"}
+
+
+def iter_stock_list(market="JP", list_file=None):
+    """リスト取得ステージ: 株式リストの銘柄を1件ずつ生成
+
+    Args:
+        market (str): 市場タイプ（"JP" または "US"）
+        list_file (str, optional): 既存の株式リストJSON。指定時はダウンロードを省略
+
+    Yields:
+        dict: 株式情報（コード、銘柄名、市場・商品区分、33業種区分 など）
+
+    Note:
+        - 米国株は get_us_stocklist.iter_us_stock_list を使用し、取得できた銘柄から順に生成する
+        - 日本株はJPXのExcelを1回ダウンロードして全件を生成する
+    """
+    if list_file:
+        with open(list_file, "r", encoding="utf-8") as f:
+            stock_list = json.load(f)
+        logger.info(f"{list_file}から{len(stock_list)}社の銘柄データを読み込みました")
+        yield from stock_list
+    elif market == "US":
+        from get_us_stocklist import iter_us_stock_list
+
+        yield from iter_us_stock_list()
+    else:
+        from get_jp_stocklist import download_jp_stock_list
+
+        stock_list = download_jp_stock_list()
+        logger.info(f"JPXから{len(stock_list)}社の銘柄データを取得しました")
+        yield from stock_list
+
+
+def record_stock_list(stocks, market="JP", write_list=False, write_shards=False, chunk_size=1000):
+    """リスト取得ステージの出力をそのまま流しつつ、終端で株式リストJSONを書き出す
+
+    Args:
+        stocks (iterable): 株式情報の辞書を生成するイテラブル
+        market (str): 市場タイプ（ファイル名の接頭辞に使用）
+        write_list (bool): Trueの場合 {prefix}_all.json を保存
+        write_shards (bool): Trueの場合 {prefix}_N.json に分割して保存
+        chunk_size (int): 分割サイズ
+
+    Yields:
+        dict: 入力と同じ株式情報
+    """
+    from split_stocks import write_chunks
+
+    collected = []
+    for stock in stocks:
+        collected.append(stock)
+        yield stock
+
+    prefix = LIST_PREFIXES[market]
+    if write_list:
+        list_file = f"{prefix}_all.json"
+        with open(list_file, "w", encoding="utf-8") as f:
+            json.dump(collected, f, ensure_ascii=False, indent=2)
+        logger.info(f"JSONファイルに保存しました: {list_file} ({len(collected)}社)")
+    if write_shards:
+        write_chunks(collected, chunk_size, prefix)
+
+
+def iter_shard(stocks, part, chunk_size=1000, drain=False):
+    """分割ステージ: split_stocks.py の N 番目のチャンクに相当する銘柄のみを生成
+
+    Args:
+        stocks (iterable): 株式情報の辞書を生成するイテラブル
+        part (int): チャンク番号（1始まり、stocks_N.json の N）
+        chunk_size (int): 1チャンクあたりの企業数
+        drain (bool): Trueの場合、チャンクの生成後に残りの銘柄も読み進める
+            （record_stock_list で全件のリストを書き出すときに使用）
+
+    Yields:
+        dict: チャンクに含まれる株式情報
+    """
+    stocks = iter(stocks)
+    start = (part - 1) * chunk_size
+    yield from itertools.islice(stocks, start, start + chunk_size)
+    if drain:
+        collections.deque(stocks, maxlen=0)
+
+
+def iter_prioritized(stocks, carried=()):
+    """前回の未処理分 → 株式リストの順に、銘柄コードの重複を除いて生成（sumalize.prioritize_stocks と同じ順序）
+
+    Args:
+        stocks (iterable): 株式情報の辞書を生成するイテラブル
+        carried (list): 前回打ち切った未処理の銘柄（最初に生成）
+
+    Yields:
+        dict: 株式情報（同じ銘柄コードは最初に現れたもののみ）
+    """
+    seen = set()
+    for stock in itertools.chain(carried, stocks):
+        code = str(stock.get("コード"))
+        if code not in seen:
+            seen.add(code)
+            yield stock
+
+
+def fetch_stage(
+    stocks,
+    workers=1,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    interval=2.0,
+    quarterly=False,
+    endpoints=None,
+    budget=None,
+    remaining=None,
+    drain=False,
+):
+    """収集ステージ: 上限付きキューを介して財務データを取得し、取得順に結果を生成
+
+    Args:
+        stocks (iterable): 株式情報の辞書を生成するイテラブル（別スレッドで読み進める）
+        workers (int): 取得スレッド数（デフォルト: 1、API制限に注意）
+        queue_size (int): 入力・出力キューの上限
+        interval (float): 各スレッドが1銘柄ごとに待機する秒数（API制限回避）
+        quarterly (bool): Trueの場合、四半期財務諸表も取得
+        endpoints (frozenset, optional): 呼び出すエンドポイント（fetch_plan.plan_endpoints、未指定時は全て）
+        budget (sumalize.RunBudget, optional): 実行時間の上限。次の1社が収まらない見込みになったら取得を打ち切る
+        remaining (list, optional): 取得しなかった銘柄（打ち切り後に読み込んだ銘柄・遮断中に後回しにした銘柄）を追記するリスト
+        drain (bool): Trueの場合、打ち切り後も上流を最後まで読み進める
+            （record_stock_list で全件のリスト・分割ファイルを書き出すときに使用）
+
+    Yields:
+        tuple: (get_stock_data の戻り値（失敗時・後回し時None）, 財務諸表レコードのリスト)
+
+    Note:
+        - 上流（リスト取得）・取得スレッド・呼び出し側がそれぞれ並行して進む
+        - 呼び出し側がジェネレータを途中で閉じた場合も、スレッドを停止させてから終了する
+        - 打ち切り後は上流を読み進めない（米国株のリスト取得を続けない）。読み込んでいない銘柄は
+          次回も株式リストの順に処理される。drain=True の場合は読み進めるが、未処理リストには追記しない
+    """
+    from circuit_breaker import CircuitOpenError
+    from sumalize import get_stock_data_or_defer
+
+    tasks = queue.Queue(maxsize=queue_size)
+    results = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def carry(stock):
+        if remaining is not None:
+            with lock:
+                remaining.append(stock)
+
+    def halt(message):
+        # 最初に打ち切ったスレッドのみログを出力
+        with lock:
+            if stop.is_set():
+                return
+            stop.set()
+        logger.error(message)
+
+    def produce():
+        try:
+            upstream = iter(stocks)
+            for stock in upstream:
+                if stop.is_set():
+                    carry(stock)
+                    if drain:
+                        collections.deque(upstream, maxlen=0)
+                    break
+                tasks.put(stock)
+        except Exception as e:
+            logger.error(f"❌ 株式リストの取得中にエラーが発生: {e}")
+        finally:
+            for _ in range(workers):
+                tasks.put(_DONE)
+
+    def work():
+        while True:
+            stock = tasks.get()
+            if stock is _DONE:
+                break
+            if budget is not None and not stop.is_set() and budget.should_stop():
+                halt(
+                    f"⏱️ 実行時間の上限が近いため取得を打ち切ります: 残り{budget.remaining():.0f}秒 / "
+                    f"1社あたり{budget.ewma:.1f}秒"
+                )
+            if stop.is_set():
+                carry(stock)
+                continue
+
+            start = time.time()
+            records = []
+            deferred = False
+            try:
+                result, deferred = get_stock_data_or_defer(stock, records, quarterly, endpoints)
+            except CircuitOpenError as e:
+                # 障害が続いている場合は残りの銘柄を取得せずに終了（取得済みの結果は保存される）
+                halt(f"🔌 Yahoo Finance の障害が続いているため取得を打ち切ります（{e}）")
+                carry(stock)
+                result = None
+            except Exception as e:
+                logger.error(f"❌ {stock.get('コード')}の取得中にエラーが発生: {e}")
+                result = None
+            if deferred:
+                carry(stock)
+            results.put((result, records))
+
+            # API制限回避のため少し待機（停止要求時は即座に抜ける）
+            stop.wait(interval)
+            if budget is not None and not deferred:
+                # 並列取得では各スレッドの1社あたりの時間を記録（次の1社を始めるかの判断に使う）
+                budget.record(time.time() - start)
+        results.put(_DONE)
+
+    threads = [threading.Thread(target=produce, name="pipeline-list", daemon=True)]
+    threads += [threading.Thread(target=work, name=f"pipeline-fetch-{i + 1}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            item = results.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            yield item
+    finally:
+        # 途中終了時: 停止を通知し、取得スレッドが結果キューで詰まらないよう読み捨てる
+        stop.set()
+        while finished < workers:
+            if results.get() is _DONE:
+                finished += 1
+
+
+def run_pipeline(
+    market="JP",
+    part=None,
+    chunk_size=1000,
+    list_file=None,
+    workers=1,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    interval=2.0,
+    quarterly=False,
+    endpoints=None,
+    technicals=False,
+    deadline=None,
+    write_list=False,
+    write_shards=False,
+    save_part=False,
+    combine=True,
+    merge_existing=False,
+    aggregates=True,
+    ranks=False,
+    names=True,
+    export_dir="Export",
+):
+    """リスト取得 → 分割 → 収集 → 派生指標計算 → 結合 を1プロセスで実行
+
+    Args:
+        market (str): 市場タイプ（"JP" または "US"）
+        part (int, optional): 処理するチャンク番号（未指定時は全銘柄）
+        chunk_size (int): 1チャンクあたりの企業数
+        list_file (str, optional): 既存の株式リストJSON（指定時はリスト取得を省略）
+        workers (int): 財務データ取得スレッド数
+        queue_size (int): ステージ間キューの上限
+        interval (float): 1銘柄ごとの待機秒数
+        quarterly (bool): 四半期財務諸表を取得してTTM列を追加
+        endpoints (frozenset, optional): 呼び出すエンドポイント（fetch_plan.plan_endpoints、未指定時は全て）
+        technicals (bool): 日足の一括ダウンロードからテクニカル指標の列を追加（technicals.py）
+        deadline (float, optional): 実行時間の上限（分）。指定時は時間切れ前に取得を打ち切る
+            （打ち切り・後回しにした銘柄は Export/remaining_N.json に書き出し、次回の実行で最初に処理）
+        write_list (bool): {prefix}_all.json を保存
+        write_shards (bool): {prefix}_N.json に分割して保存
+        save_part (bool): チャンクの data/raw/statements CSV を保存（sumalize.py と同じ形式）
+        combine (bool): 結合CSVを保存
+        merge_existing (bool): 当日の他チャンクの data CSV も結合対象に含める
+            （Export/ に残っている同じ日の古い結果も混ざるため、明示的に指定した場合のみ）
+        aggregates (bool): 結合時に業種・市場別の集計ファイル（*_aggregates.csv）を保存
+        ranks (bool): 結合時に主要指標のパーセンタイル順位列を追加
+        names (bool): 結合時に会社名・銘柄コードの検索インデックス（*_names.json）を保存
+        export_dir (str): CSVの保存先ディレクトリ
+
+    Returns:
+        pd.DataFrame: 今回取得した銘柄の出力データ（取得0件の場合None）
+    """
+    from datetime import datetime
+
+    from combine_latest_csv import (
+        combine_frames,
+        combined_filename,
+        get_latest_csv_files,
+        read_export_csv,
+        add_rank_columns,
+        save_aggregates,
+        save_combined,
+    )
+    from metrics import build_output_frame
+    from name_index import save_name_index
+    from circuit_breaker import log_summary as log_breaker_summary
+    from sumalize import (
+        RunBudget,
+        create_result_buffers,
+        format_duration,
+        load_remaining,
+        remaining_filename,
+        save_remaining,
+        save_results,
+    )
+
+    start_time = time.time()
+    logger.info("=" * 80)
+    logger.info(f"パイプライン開始: 市場={market} チャンク={part or '全件'} スレッド数={workers}")
+    logger.info("=" * 80)
+
+    # リスト取得 → 分割（ジェネレータで接続し、ファイルは指定時のみ書き出す）
+    stocks = iter_stock_list(market, list_file)
+    record = write_list or write_shards
+    if record:
+        stocks = record_stock_list(stocks, market, write_list, write_shards, chunk_size)
+    if part:
+        stocks = iter_shard(stocks, part, chunk_size, drain=record)
+
+    # 前回の未処理分を先に処理する（sumalize.py と同じ Export/remaining_N.json）
+    base_name = str(part) if part else os.path.basename(list_file or "all").replace(".json", "")
+    base_name = base_name.replace("us_stocks_", "").replace("stocks_", "")
+    remaining_path = remaining_filename(base_name, export_dir)
+    stocks = iter_prioritized(stocks, load_remaining(remaining_path))
+    budget = RunBudget(deadline * 60, start_time=start_time) if deadline else None
+
+    # 収集 → 列バッファへの書き込み
+    results, statement_records = create_result_buffers(chunk_size)
+    processed = 0
+    remaining = []
+    stage = fetch_stage(stocks, workers, queue_size, interval, quarterly, endpoints, budget, remaining, drain=record)
+    for result, records in stage:
+        processed += 1
+        statement_records.extend(records)
+        if result:
+            results.append(result)
+        del result, records
+        logger.info("[%d] 取得成功: %d社", processed, len(results))
+
+    if remaining:
+        logger.warning(f"未処理: {len(remaining)}社 → {remaining_path}")
+    save_remaining(remaining, remaining_path)
+    log_breaker_summary()
+    timeouts.log_summary()
+    if len(results) == 0:
+        logger.error("❌ データが取得できませんでした")
+        return None
+
+    # 派生指標・成長率をベクトル演算で一括計算
+    raw_df = results.to_frame()
+    statements_df = statement_records.to_frame()
+    del results, statement_records
+    df = build_output_frame(raw_df, statements_df, quarterly=quarterly)
+    if technicals:
+        from technicals import add_technical_columns
+
+        df = add_technical_columns(df)
+
+    part_file = None
+    if save_part:
+        part_file = save_results(df, raw_df, statements_df, base_name, export_dir)
+
+    # 結合: （merge_existing 時は当日の他チャンクのCSV →）今回の結果 の順に並べ、今回の結果を優先して重複除去
+    # （今回保存したCSVは読み直さず、メモリ上の結果をそのまま使う）
+    if combine:
+        target_date = datetime.now().strftime("%Y%m%d")
+        frames = []
+        if merge_existing:
+            existing = get_latest_csv_files(export_dir, target_date, market)
+            frames = [read_export_csv(path) for path in reversed(existing) if path != part_file]
+        frames.append(df)
+        output_path = os.path.join(export_dir, combined_filename(target_date, market))
+        combined_df = combine_frames(frames)
+        if ranks:
+            combined_df = add_rank_columns(combined_df)
+        save_combined(combined_df, output_path)
+        if aggregates:
+            save_aggregates(combined_df, output_path)
+        if names:
+            save_name_index(combined_df, output_path)
+        print(f"OUTPUT_FILE={output_path}")  # GitHub Actions用の出力
+
+    logger.info("=" * 80)
+    logger.info(f"パイプライン完了: 成功 {len(df)}社 / 処理 {processed}社 / 未処理 {len(remaining)}社")
+    logger.info(f"総実行時間: {format_duration(time.time() - start_time)}")
+    logger.info("=" * 80)
+    return df
+
+
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 1社以上のデータを取得できた場合True
+    """
+    parser = argparse.ArgumentParser(
+        description="株式リスト取得→分割→財務データ収集→派生指標計算→結合を1プロセスで実行します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python pipeline.py --market JP --part 1                   # 日本株チャンク1を収集して結合
+  python pipeline.py --market US --part 2 --workers 2       # 米国株チャンク2を2スレッドで収集
+  python pipeline.py --list-file stocks_sample.json         # 既存リストを使用
+  python pipeline.py --part 1 --deadline 105                # 105分で打ち切り、未処理分は次回に持ち越し
+  python pipeline.py --part 1 --write-list --write-shards --save-part --merge-existing  # 従来の run_fetch.sh と同じファイルを出力
+        """,
+    )
+    parser.add_argument("--market", choices=["JP", "US"], default="JP", help="市場タイプ (デフォルト: JP)")
+    parser.add_argument("--part", type=int, default=None, help="処理するチャンク番号（stocks_N.json の N、未指定: 全件）")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="1チャンクあたりの企業数 (デフォルト: 1000)")
+    parser.add_argument("--list-file", default=None, help="既存の株式リストJSON（指定時はリスト取得を省略）")
+    parser.add_argument("--workers", type=int, default=1, help="財務データ取得スレッド数 (デフォルト: 1)")
+    parser.add_argument(
+        "--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help=f"ステージ間キューの上限 (デフォルト: {DEFAULT_QUEUE_SIZE})"
+    )
+    parser.add_argument("--interval", type=float, default=2.0, help="1銘柄ごとの待機秒数 (デフォルト: 2.0)")
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="実行時間の上限（分）。時間切れ前に取得を打ち切り、未処理の銘柄を Export/remaining_N.json に書き出す",
+    )
+    parser.add_argument(
+        "--call-timeout",
+        type=float,
+        default=timeouts.DEFAULT_CALL_TIMEOUT,
+        help=f"yfinance の1回の呼び出しの上限秒数（0 で無効、デフォルト: {timeouts.DEFAULT_CALL_TIMEOUT:.0f}）",
+    )
+    parser.add_argument(
+        "--ticker-timeout",
+        type=float,
+        default=timeouts.DEFAULT_TICKER_TIMEOUT,
+        help=f"1銘柄の取得全体の上限秒数（0 で無効、デフォルト: {timeouts.DEFAULT_TICKER_TIMEOUT:.0f}）",
+    )
+    parser.add_argument("--quarterly", action="store_true", help="四半期財務諸表を取得してTTM列を追加")
+    parser.add_argument(
+        "--technicals",
+        action="store_true",
+        help="日足の一括ダウンロードから52週高値乖離率・移動平均乖離率・騰落率などのテクニカル指標の列を追加",
+    )
+    parser.add_argument(
+        "--profile",
+        default="full",
+        choices=["full", "no-history", "valuation"],
+        help="取得する列のプロファイル（省いたエンドポイントの列は空になる）",
+    )
+    parser.add_argument("--columns", default=None, help="取得する出力列（カンマ区切り、--profile より優先）")
+    parser.add_argument("--write-list", action="store_true", help="株式リスト（stocks_all.json 等）を保存")
+    parser.add_argument("--write-shards", action="store_true", help="分割した株式リスト（stocks_N.json 等）を保存")
+    parser.add_argument("--save-part", action="store_true", help="チャンクの data/raw/statements CSV を保存")
+    parser.add_argument("--no-combine", action="store_true", help="結合CSVを保存しない")
+    parser.add_argument(
+        "--merge-existing",
+        action="store_true",
+        help="Export/ にある当日の他チャンクのCSVも結合に含める（combine_latest_csv.py と同じ結合ファイルを作成）",
+    )
+    parser.add_argument("--no-aggregates", action="store_true", help="業種・市場別の集計ファイルを作成しない")
+    parser.add_argument("--no-name-index", action="store_true", help="会社名の検索インデックスを作成しない")
+    parser.add_argument("--ranks", action="store_true", help="結合時に主要指標のパーセンタイル順位列を追加")
+    parser.add_argument("--export-dir", default="Export", help="CSVの保存先ディレクトリ (デフォルト: Export)")
+    parser.add_argument(
+        "--async-log",
+        action="store_true",
+        help="ログの書き込みをバックグラウンドスレッドで行う（--workers 2 以上では常に有効）",
+    )
+    parser.add_argument("--json-log", default=None, help="銘柄ごとの構造化ログ（JSON Lines）の出力先")
+    parser.add_argument(
+        "--yf-cache-dir", default=None, help="yfinance の Cookie キャッシュの保存先（実行・ジョブ間で再利用）"
+    )
+    args = parser.parse_args(argv)
+
+    from fetch_plan import plan_endpoints, resolve_columns
+
+    try:
+        columns = resolve_columns(args.profile, args.columns.split(",") if args.columns else None)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.chunk_size <= 0 or args.workers <= 0 or args.queue_size <= 0 or (args.part is not None and args.part <= 0):
+        parser.error("--chunk-size, --workers, --queue-size, --part は正の整数である必要があります")
+
+    warnings.filterwarnings("ignore")
+    # 複数スレッドで取得する場合、ログI/Oで取得スレッドが互いに待たないようキュー経由にする
+    setup_logging(
+        os.path.join(args.export_dir, "stock_data_log.txt"),
+        json_file=args.json_log,
+        queued=args.async_log or args.workers > 1,
+    )
+    # 取得スレッド数分の接続をホストごとにプールしておく（スレッド間で接続を奪い合わない）
+    from http_client import POOL_MAXSIZE, configure
+
+    configure(pool_maxsize=max(POOL_MAXSIZE, args.workers), yf_cache_dir=args.yf_cache_dir)
+    # 応答の無い呼び出しで取得スレッドが止まったままにならないよう期限を設定
+    timeouts.configure(call_timeout=args.call_timeout, ticker_timeout=args.ticker_timeout)
+
+    df = run_pipeline(
+        market=args.market,
+        part=args.part,
+        chunk_size=args.chunk_size,
+        list_file=args.list_file,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        interval=args.interval,
+        quarterly=args.quarterly,
+        endpoints=plan_endpoints(columns, quarterly=args.quarterly),
+        technicals=args.technicals,
+        deadline=args.deadline,
+        write_list=args.write_list,
+        write_shards=args.write_shards,
+        save_part=args.save_part,
+        combine=not args.no_combine,
+        merge_existing=args.merge_existing,
+        aggregates=not args.no_aggregates,
+        names=not args.no_name_index,
+        ranks=args.ranks,
+        export_dir=args.export_dir,
+    )
+    return df is not None
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
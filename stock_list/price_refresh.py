@@ -0,0 +1,216 @@
+"""
+株価のみの軽量更新（price-only refresh）
+
+時価総額・PBR・PER・配当利回り・ネットキャッシュ比率は株価とともに毎日変わりますが、
+元になる財務データ（EPS・純資産・負債など）は決算ごとにしか変わりません。
+このスクリプトは全銘柄の株価だけを yfinance の複数銘柄一括ダウンロード（数百銘柄/リクエスト）で
+取得し、前回保存した生データスナップショットの財務データに対して株価依存の列を
+ベクトル演算で再計算します。銘柄ごとに info・財務諸表を取り直す通常の取得
+（sumalize.py）に比べ、日本株約4,000銘柄の指標を数分で更新できます。
+
+主な機能:
+- Export/manifest.json から市場ごとの最新の生データスナップショット（パートごと）を選択
+- 株価の一括取得（yf.download、--batch-size 銘柄ずつ。technicals.download_bars）
+- 株価の比率による時価総額・PBR・PER・配当利回りの更新と、派生指標・成長率の再計算
+- 通常の取得と同じ形式の data / raw / statements CSV（パート名 "prices"）として保存
+  （combine_latest_csv.py でそのまま結合でき、次回の株価更新の基準にもなる）
+
+使用例:
+    # 日本株の株価を更新して当日分として保存し、結合
+    $ python price_refresh.py --market-type JP
+    $ python combine_latest_csv.py --market-type JP
+    # scheduler.py が出力した株価のみ更新の対象に限定
+    $ python price_refresh.py --stock-list stocks_prices.json
+
+依存関係:
+    - yfinance: 株価の一括取得
+    - pandas: データ処理
+"""
+
+import argparse
+import json
+import logging
+import time
+import warnings
+
+import pandas as pd
+
+from export_manifest import find_shards
+from http_client import configure as configure_http
+from log_setup import setup_logging
+from metrics import build_output_frame, load_raw_snapshot, reprice_raw_snapshot
+from statements import STATEMENT_COLUMNS, load_statements
+from technicals import DEFAULT_BATCH_SIZE, download_bars
+from utils import format_ticker_for_market
+
+logger = logging.getLogger(__name__)
+
+# 直近の終値を探す期間（休場日・取引停止を考慮）
+PRICE_PERIOD = "5d"
+
+# 保存するCSVのパート名（例: japanese_stocks_data_prices_20251020_160000.csv）
+PART_NAME = "prices"
+
+
+def latest_snapshots(export_dir="Export", market_type="JP"):
+    """
+    パートごとの最新の生データスナップショットを取得
+
+    Args:
+        export_dir (str): Export ディレクトリ
+        market_type (str): 市場タイプ（"JP" または "US"）
+
+    Returns:
+        list: (生データのパス, 縦持ち財務諸表のパス or None) のリスト（取得日時の新しい順）
+    """
+    statements = {
+        (entry["part"], entry["timestamp"]): path for path, entry in find_shards(export_dir, None, market_type, "statements")
+    }
+    snapshots = []
+    seen_parts = set()
+    for path, entry in find_shards(export_dir, None, market_type, "raw"):
+        if entry["part"] in seen_parts:
+            continue
+        seen_parts.add(entry["part"])
+        snapshots.append((path, statements.get((entry["part"], entry["timestamp"]))))
+    return snapshots
+
+
+def load_base(snapshots, codes=None):
+    """
+    最新の生データ・縦持ち財務諸表を読み込み、銘柄ごとに最も新しいものを残す
+
+    Args:
+        snapshots (list): latest_snapshots の戻り値
+        codes (set, optional): 対象の銘柄コード（未指定時は全銘柄）
+
+    Returns:
+        tuple: (生データ, 縦持ち財務諸表 or None)
+    """
+    raw_frames = []
+    statement_frames = []
+    for source, (raw_path, statements_path) in enumerate(snapshots):
+        raw_df = load_raw_snapshot(raw_path)
+        raw_frames.append(raw_df.assign(_source=source))
+        if statements_path:
+            statement_frames.append(load_statements(statements_path).assign(_source=source))
+
+    # 新しいスナップショットを優先（snapshots は新しい順）
+    raw_df = pd.concat(raw_frames, ignore_index=True).drop_duplicates("銘柄コード", keep="first")
+    if codes is not None:
+        raw_df = raw_df[raw_df["銘柄コード"].isin(codes)]
+    raw_df = raw_df.reset_index(drop=True)
+
+    statements_df = None
+    if statement_frames:
+        statements_df = pd.concat(statement_frames, ignore_index=True)
+        # 生データを採用したスナップショットの財務諸表のみ残す
+        chosen = raw_df[["銘柄コード", "_source"]]
+        statements_df = statements_df.merge(chosen, on=["銘柄コード", "_source"]).drop(columns="_source")
+    return raw_df.drop(columns="_source"), statements_df
+
+
+def fetch_prices(tickers, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    複数銘柄の直近の終値を一括取得
+
+    Args:
+        tickers (list): yfinance のティッカー（例: ["7203.T", "6758.T"]）
+        batch_size (int): 1リクエストで取得する銘柄数
+
+    Returns:
+        pd.Series: ティッカー -> 終値（取得できなかった銘柄は含まない）
+    """
+    closes = download_bars(tickers, batch_size, fields=("Close",), period=PRICE_PERIOD, auto_adjust=False)["Close"]
+    if closes.empty:
+        return pd.Series(dtype="float64")
+    return closes.ffill().iloc[-1].dropna()
+
+
+def refresh_prices(export_dir="Export", market_type="JP", codes=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    最新の生データスナップショットの株価依存の指標を、現在の株価で更新
+
+    Args:
+        export_dir (str): Export ディレクトリ
+        market_type (str): 市場タイプ（"JP" または "US"）
+        codes (set, optional): 対象の銘柄コード（未指定時はスナップショットの全銘柄）
+        batch_size (int): 1リクエストで取得する銘柄数
+
+    Returns:
+        tuple: (出力データ, 生データ, 縦持ち財務諸表) または None（スナップショットが無い場合）
+            - 株価を取得できなかった銘柄は前回の値のまま含める
+    """
+    snapshots = latest_snapshots(export_dir, market_type)
+    if not snapshots:
+        logger.error(f"❌ {market_type} の生データスナップショットがありません（先に sumalize.py で取得してください）")
+        return None
+
+    raw_df, statements_df = load_base(snapshots, codes)
+    logger.info(f"基準データ: {len(snapshots)}ファイル / {len(raw_df)}銘柄")
+
+    tickers = raw_df["銘柄コード"].map(lambda code: format_ticker_for_market(code, market_type))
+    new_prices = tickers.map(fetch_prices(tickers.tolist(), batch_size))
+    repriced = reprice_raw_snapshot(raw_df, new_prices)
+    logger.info(f"株価を取得: {int(new_prices.notna().sum())}/{len(raw_df)}銘柄")
+
+    quarterly = statements_df is not None and (statements_df["頻度"] == "quarterly").any()
+    df = build_output_frame(repriced, statements_df, quarterly=quarterly)
+    return df, repriced, statements_df
+
+
+def main(argv=None):
+    """メイン実行関数
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功した場合True
+    """
+    parser = argparse.ArgumentParser(
+        description="株価のみを一括取得し、前回の財務データに対して株価依存の指標を再計算します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python price_refresh.py --market-type JP                    # 日本株の株価を更新
+  python price_refresh.py --stock-list stocks_prices.json     # scheduler.py の株価のみ更新の対象に限定
+        """,
+    )
+    parser.add_argument("--market-type", choices=["JP", "US"], default="JP", help="市場タイプ (デフォルト: JP)")
+    parser.add_argument("--export-dir", default="Export", help="Export ディレクトリ (デフォルト: Export)")
+    parser.add_argument("--stock-list", default=None, help="対象を株式リストJSONの銘柄に限定（例: stocks_prices.json）")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"1リクエストで取得する銘柄数 (デフォルト: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument("--yf-cache-dir", default=None, help="yfinance の Cookie キャッシュの保存先")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    setup_logging()
+    configure_http(yf_cache_dir=args.yf_cache_dir)
+
+    from sumalize import save_results
+
+    codes = None
+    if args.stock_list:
+        with open(args.stock_list, "r", encoding="utf-8") as f:
+            codes = {str(stock["コード"]) for stock in json.load(f)}
+
+    start_time = time.time()
+    result = refresh_prices(args.export_dir, args.market_type, codes, args.batch_size)
+    if result is None:
+        return False
+    df, raw_df, statements_df = result
+    if statements_df is None:
+        statements_df = pd.DataFrame(columns=STATEMENT_COLUMNS)
+    save_results(df, raw_df, statements_df, PART_NAME, args.export_dir)
+    logger.info(f"株価更新完了: {len(df)}銘柄 ({time.time() - start_time:.1f}秒)")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #!/bin/sh
 # Docker用: 市場（JP/US）に応じてリスト取得・分割・データ収集・CSV結合を実行
-# 環境変数: MARKET (JP|US), STOCK_FILE, CHUNK_SIZE, SEC_USER_AGENT_CONTACT (US時推奨)
+# 環境変数: MARKET (JP|US), STOCK_FILE, CHUNK_SIZE, DEADLINE (分、任意), SEC_USER_AGENT_CONTACT (US時推奨)
 
 set -e
 set -o pipefail
@@ -22,18 +22,25 @@ echo "=============================================="
 echo "MARKET=$MARKET  STOCK_FILE=$STOCK_FILE  CHUNK_SIZE=$CHUNK_SIZE"
 echo "=============================================="
 
+# リスト取得→分割→データ収集→結合を1プロセスで実行（pipeline.py）
+# STOCK_FILE が stocks_N.json / us_stocks_N.json の場合はリストを取得して N 番目のチャンクを処理し、
+# 従来どおり株式リスト・チャンクごとのCSVも保存する。それ以外（stocks_sample.json など）は既存リストを使用
+# 結合は従来の combine_latest_csv.py と同じく当日の全チャンクのCSVを対象にする（--merge-existing）
+# DEADLINE 指定時は時間切れ前に打ち切り、未処理の銘柄を Export/remaining_N.json に持ち越す（sumalize.py --deadline と同じ）
+PART=$(echo "$STOCK_FILE" | sed -n 's/^\(us_\)\{0,1\}stocks_\([0-9][0-9]*\)\.json$/\2/p')
+
 if [ "$MARKET" = "US" ]; then
   echo "🇺🇸 US stock list and data fetch..."
-  python get_us_stocklist.py
-  python split_stocks.py --input us_stocks_all.json --size "$CHUNK_SIZE"
-  python sumalize.py "$STOCK_FILE"
-  python combine_latest_csv.py --market-type US
 else
   echo "🇯🇵 JP stock list and data fetch..."
-  python get_jp_stocklist.py
-  python split_stocks.py --input stocks_all.json --size "$CHUNK_SIZE"
-  python sumalize.py "$STOCK_FILE"
-  python combine_latest_csv.py --market-type JP
+fi
+
+if [ -n "$PART" ]; then
+  python pipeline.py --market "$MARKET" --part "$PART" --chunk-size "$CHUNK_SIZE" \
+    --write-list --write-shards --save-part --merge-existing ${DEADLINE:+--deadline "$DEADLINE"}
+else
+  python pipeline.py --market "$MARKET" --list-file "$STOCK_FILE" --save-part --merge-existing \
+    ${DEADLINE:+--deadline "$DEADLINE"}
 fi
 
 echo "=============================================="
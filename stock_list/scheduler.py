@@ -0,0 +1,322 @@
+"""
+決算カレンダーに基づく財務データ更新スケジューラー
+
+各銘柄の決算月（最新決算期末）と前回の取得成功日時から、当日に財務諸表を
+取り直すべき銘柄を選び、sumalize.py / pipeline.py がそのまま処理できる
+株式リストJSON（取得計画）を出力します。
+
+年次決算期末から決算短信・有価証券報告書が出るまでの期間（決算発表シーズン）は
+頻繁に、四半期決算の発表期間はそれより短い期間を低い頻度で、それ以外の期間は
+まれにしか財務諸表を取り直しません。四半期決算は米国株のみ既定で対象とし、
+日本株は年次決算のみで判定します（--quarterly で日本株も対象）。株価は毎日
+変わるため、財務諸表の取得対象外の銘柄は株価のみの更新対象として別ファイルに出力します。
+
+主な機能:
+- 取得状態ファイル（Export/fetch_state.json）の記録: 銘柄コードごとの最終取得日時・決算月
+- 年次決算期末・四半期末からの経過日数に応じた更新間隔の決定（ベクトル演算で一括計算）
+- 優先度（前回取得からの経過日数 / 更新間隔）順の取得計画の出力（--max で件数上限）
+
+使用例:
+    # 取得済みの data CSV から取得状態を記録
+    $ python scheduler.py --record Export/japanese_stocks_data_1_20251020_123456.csv
+    # 当日の取得計画を作成し、sumalize.py で処理
+    $ python scheduler.py stocks_all.json -o stocks_due.json --prices-output stocks_prices.json
+    $ python sumalize.py stocks_due.json
+
+依存関係:
+    - pandas: 日付計算・優先度の一括計算
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = os.path.join("Export", "fetch_state.json")
+
+# 年次決算期末から決算短信・有価証券報告書の反映までの期間（日数）。この期間は頻繁に取り直す
+FILING_WINDOW_DAYS = (20, 100)
+# 四半期末（年次決算期末以外）から四半期決算の反映までの期間（日数）。
+# 四半期の間隔（約91日）より十分短くし、通年で決算発表シーズン扱いになるのを防ぐ
+QUARTERLY_WINDOW_DAYS = (30, 60)
+
+# 更新間隔（日数）
+FILING_SEASON_INTERVAL_DAYS = 2  # 決算発表シーズン中
+QUARTERLY_SEASON_INTERVAL_DAYS = 5  # 四半期決算の発表期間中
+OFF_SEASON_INTERVAL_DAYS = 30  # 決算発表シーズン外
+STALE_INTERVAL_DAYS = 7  # 次の決算期のデータが出ているはずなのに未反映の銘柄
+UNKNOWN_INTERVAL_DAYS = 1  # 決算月が不明な銘柄（取得失敗・新規上場など）
+
+# data CSV のファイル名に含まれる取得日時（例: japanese_stocks_data_1_20251020_123456.csv）
+_TIMESTAMP_PATTERN = re.compile(r"(\d{8}_\d{6})")
+
+
+def load_fetch_state(path=DEFAULT_STATE_FILE):
+    """取得状態ファイルを読み込み
+
+    Args:
+        path (str): 取得状態ファイルのパス
+
+    Returns:
+        dict: 銘柄コード -> {"last_fetch": ISO形式の日時, "決算月": "YYYY-MM-DD"}（ファイルが無い場合は空）
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fetch_state(state, path=DEFAULT_STATE_FILE):
+    """取得状態ファイルを保存（一時ファイルに書き込んでから置き換え）"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fetched_at_from_filename(path):
+    """data CSV のファイル名から取得日時を取得（含まれない場合はファイルの更新日時）"""
+    match = _TIMESTAMP_PATTERN.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def record_fetches(state, df, fetched_at):
+    """取得に成功した銘柄の最終取得日時・決算月を取得状態に記録
+
+    Args:
+        state (dict): load_fetch_state の取得状態（更新される）
+        df (pd.DataFrame): data CSV の内容（銘柄コード, 決算月）
+        fetched_at (datetime): 取得日時
+
+    Returns:
+        int: 記録した銘柄数
+
+    Note:
+        - 既に新しい取得日時が記録されている銘柄は更新しない（古いCSVを後から記録した場合）
+    """
+    timestamp = fetched_at.isoformat(timespec="seconds")
+    periods = df["決算月"] if "決算月" in df.columns else pd.Series(None, index=df.index)
+    recorded = 0
+    for code, period in zip(df["銘柄コード"].astype(str), periods):
+        entry = state.get(code, {})
+        if entry.get("last_fetch", "") > timestamp:
+            continue
+        entry["last_fetch"] = timestamp
+        if isinstance(period, str) and period:
+            entry["決算月"] = period
+        state[code] = entry
+        recorded += 1
+    return recorded
+
+
+def _month_end(month_index):
+    """通算月（year * 12 + month - 1）の配列を月末日の Series に変換"""
+    month_index = np.asarray(month_index, dtype="int64")
+    first = pd.to_datetime({"year": month_index // 12, "month": month_index % 12 + 1, "day": 1})
+    return first + pd.offsets.MonthEnd(0)
+
+
+def refresh_intervals(fiscal_periods, today, quarterly=True):
+    """決算月（最新決算期末）から、当日時点の財務諸表の更新間隔（日数）を一括計算
+
+    Args:
+        fiscal_periods (pd.Series): 最新決算期末（"YYYY-MM-DD"、不明な場合は欠損）
+        today (datetime): 基準日
+        quarterly (bool or array-like): Trueの場合、四半期末も決算期末として扱う（False: 年次決算のみ）。
+            fiscal_periods と同じ長さの真偽値の配列で銘柄ごとに指定することもできる
+
+    Returns:
+        pd.DataFrame: fiscal_periods と同じインデックス
+            - 経過日数: 直近の決算期末（四半期を対象とする銘柄は四半期末）からの経過日数
+            - 更新間隔: 財務諸表を取り直す間隔（日数）
+            - 区分: "決算発表シーズン" / "四半期決算" / "シーズン外" / "未反映" / "不明"
+
+    Note:
+        - 決算発表シーズンは年次決算期末から FILING_WINDOW_DAYS の期間のみ
+        - 四半期末からの QUARTERLY_WINDOW_DAYS の期間は「四半期決算」として、より低い頻度で取り直す
+    """
+    today = pd.Timestamp(today).normalize()
+    periods = pd.to_datetime(fiscal_periods, errors="coerce")
+    known = periods.notna().to_numpy()
+    quarterly = np.broadcast_to(np.asarray(quarterly, dtype=bool), known.shape)
+
+    result = pd.DataFrame(
+        {"経過日数": np.nan, "更新間隔": float(UNKNOWN_INTERVAL_DAYS), "区分": "不明"},
+        index=fiscal_periods.index,
+    )
+    if not known.any():
+        return result
+
+    fye = periods[known]
+    fye_month = (fye.dt.year * 12 + fye.dt.month - 1).to_numpy()
+    today_month = today.year * 12 + today.month - 1
+
+    def days_since(step):
+        # 決算月から数えて step ヶ月ごとの期末のうち、基準日以前で最も新しいもの
+        latest = today_month - (today_month - fye_month) % step
+        future = _month_end(latest).to_numpy() > today.to_datetime64()
+        latest = np.where(future, latest - step, latest)
+        return latest, (today - _month_end(latest)).dt.days.to_numpy()
+
+    annual, annual_days = days_since(12)
+    _, quarter_days = days_since(3)
+
+    # 最新決算期末より後の年次決算期末が発表済みのはずなのに、データが古いままの銘柄
+    stale = (annual > fye_month) & (annual_days > FILING_WINDOW_DAYS[1])
+
+    in_season = (annual_days >= FILING_WINDOW_DAYS[0]) & (annual_days <= FILING_WINDOW_DAYS[1])
+    in_quarter = (
+        quarterly[known]
+        & (quarter_days >= QUARTERLY_WINDOW_DAYS[0])
+        & (quarter_days <= QUARTERLY_WINDOW_DAYS[1])
+    )
+    interval = np.select(
+        [stale, in_season, in_quarter],
+        [STALE_INTERVAL_DAYS, FILING_SEASON_INTERVAL_DAYS, QUARTERLY_SEASON_INTERVAL_DAYS],
+        OFF_SEASON_INTERVAL_DAYS,
+    )
+    label = np.select([stale, in_season, in_quarter], ["未反映", "決算発表シーズン", "四半期決算"], "シーズン外")
+
+    result.loc[known, "経過日数"] = np.where(quarterly[known], quarter_days, annual_days)
+    result.loc[known, "更新間隔"] = interval
+    result.loc[known, "区分"] = label
+    return result
+
+
+def build_fetch_plan(stock_list, state, today=None, quarterly=None, max_stocks=None):
+    """株式リストと取得状態から当日の取得計画を作成
+
+    Args:
+        stock_list (list): 株式情報の辞書のリスト（stocks_all.json など）
+        state (dict): load_fetch_state の取得状態
+        today (datetime, optional): 基準日時（未指定時は現在時刻）
+        quarterly (bool, optional): 四半期末も決算期末として扱う（未指定時は米国株のみ。
+            日本株は四半期決算で財務諸表の大半が変わらないため年次決算のみで判定）
+        max_stocks (int, optional): 財務諸表を取得する銘柄数の上限（優先度の高い順）
+
+    Returns:
+        tuple: (財務諸表を取得する銘柄のリスト, 株価のみ更新する銘柄のリスト, 銘柄ごとの計画 DataFrame)
+            - 財務諸表の取得対象は優先度の高い順
+            - 優先度 = 前回取得からの経過日数 / 更新間隔（1以上で取得対象、未取得の銘柄は最優先）
+    """
+    today = pd.Timestamp(today or datetime.now())
+    codes = pd.Series([str(stock.get("コード")) for stock in stock_list])
+    entries = [state.get(code, {}) for code in codes]
+    last_fetch = pd.to_datetime(pd.Series([e.get("last_fetch") for e in entries]), errors="coerce")
+    fiscal_periods = pd.Series([e.get("決算月") for e in entries], dtype="object")
+    if quarterly is None:
+        quarterly = [(stock.get("市場タイプ") or "JP") == "US" for stock in stock_list]
+
+    plan = refresh_intervals(fiscal_periods, today, quarterly=quarterly)
+    plan.insert(0, "銘柄コード", codes)
+    plan["前回取得からの日数"] = (today - last_fetch).dt.total_seconds() / 86400
+    plan["優先度"] = (plan["前回取得からの日数"] / plan["更新間隔"]).fillna(np.inf)
+
+    order = np.argsort(-plan["優先度"].to_numpy(), kind="stable")
+    due = order[plan["優先度"].to_numpy()[order] >= 1]
+    if max_stocks is not None:
+        due = due[:max_stocks]
+    plan["取得対象"] = False
+    plan.loc[due, "取得対象"] = True
+
+    due_set = set(due.tolist())
+    due_stocks = [stock_list[i] for i in due]
+    price_stocks = [stock for i, stock in enumerate(stock_list) if i not in due_set]
+    return due_stocks, price_stocks, plan
+
+
+def _write_stock_list(stocks, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stocks, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    """メイン実行関数
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功した場合True
+    """
+    parser = argparse.ArgumentParser(
+        description="決算月と前回の取得日時から、当日に財務諸表を取得する銘柄（取得計画）を作成します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python scheduler.py --record Export/japanese_stocks_data_1_20251020_123456.csv  # 取得状態を記録
+  python scheduler.py stocks_all.json -o stocks_due.json                          # 当日の取得計画
+  python scheduler.py stocks_all.json -o stocks_due.json --max 500 --prices-output stocks_prices.json
+        """,
+    )
+    parser.add_argument("stock_list", nargs="?", help="株式リストJSON（例: stocks_all.json）")
+    parser.add_argument("--output", "-o", default="stocks_due.json", help="財務諸表を取得する銘柄の出力先")
+    parser.add_argument("--prices-output", default=None, help="株価のみ更新する銘柄の出力先（未指定時は出力しない）")
+    parser.add_argument("--max", type=int, default=None, dest="max_stocks", help="財務諸表を取得する銘柄数の上限")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE, help=f"取得状態ファイル (デフォルト: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--record", nargs="+", default=None, help="取得状態に記録する data CSV（取得成功した銘柄）")
+    period_group = parser.add_mutually_exclusive_group()
+    period_group.add_argument(
+        "--quarterly", action="store_true", help="日本株も四半期末を決算期末として扱う（既定: 米国株のみ）"
+    )
+    period_group.add_argument(
+        "--annual-only", action="store_true", help="米国株も四半期末を決算期末として扱わない（年次決算のみ）"
+    )
+    parser.add_argument("--date", default=None, help="基準日（YYYYMMDD形式、未指定時は現在時刻）")
+    args = parser.parse_args(argv)
+
+    if args.stock_list is None and args.record is None:
+        parser.error("株式リストJSON または --record を指定してください")
+
+    setup_logging()
+
+    state = load_fetch_state(args.state)
+
+    if args.record:
+        for path in args.record:
+            df = pd.read_csv(path, encoding="utf-8-sig", dtype={"銘柄コード": str, "決算月": str})
+            recorded = record_fetches(state, df, fetched_at_from_filename(path))
+            logger.info(f"取得状態を記録: {path} ({recorded}銘柄)")
+        save_fetch_state(state, args.state)
+
+    if args.stock_list is None:
+        return True
+
+    with open(args.stock_list, "r", encoding="utf-8") as f:
+        stock_list = json.load(f)
+
+    today = datetime.strptime(args.date, "%Y%m%d") if args.date else None
+    quarterly = True if args.quarterly else False if args.annual_only else None
+    due, prices, plan = build_fetch_plan(
+        stock_list, state, today=today, quarterly=quarterly, max_stocks=args.max_stocks
+    )
+
+    _write_stock_list(due, args.output)
+    if args.prices_output:
+        _write_stock_list(prices, args.prices_output)
+
+    summary = plan.groupby("区分")["取得対象"].agg(["size", "sum"])
+    for label, row in summary.iterrows():
+        logger.info(f"  {label}: {int(row['sum'])}/{int(row['size'])}銘柄")
+    logger.info(f"財務諸表の取得対象: {len(due)}/{len(stock_list)}銘柄 → {args.output}")
+    if args.prices_output:
+        logger.info(f"株価のみ更新: {len(prices)}銘柄 → {args.prices_output}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
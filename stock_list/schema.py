@@ -0,0 +1,112 @@
+"""
+出力スキーマ定義
+
+sumalize.py が出力するCSVの列構成と、派生指標の計算に必要な生データ列を定義します。
+
+主な定義:
+- OUTPUT_COLUMNS: 銘柄ごとの出力CSV（japanese_stocks_data_* / us_stocks_data_*）の列順
+- RAW_ONLY_COLUMNS: 派生指標の再計算にのみ使用する生データ列（出力CSVには含まれない）
+- RAW_COLUMNS: 生データスナップショット（*_stocks_raw_*）の列順
+- GROWTH_COLUMNS: 複数期間の財務諸表から計算する成長率の列
+- QUARTERLY_COLUMNS: 四半期財務諸表から計算するTTM・直近四半期の列（任意）
+- TECHNICAL_COLUMNS: 日次株価の一括ダウンロードから計算するテクニカル指標の列（任意）
+- STRING_COLUMNS / CATEGORICAL_COLUMNS: 数値以外の列（結果バッファでの保持形式）
+"""
+
+# 出力CSVの列順（フロントエンドの読み込み順と一致させる）
+OUTPUT_COLUMNS = [
+    "会社名",
+    "銘柄コード",
+    "業種",
+    "優先市場",
+    "市場タイプ",
+    "決算月",
+    # "会計基準",  # コメントアウト
+    "都道府県",
+    "時価総額",
+    "PBR",
+    "PER(会予)",
+    "PER(過去12ヶ月)",
+    "PER(前年度)",
+    "配当方向性",
+    "配当利回り",
+    "EPS(過去12ヶ月)",
+    "EPS(予想)",
+    "EPS(前年度)",
+    "売上高",
+    "営業利益",
+    "営業利益率",
+    "当期純利益",
+    "純利益率",
+    "ROE",
+    "自己資本比率",
+    "負債",
+    "流動負債",
+    "流動資産",
+    "総負債",
+    "現金及び現金同等物",
+    "投資有価証券",
+    "ネットキャッシュ",
+    "ネットキャッシュ比率",
+]
+
+# 成長率を計算する項目（statements.TRACKED_ITEMS の項目名）
+GROWTH_ITEMS = ["売上高", "営業利益", "当期純利益"]
+
+# 成長率の列（metrics.compute_growth_metrics が縦持ち財務諸表から計算する列）
+GROWTH_COLUMNS = [f"{item}成長率(前年比)" for item in GROWTH_ITEMS] + [f"{item}CAGR(3年)" for item in GROWTH_ITEMS]
+
+OUTPUT_COLUMNS += GROWTH_COLUMNS
+
+# TTM（直近4四半期合計）を計算するフロー項目
+TTM_ITEMS = ["売上高", "営業利益", "当期純利益"]
+
+# 直近四半期末の値を出力するストック項目（statements.STOCK_ITEMS と同じ項目名）
+LATEST_QUARTER_ITEMS = ["総資産", "自己資本", "負債", "流動資産", "流動負債", "総負債"]
+
+# 四半期データの列（--quarterly 指定時のみ出力CSVに追加）
+QUARTERLY_COLUMNS = (
+    ["直近四半期"] + [f"{item}(TTM)" for item in TTM_ITEMS] + [f"{item}(直近四半期)" for item in LATEST_QUARTER_ITEMS]
+)
+
+# テクニカル指標の列（--technicals 指定時のみ出力CSVに追加、technicals.compute_technicals が計算）
+# 乖離率・騰落率・ボラティリティは小数（例: 0.05 = 5%）、平均売買代金は現地通貨
+TECHNICAL_COLUMNS = [
+    "52週高値乖離率",
+    "52週安値乖離率",
+    "50日移動平均乖離率",
+    "200日移動平均乖離率",
+    "騰落率(1ヶ月)",
+    "騰落率(3ヶ月)",
+    "騰落率(12ヶ月)",
+    "ボラティリティ(年率)",
+    "平均売買代金(20日)",
+]
+
+# 派生指標（metrics.compute_derived_metrics が生データから計算する列）
+DERIVED_COLUMNS = [
+    "自己資本比率",
+    "ネットキャッシュ",
+    "ネットキャッシュ比率",
+    "EPS(前年度)",
+    "PER(前年度)",
+]
+
+# 派生指標の計算にのみ使用する生データ列
+RAW_ONLY_COLUMNS = [
+    "自己資本",
+    "総資産",
+    "当期純利益(前年度)",
+    "希薄化後平均株式数(前年度)",
+    "株価(前年度末)",
+    "株価",  # 取得時点の株価（price_refresh.py で株価に依存する指標を再計算する基準）
+]
+
+# 文字列として保持する列（銘柄ごとに値が異なる）
+STRING_COLUMNS = ["会社名", "銘柄コード", "決算月"]
+
+# カテゴリ（値の種類が少ない文字列）として保持する列
+CATEGORICAL_COLUMNS = ["業種", "優先市場", "市場タイプ", "都道府県"]
+
+# 生データスナップショットの列順（派生指標を除いた出力列 + 生データ専用列）
+RAW_COLUMNS = [c for c in OUTPUT_COLUMNS if c not in DERIVED_COLUMNS + GROWTH_COLUMNS] + RAW_ONLY_COLUMNS
@@ -0,0 +1,526 @@
+"""
+インメモリ・スクリーニングエンジン
+
+結合済みCSV（*_combined.csv）を型付きの列配列として読み込み、ソート済みインデックスを
+事前に作成して、フロントエンド（stock_search の useFilters.ts）と同じ条件のスクリーニングを
+ブラウザなしで一括評価します。
+
+主な機能:
+- 数値列の範囲条件（PER, PBR, ROE, ネットキャッシュ比率 など）: ソート済みインデックスを二分探索
+- カテゴリ列の集合条件（業種, 優先市場, 都道府県, 市場タイプ）: カテゴリコードの集合判定
+- 上位N件の抽出: argpartition による部分ソート（全件ソートしない）
+- 条件は共有URLと同じクエリ文字列（urlParams.ts のパラメータ名・単位）で指定可能
+- 複数スクリーニングの一括実行（cron などからの定期実行向け）
+
+フィルターの意味（useFilters.ts と同じ）:
+- 値が欠損の銘柄は数値条件で除外しない
+- 金額の条件は百万単位、％の条件（ROE, 営業利益率 など）は100で割って比較
+- 都道府県の条件は日本株にのみ適用
+- 会社名は部分一致。全角/半角・カタカナ/ひらがな・大文字/小文字・法人格の表記ゆれは
+  正規化して比較する（name_index.py の bigram インデックスで候補を絞り込む）
+
+使用例:
+    $ python screener.py Export/20251020_jp_combined.csv -q "pbrMax=1&roeMin=8&industries=電気機器"
+    $ python screener.py Export/20251020_jp_combined.csv -q "ncrMin=50" --sort ネットキャッシュ比率 --top 20
+    $ python screener.py --market-type JP --batch screens.json --output-dir Export/screens
+
+依存関係:
+    - pandas: CSV読み込み
+    - numpy: 列配列・インデックス
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import time
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+
+from log_setup import setup_logging
+from name_index import NameIndex
+from schema import CATEGORICAL_COLUMNS, STRING_COLUMNS
+from utils import detect_market_type
+
+logger = logging.getLogger(__name__)
+
+MILLION = 1_000_000
+PERCENT = 0.01
+
+# 数値範囲のURLパラメータ（{key}Min / {key}Max）-> (列名, 単位の倍率)
+RANGE_PARAMS = {
+    "mc": ("時価総額", MILLION),
+    "pbr": ("PBR", 1),
+    "roe": ("ROE", PERCENT),
+    "rev": ("売上高", MILLION),
+    "op": ("営業利益", MILLION),
+    "om": ("営業利益率", PERCENT),
+    "np": ("当期純利益", MILLION),
+    "nm": ("純利益率", PERCENT),
+    "eq": ("自己資本比率", PERCENT),
+    "pe": ("PER(会予)", 1),
+    "tpe": ("PER(過去12ヶ月)", 1),
+    "pype": ("PER(前年度)", 1),
+    "dd": ("配当方向性", PERCENT),
+    "dy": ("配当利回り", PERCENT),
+    "teps": ("EPS(過去12ヶ月)", 1),
+    "feps": ("EPS(予想)", 1),
+    "pyeps": ("EPS(前年度)", 1),
+    "tl": ("負債", MILLION),
+    "cl": ("流動負債", MILLION),
+    "ca": ("流動資産", MILLION),
+    "td": ("総負債", MILLION),
+    "cash": ("現金及び現金同等物", MILLION),
+    "inv": ("投資有価証券", MILLION),
+    "nc": ("ネットキャッシュ", MILLION),
+    "ncr": ("ネットキャッシュ比率", PERCENT),
+}
+
+# 複数選択のURLパラメータ（カンマ区切り）-> 列名
+SET_PARAMS = {
+    "industries": "業種",
+    "market": "優先市場",
+    "prefecture": "都道府県",
+    "marketType": "市場タイプ",
+}
+
+# 数値として扱わない列
+TEXT_COLUMNS = STRING_COLUMNS + CATEGORICAL_COLUMNS + ["コード", "会計基準", "直近四半期"]
+
+# JavaScript の parseFloat と同じく、先頭の数値部分のみを読み取る
+_FLOAT_PREFIX = re.compile(r"^\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def parse_float(value):
+    """文字列の先頭の数値部分をfloatに変換（JavaScript の parseFloat 相当）
+
+    Args:
+        value (str): 変換する文字列（例: "1.5", "8%"）
+
+    Returns:
+        float: 変換結果（数値で始まらない場合はNone）
+    """
+    match = _FLOAT_PREFIX.match(value or "")
+    return float(match.group(0)) if match else None
+
+
+def parse_query(params):
+    """URLパラメータをスクリーニング条件に変換（urlParams.ts の urlParamsToFilters と同じ解釈）
+
+    Args:
+        params (dict or str): パラメータ名 -> 値 の辞書、またはクエリ文字列（"pbrMax=1&roeMin=8"）
+            - 辞書の値がリストの場合は先頭の値を使用
+
+    Returns:
+        dict: スクリーニング条件
+            - company (str or None): 会社名の部分一致
+            - sets (dict): 列名 -> 許可する値のリスト
+            - ranges (dict): 列名 -> (下限, 上限)（単位換算済み、未指定はNone）
+
+    Examples:
+        >>> parse_query("pbrMax=1&roeMin=8&industries=電気機器,情報・通信業")["ranges"]
+        {'PBR': (None, 1.0), 'ROE': (0.08, None)}
+    """
+    if isinstance(params, str):
+        params = parse_qs(params.lstrip("?"))
+    params = {key: (value[0] if isinstance(value, (list, tuple)) else value) for key, value in params.items()}
+
+    query = {"company": params.get("company") or None, "sets": {}, "ranges": {}}
+
+    for param, column in SET_PARAMS.items():
+        values = [v for v in (params.get(param) or "").split(",") if v]
+        if values:
+            query["sets"][column] = values
+
+    for key, (column, scale) in RANGE_PARAMS.items():
+        bounds = []
+        for suffix in ("Min", "Max"):
+            number = parse_float(params.get(key + suffix))
+            bounds.append(None if number is None else number * scale)
+        if bounds != [None, None]:
+            query["ranges"][column] = tuple(bounds)
+
+    return query
+
+
+def _clean_numeric(series):
+    """単位表記（カンマ・倍・%・円）を除去して数値に変換（csvParser.ts と同じ処理）"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    cleaned = series.astype(str).str.replace(",", "", regex=False).str.replace(r"(倍|%|円)$", "", regex=True).str.strip()
+    return pd.to_numeric(cleaned, errors="coerce").astype("float64")
+
+
+def load_snapshot(path):
+    """結合済みCSVを読み込み、フロントエンドと同じ形に正規化
+
+    Args:
+        path (str): *_combined.csv などの出力CSVのパス
+
+    Returns:
+        pd.DataFrame: 数値列はfloat64、文字列列は前後の空白を除去（空文字は欠損）
+            - 会社名・銘柄コードが無い行は除外
+            - 市場タイプが無い行は銘柄コードから判定
+    """
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    df.columns = [c.strip() for c in df.columns]
+
+    for column in df.columns:
+        if column in TEXT_COLUMNS:
+            values = df[column].str.strip()
+            df[column] = values.where(values != "")
+        else:
+            df[column] = _clean_numeric(df[column].where(df[column] != ""))
+
+    # ネットキャッシュの旧列名に対応
+    if "ネットキャッシュ" not in df.columns and "ネットキャッシュ（流動資産-負債）" in df.columns:
+        df["ネットキャッシュ"] = df["ネットキャッシュ（流動資産-負債）"]
+
+    df = df[df["会社名"].notna() & df["銘柄コード"].notna()].reset_index(drop=True)
+    if "市場タイプ" in df.columns:
+        missing = df["市場タイプ"].isna()
+        df.loc[missing, "市場タイプ"] = df.loc[missing, "銘柄コード"].map(detect_market_type)
+    else:
+        df["市場タイプ"] = df["銘柄コード"].map(detect_market_type)
+
+    logger.info(f"スナップショットを読み込みました: {path} ({len(df)}社)")
+    return df
+
+
+def find_latest_snapshot(export_dir="Export", market_type=None):
+    """Export ディレクトリから最新の結合済みCSVを取得
+
+    Args:
+        export_dir (str): 検索するディレクトリ
+        market_type (str, optional): "JP" / "US"（未指定時は市場を問わない結合ファイル）
+
+    Returns:
+        str: 最新（ファイル名の日付が最も新しい）の *_combined.csv のパス（無い場合None）
+    """
+    suffix = {"JP": "_jp_combined.csv", "US": "_us_combined.csv"}.get(market_type, "_combined.csv")
+    files = glob.glob(os.path.join(export_dir, f"*{suffix}"))
+    if market_type is None:
+        files = [f for f in files if not f.endswith(("_jp_combined.csv", "_us_combined.csv"))]
+    return max(files, key=os.path.basename) if files else None
+
+
+class ScreeningEngine:
+    """ソート済みインデックスを持つスクリーニングエンジン
+
+    Args:
+        df (pd.DataFrame): load_snapshot の戻り値
+        indexed_columns (iterable, optional): 事前にインデックスを作成する数値列
+            （未指定時は RANGE_PARAMS の列。その他の列は初回使用時に作成）
+
+    Note:
+        - 数値列: float64配列 + 昇順ソート済みの行番号（欠損は末尾）
+        - カテゴリ列: int32のカテゴリコード（欠損は-1）
+        - 条件の評価結果は行数と同じ長さのboolマスク
+    """
+
+    def __init__(self, df, indexed_columns=None):
+        self.df = df
+        self.size = len(df)
+        self._numeric = {}
+        self._categories = {}
+        self._orders = {}
+        self._valid_counts = {}
+
+        for column in df.columns:
+            if column in TEXT_COLUMNS:
+                codes, uniques = pd.factorize(df[column])
+                self._categories[column] = (codes.astype("int32"), {value: i for i, value in enumerate(uniques)})
+            else:
+                self._numeric[column] = df[column].to_numpy(dtype="float64")
+
+        self.names = NameIndex.from_frame(df)
+        self._is_jp = df["市場タイプ"].to_numpy() == "JP"
+
+        if indexed_columns is None:
+            indexed_columns = [column for column, _ in RANGE_PARAMS.values()]
+        for column in indexed_columns:
+            if column in self._numeric:
+                self._order(column)
+
+    @classmethod
+    def from_csv(cls, path):
+        """CSVファイルからエンジンを作成"""
+        return cls(load_snapshot(path))
+
+    def _order(self, column, descending=False):
+        """列の値で並べた行番号（欠損は末尾、同値は元の順序を保持）をキャッシュして返す"""
+        key = (column, descending)
+        order = self._orders.get(key)
+        if order is None:
+            if column in self._numeric:
+                values = self._numeric[column]
+                order = np.argsort(-values if descending else values, kind="stable")
+                self._valid_counts[column] = int(np.count_nonzero(~np.isnan(values)))
+            else:
+                series = self.df[column]
+                ranks = series.rank(method="dense").to_numpy()
+                order = np.argsort(-ranks if descending else ranks, kind="stable")
+            self._orders[key] = order
+        return order
+
+    def range_mask(self, column, low=None, high=None):
+        """数値範囲の条件（low <= 値 <= high、欠損は通過）
+
+        Args:
+            column (str): 数値列名
+            low (float, optional): 下限（単位換算済み）
+            high (float, optional): 上限（単位換算済み）
+
+        Returns:
+            np.ndarray: boolマスク
+        """
+        if column not in self._numeric:
+            return np.ones(self.size, dtype=bool)
+
+        order = self._order(column)
+        valid = self._valid_counts[column]
+        sorted_values = self._numeric[column][order[:valid]]
+
+        start = 0 if low is None else int(np.searchsorted(sorted_values, low, side="left"))
+        stop = valid if high is None else int(np.searchsorted(sorted_values, high, side="right"))
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:stop]] = True
+        mask[order[valid:]] = True  # 欠損値は除外しない
+        return mask
+
+    def set_mask(self, column, values):
+        """集合条件（値が values のいずれかに一致、欠損は除外）
+
+        Args:
+            column (str): カテゴリ列名
+            values (iterable): 許可する値
+
+        Returns:
+            np.ndarray: boolマスク
+        """
+        if column not in self._categories:
+            return np.zeros(self.size, dtype=bool)
+        codes, lookup = self._categories[column]
+        wanted = [lookup[value] for value in values if value in lookup]
+        return np.isin(codes, wanted)
+
+    def company_mask(self, text):
+        """会社名の部分一致（表記ゆれを正規化して比較）"""
+        return self.names.contains(text)
+
+    def screen(self, query):
+        """スクリーニング条件を評価
+
+        Args:
+            query (dict or str): parse_query の戻り値、またはURLパラメータ（辞書・クエリ文字列）
+
+        Returns:
+            np.ndarray: 条件を満たす行のboolマスク
+        """
+        if not (isinstance(query, dict) and "ranges" in query):
+            query = parse_query(query)
+
+        mask = np.ones(self.size, dtype=bool)
+        if query.get("company"):
+            mask &= self.company_mask(query["company"])
+        for column, values in query["sets"].items():
+            column_mask = self.set_mask(column, values)
+            if column == "都道府県":
+                column_mask |= ~self._is_jp  # 都道府県の条件は日本株のみに適用
+            mask &= column_mask
+        for column, (low, high) in query["ranges"].items():
+            mask &= self.range_mask(column, low, high)
+        return mask
+
+    def sort(self, mask, column, descending=False):
+        """条件を満たす行を列の値で並べた行番号（欠損は末尾）
+
+        Args:
+            mask (np.ndarray): screen の戻り値
+            column (str): 並べ替えの列
+            descending (bool): Trueの場合は降順
+
+        Returns:
+            np.ndarray: 行番号（ソート済みインデックスを絞り込むだけで、再ソートしない）
+        """
+        if column not in self.df.columns:
+            return np.flatnonzero(mask)
+        order = self._order(column, descending)
+        return order[mask[order]]
+
+    def top(self, mask, column, n, descending=True):
+        """条件を満たす行のうち列の値の上位N件の行番号（欠損は末尾）
+
+        Args:
+            mask (np.ndarray): screen の戻り値
+            column (str): 数値列名
+            n (int): 件数
+            descending (bool): Trueの場合は大きい順（デフォルト）
+
+        Returns:
+            np.ndarray: 行番号（最大N件、順位順）
+
+        Note:
+            - インデックス作成済みの列はインデックスを絞り込み、未作成の列は argpartition で
+              上位N件のみを部分ソートする（全件ソートしない）
+        """
+        if n <= 0:
+            return np.empty(0, dtype=np.intp)
+        if (column, descending) in self._orders or column not in self._numeric:
+            return self.sort(mask, column, descending)[:n]
+
+        rows = np.flatnonzero(mask)
+        values = self._numeric[column][rows]
+        valid = ~np.isnan(values)
+        candidates, keys = rows[valid], (-values[valid] if descending else values[valid])
+
+        if len(candidates) > n:
+            part = np.argpartition(keys, n - 1)[:n]
+            candidates, keys = candidates[part], keys[part]
+        ranked = candidates[np.lexsort((candidates, keys))]
+
+        if len(ranked) < n:
+            ranked = np.concatenate([ranked, rows[~valid][: n - len(ranked)]])
+        return ranked
+
+    def rows(self, indices, columns=None):
+        """行番号のデータをDataFrameとして取得"""
+        df = self.df.iloc[indices]
+        if columns:
+            df = df[[c for c in columns if c in df.columns]]
+        return df.reset_index(drop=True)
+
+    def run(self, query, sort=None, descending=True, limit=None):
+        """スクリーニング → 並べ替え（または上位N件）を実行
+
+        Args:
+            query (dict or str): スクリーニング条件
+            sort (str, optional): 並べ替えの列
+            descending (bool): 降順で並べるか
+            limit (int, optional): 最大件数（sort と併用時は部分ソート）
+
+        Returns:
+            np.ndarray: 行番号
+        """
+        mask = self.screen(query)
+        if sort and limit:
+            return self.top(mask, sort, limit, descending)
+        indices = self.sort(mask, sort, descending) if sort else np.flatnonzero(mask)
+        return indices[:limit] if limit else indices
+
+
+def _write_result(df, output, fmt):
+    """スクリーニング結果を出力（ファイル未指定時は標準出力）"""
+    if fmt == "json":
+        text = df.to_json(orient="records", force_ascii=False)
+    elif fmt == "csv" or output:
+        text = df.to_csv(index=False)
+    else:
+        text = df.to_string(index=False)
+
+    if output:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        encoding = "utf-8-sig" if fmt == "csv" or output.endswith(".csv") else "utf-8"
+        with open(output, "w", encoding=encoding) as f:
+            f.write(text)
+        logger.info(f"保存しました: {output} ({len(df)}社)")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+def run_batch(engine, batch_file, output_dir):
+    """複数のスクリーニングを一括実行し、スクリーニングごとにCSVを保存
+
+    Args:
+        engine (ScreeningEngine): スクリーニングエンジン
+        batch_file (str): スクリーニング定義のJSON
+            - {"名前": {"query": "pbrMax=1&roeMin=8", "sort": "ROE", "ascending": false, "top": 50, "columns": [...]}}
+        output_dir (str): 出力先ディレクトリ（{名前}.csv を保存）
+
+    Returns:
+        dict: 名前 -> 該当件数
+    """
+    with open(batch_file, "r", encoding="utf-8") as f:
+        screens = json.load(f)
+
+    counts = {}
+    for name, spec in screens.items():
+        indices = engine.run(
+            spec.get("query", ""),
+            sort=spec.get("sort"),
+            descending=not spec.get("ascending", False),
+            limit=spec.get("top"),
+        )
+        _write_result(engine.rows(indices, spec.get("columns")), os.path.join(output_dir, f"{name}.csv"), "csv")
+        counts[name] = len(indices)
+    return counts
+
+
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功時True
+    """
+    parser = argparse.ArgumentParser(
+        description="結合済みCSVをスクリーニングします（フロントエンドと同じ条件・単位）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python screener.py Export/20251020_jp_combined.csv -q "pbrMax=1&roeMin=8"
+  python screener.py --market-type JP -q "industries=電気機器&ncrMin=50" --sort ネットキャッシュ比率 --top 20
+  python screener.py --market-type JP --batch screens.json --output-dir Export/screens
+
+条件（-q）は共有URLのクエリ文字列と同じ形式です（例: mcMin=1000 は時価総額10億円以上、roeMin=8 はROE 8%以上）。
+        """,
+    )
+    parser.add_argument("csv_file", nargs="?", default=None, help="結合済みCSV（未指定時は Export の最新の結合ファイル）")
+    parser.add_argument("--market-type", choices=["JP", "US"], default=None, help="最新ファイルを探す市場タイプ")
+    parser.add_argument("--export-dir", default="Export", help="最新ファイルを探すディレクトリ (デフォルト: Export)")
+    parser.add_argument("--query", "-q", default="", help="スクリーニング条件（URLのクエリ文字列）")
+    parser.add_argument("--sort", default=None, help="並べ替えの列（例: ROE）")
+    parser.add_argument("--ascending", action="store_true", help="昇順で並べる（デフォルト: 降順）")
+    parser.add_argument("--top", type=int, default=None, help="上位N件のみ出力")
+    parser.add_argument("--columns", default=None, help="出力する列（カンマ区切り）")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table", help="出力形式 (デフォルト: table)")
+    parser.add_argument("--output", "-o", default=None, help="出力ファイル（未指定時は標準出力）")
+    parser.add_argument("--batch", default=None, help="スクリーニング定義のJSON（一括実行）")
+    parser.add_argument("--output-dir", default="Export/screens", help="一括実行の出力先 (デフォルト: Export/screens)")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    csv_file = args.csv_file or find_latest_snapshot(args.export_dir, args.market_type)
+    if not csv_file:
+        logger.error(f"❌ 結合済みCSVが見つかりません: {args.export_dir}")
+        return False
+
+    engine = ScreeningEngine.from_csv(csv_file)
+
+    if args.batch:
+        counts = run_batch(engine, args.batch, args.output_dir)
+        for name, count in counts.items():
+            logger.info(f"  {name}: {count}社")
+        return True
+
+    start = time.perf_counter()
+    indices = engine.run(args.query, sort=args.sort, descending=not args.ascending, limit=args.top)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"スクリーニング: {engine.size}社 → {len(indices)}社 ({elapsed_ms:.3f}ms)")
+
+    columns = args.columns.split(",") if args.columns else None
+    _write_result(engine.rows(indices, columns), args.output, args.format)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
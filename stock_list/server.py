@@ -0,0 +1,436 @@
+"""
+スクリーニング結果を返すローカルHTTP API
+
+最新の結合済みCSVを1回だけ読み込み（screener.ScreeningEngine）、フロントエンドの共有URLと
+同じパラメータ（stock_search/src/utils/urlParams.ts）で絞り込み・並べ替え・ページ分割した
+結果をJSONで返します。クライアントは *_combined.csv 全体ではなく、表示するページのみを受け取ります。
+
+エンドポイント:
+- GET /api/stocks?{urlParamsと同じ条件}&sort=ROE&order=desc&page=1&pageSize=50
+    -> {"total": 該当件数, "page": 1, "pageSize": 50, "columns": [...], "rows": [...]}
+- GET /api/meta
+    -> {"file": 読み込んだCSV, "rows": 行数, "lastModified": 更新日時, "columns": [...]}
+- GET /api/names?q=とよた&limit=10
+    -> {"query": "とよた", "results": [{"row", "会社名", "銘柄コード", "市場タイプ", "score"}, ...]}
+       （会社名・銘柄コードの入力補完。表記ゆれを許容するあいまい検索、name_index.py）
+- GET /api/similar?code=7203&k=10&sameIndustry=1&marketType=US
+    -> {"code": "7203", "columns": [...], "rows": [{"距離", ...}, ...]}
+       （財務指標の近い類似企業、similar.py。銘柄コードが見つからない場合は404）
+
+主な機能:
+- ETag / Last-Modified による条件付きリクエスト（304 Not Modified）
+- gzip 圧縮（Accept-Encoding: gzip のクライアントのみ）
+- 正規化したクエリ（パラメータの順序・表記ゆれ・単位換算後の条件）をキーとするLRUキャッシュ
+- CSVファイルが更新された場合は次のリクエスト時に再読み込みし、キャッシュを破棄
+
+使用例:
+    $ python server.py --market-type JP                 # 最新の Export/*_jp_combined.csv を配信
+    $ python server.py Export/20251020_combined.csv --port 8080
+    $ curl "http://127.0.0.1:8000/api/stocks?pbrMax=1&roeMin=8&sort=ROE&order=desc&page=1"
+
+依存関係:
+    - 標準ライブラリ（http.server）+ screener.py（pandas, numpy）
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from log_setup import setup_logging
+from screener import ScreeningEngine, find_latest_snapshot, parse_query
+from similar import DEFAULT_K, SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_NAME_LIMIT = 10
+MAX_NAME_LIMIT = 100
+MAX_SIMILAR_K = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_CACHE_SIZE = 256
+
+# この長さ未満のレスポンスは圧縮しない
+GZIP_MIN_BYTES = 1024
+
+
+class LRUCache:
+    """スレッドセーフなLRUキャッシュ（上限を超えると最も古く使われたものから破棄）
+
+    Args:
+        max_size (int): 保持する最大件数
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _positive_int(value, default, maximum=None):
+    """正の整数パラメータを解釈（不正な値はデフォルト）"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    if number < 1:
+        return default
+    return min(number, maximum) if maximum else number
+
+
+def normalize_request(params, columns):
+    """リクエストパラメータを正規化（キャッシュキー・ETagの元になる）
+
+    Args:
+        params (dict): パラメータ名 -> 値
+        columns (list): スナップショットの列名（存在しない並べ替え列は無視）
+
+    Returns:
+        dict: {"query": parse_query の戻り値, "sort": 列名 or None, "descending": bool,
+               "page": int, "pageSize": int}
+            - 同じ条件を表す異なるURL（順序違い、"1" と "1.0" など）は同じ値になる
+    """
+    sort = params.get("sort")
+    query = parse_query(params)
+    # 集合条件は順序に意味がないため並べ替えて正規化
+    query["sets"] = {column: sorted(set(values)) for column, values in query["sets"].items()}
+    return {
+        "query": query,
+        "sort": sort if sort in columns else None,
+        "descending": params.get("order", "asc") == "desc",
+        "page": _positive_int(params.get("page"), 1),
+        "pageSize": _positive_int(params.get("pageSize"), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE),
+    }
+
+
+class SnapshotService:
+    """スナップショットの読み込み・再読み込みと、クエリ結果の生成・キャッシュ
+
+    Args:
+        csv_file (str, optional): 配信するCSV（未指定時は export_dir の最新の結合ファイル）
+        export_dir (str): 最新ファイルを探すディレクトリ
+        market_type (str, optional): 最新ファイルを探す市場タイプ（"JP" / "US"）
+        cache_size (int): キャッシュするレスポンス数
+    """
+
+    def __init__(self, csv_file=None, export_dir="Export", market_type=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.csv_file = csv_file
+        self.export_dir = export_dir
+        self.market_type = market_type
+        self.cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self.engine = None
+        self.similarity = None
+        self.path = None
+        self.mtime = None
+        self.version = None
+        self.refresh()
+
+    def refresh(self):
+        """CSVが変更されていれば再読み込み（変更が無ければ stat のみ）"""
+        path = self.csv_file or find_latest_snapshot(self.export_dir, self.market_type)
+        if path is None:
+            raise FileNotFoundError(f"結合済みCSVが見つかりません: {self.export_dir}")
+        mtime = os.path.getmtime(path)
+        if path == self.path and mtime == self.mtime:
+            return
+
+        with self._lock:
+            if path == self.path and mtime == self.mtime:
+                return
+            engine = ScreeningEngine.from_csv(path)
+            self.similarity = SimilarityIndex(engine.df)
+            self.engine, self.path, self.mtime = engine, path, mtime
+            self.version = hashlib.sha1(f"{path}:{mtime}:{engine.size}".encode()).hexdigest()[:12]
+            self.cache.clear()
+            logger.info(f"スナップショットを配信します: {path} ({engine.size}社)")
+
+    @property
+    def last_modified(self):
+        """HTTPの Last-Modified ヘッダー値"""
+        return formatdate(self.mtime, usegmt=True)
+
+    def query(self, params):
+        """条件に一致する1ページ分の結果を生成（キャッシュ済みならそれを返す）
+
+        Args:
+            params (dict): パラメータ名 -> 値
+
+        Returns:
+            tuple: (ETag, JSONのbytes, gzip圧縮したbytes or None)
+        """
+        engine = self.engine
+        request = normalize_request(params, engine.df.columns)
+        key = json.dumps(request, ensure_ascii=False, sort_keys=True)
+        etag = f'"{self.version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+        cached = self.cache.get(etag)
+        if cached is not None:
+            return (etag,) + cached
+
+        mask = engine.screen(request["query"])
+        total = int(mask.sum())
+        start = (request["page"] - 1) * request["pageSize"]
+        stop = start + request["pageSize"]
+
+        # 先頭ページは部分ソート（上位N件）、それ以降はソート済みインデックスを絞り込んで切り出す
+        if request["sort"] and start == 0:
+            indices = engine.top(mask, request["sort"], stop, request["descending"])
+        elif request["sort"]:
+            indices = engine.sort(mask, request["sort"], request["descending"])[start:stop]
+        else:
+            indices = mask.nonzero()[0][start:stop]
+
+        rows = engine.rows(indices)
+        payload = {
+            "total": total,
+            "page": request["page"],
+            "pageSize": request["pageSize"],
+            "columns": list(rows.columns),
+            "rows": json.loads(rows.to_json(orient="records", force_ascii=False)),
+        }
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        compressed = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+
+        self.cache.put(etag, (body, compressed))
+        return etag, body, compressed
+
+    def names(self, params):
+        """会社名・銘柄コードのあいまい検索（入力補完）
+
+        Args:
+            params (dict): パラメータ名 -> 値（q: 検索語, limit: 件数）
+
+        Returns:
+            tuple: (ETag, JSONのbytes, gzip圧縮したbytes or None)
+        """
+        query = params.get("q", "")
+        limit = _positive_int(params.get("limit"), DEFAULT_NAME_LIMIT, MAX_NAME_LIMIT)
+        key = json.dumps([query, limit], ensure_ascii=False)
+        etag = f'"{self.version}-names-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+        cached = self.cache.get(etag)
+        if cached is not None:
+            return (etag,) + cached
+
+        payload = {"query": query, "results": self.engine.names.search(query, limit)}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        compressed = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        self.cache.put(etag, (body, compressed))
+        return etag, body, compressed
+
+    def similar(self, params):
+        """類似企業の検索
+
+        Args:
+            params (dict): パラメータ名 -> 値（code: 銘柄コード, k: 件数, sameIndustry: 1 で同業種のみ,
+                marketType: 類似企業の市場タイプ）
+
+        Returns:
+            tuple: (ETag, JSONのbytes, gzip圧縮したbytes or None)
+
+        Raises:
+            KeyError: 銘柄コードが見つからない
+        """
+        code = params.get("code", "")
+        k = _positive_int(params.get("k"), DEFAULT_K, MAX_SIMILAR_K)
+        same_industry = params.get("sameIndustry") in ("1", "true")
+        market_type = params.get("marketType") if params.get("marketType") in ("JP", "US") else None
+        key = json.dumps([code, k, same_industry, market_type], ensure_ascii=False)
+        etag = f'"{self.version}-similar-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+        cached = self.cache.get(etag)
+        if cached is not None:
+            return (etag,) + cached
+
+        rows = self.similarity.neighbors(code, k, same_industry, market_type)
+        payload = {
+            "code": code,
+            "columns": list(rows.columns),
+            "rows": json.loads(rows.to_json(orient="records", force_ascii=False)),
+        }
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        compressed = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        self.cache.put(etag, (body, compressed))
+        return etag, body, compressed
+
+    def meta(self):
+        """スナップショットの情報"""
+        engine = self.engine
+        payload = {
+            "file": os.path.basename(self.path),
+            "rows": engine.size,
+            "lastModified": self.last_modified,
+            "columns": list(engine.df.columns),
+        }
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return f'"{self.version}-meta"', body, None
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """/api/stocks, /api/names, /api/similar, /api/meta を処理するリクエストハンドラー"""
+
+    service = None
+    server_version = "StockScreener/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        try:
+            self.service.refresh()
+            if url.path == "/api/stocks":
+                etag, body, compressed = self.service.query(params)
+            elif url.path == "/api/names":
+                etag, body, compressed = self.service.names(params)
+            elif url.path == "/api/similar":
+                etag, body, compressed = self.service.similar(params)
+            elif url.path == "/api/meta":
+                etag, body, compressed = self.service.meta()
+            else:
+                self._send_error(404, "not found")
+                return
+        except KeyError as e:
+            self._send_error(404, e.args[0])
+            return
+        except Exception as e:
+            logger.error(f"❌ リクエスト処理中にエラーが発生: {self.path} - {e}")
+            self._send_error(500, "internal server error")
+            return
+
+        if self._not_modified(etag):
+            self.send_response(304)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+
+        use_gzip = compressed is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        content = compressed if use_gzip else body
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _not_modified(self, etag):
+        """If-None-Match / If-Modified-Since を評価（If-None-Match を優先）"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(self.service.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_cache_headers(self, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.service.last_modified)
+        self.send_header("Cache-Control", "no-cache")
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service, host="127.0.0.1", port=8000):
+    """スナップショットを配信するHTTPサーバーを作成
+
+    Args:
+        service (SnapshotService): 配信するスナップショット
+        host (str): 待ち受けアドレス
+        port (int): 待ち受けポート（0の場合は空いているポート）
+
+    Returns:
+        ThreadingHTTPServer: serve_forever() で起動するサーバー
+    """
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 正常終了時True
+    """
+    parser = argparse.ArgumentParser(description="結合済みCSVのスクリーニング結果をHTTPで配信します")
+    parser.add_argument("csv_file", nargs="?", default=None, help="配信するCSV（未指定時は Export の最新の結合ファイル）")
+    parser.add_argument("--market-type", choices=["JP", "US"], default=None, help="最新ファイルを探す市場タイプ")
+    parser.add_argument("--export-dir", default="Export", help="最新ファイルを探すディレクトリ (デフォルト: Export)")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス (デフォルト: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="待ち受けポート (デフォルト: 8000)")
+    parser.add_argument(
+        "--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help=f"キャッシュするレスポンス数 (デフォルト: {DEFAULT_CACHE_SIZE})"
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    try:
+        service = SnapshotService(args.csv_file, args.export_dir, args.market_type, args.cache_size)
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}")
+        return False
+
+    server = create_server(service, args.host, args.port)
+    logger.info(f"http://{args.host}:{server.server_address[1]}/api/stocks で待ち受けています（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("サーバーを停止します")
+    finally:
+        server.server_close()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,328 @@
+"""
+類似企業（最近傍）検索
+
+結合済みCSVの主要な財務指標（規模・利益率・ROE・財務レバレッジ・バリュエーション・ネットキャッシュ比率）を
+標準化して（銘柄数 × 特徴量）の float32 行列にまとめ、指定した銘柄に近い銘柄を
+ユークリッド距離の k 近傍として返します。距離は行列積でまとめて計算するため、
+日米約15,000社のどの銘柄でも1回の検索は数ミリ秒で終わり、全銘柄の類似企業の一括計算も
+バッチ単位のベクトル演算で行います。
+
+主な機能:
+- 特徴量: 時価総額（対数、市場タイプ内で標準化）、営業利益率、純利益率、ROE、自己資本比率、
+  PBR（対数）、益回り（1 / PER(会予)）、ネットキャッシュ比率
+- ロバストな標準化（中央値・四分位範囲、±CLIP で打ち切り）と欠損の中央値補完
+- 業種・市場タイプでの絞り込み、特徴量ごとの重み
+- 全銘柄の類似企業の一括計算（--all、縦持ちCSV）
+
+使用例:
+    $ python similar.py Export/20251020_combined.csv 7203
+    $ python similar.py --market-type JP 7203 -k 20 --same-industry
+    $ python similar.py Export/20251020_combined.csv AAPL --target-market JP   # 米国株に近い日本株
+    $ python similar.py Export/20251020_combined.csv --all -k 10 -o Export/20251020_peers.csv
+
+Note:
+    - 時価総額は通貨（円・ドル）が異なるため、市場タイプごとに標準化した相対的な規模で比較する
+    - 有効な特徴量が MIN_FEATURES 未満の銘柄は検索対象に含めない
+
+依存関係:
+    - numpy: 標準化と距離計算
+    - pandas / screener.py: 結合済みCSVの読み込み
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from log_setup import setup_logging
+from screener import find_latest_snapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+# 特徴量名 -> (列名, 変換)。変換: "log"（正の値の対数）, "inverse"（逆数）, None（そのまま）
+FEATURES = {
+    "規模": ("時価総額", "log"),
+    "営業利益率": ("営業利益率", None),
+    "純利益率": ("純利益率", None),
+    "ROE": ("ROE", None),
+    "自己資本比率": ("自己資本比率", None),
+    "PBR": ("PBR", "log"),
+    "益回り": ("PER(会予)", "inverse"),
+    "ネットキャッシュ比率": ("ネットキャッシュ比率", None),
+}
+
+# 市場タイプごとに標準化する特徴量（通貨に依存する値）
+PER_MARKET_FEATURES = ["規模"]
+
+# 標準化した値の上限（外れ値が距離を支配しないよう ±CLIP で打ち切る）
+CLIP = 3.0
+
+# 検索対象とする銘柄に必要な有効な特徴量の数
+MIN_FEATURES = 5
+
+DEFAULT_K = 10
+
+# 一括計算で1回に距離を計算する銘柄数（距離行列のメモリ: BATCH_SIZE × 銘柄数 × 4バイト）
+BATCH_SIZE = 1024
+
+# 表示する列
+DISPLAY_COLUMNS = ["銘柄コード", "会社名", "業種", "市場タイプ", "時価総額", "営業利益率", "ROE", "自己資本比率", "PBR", "PER(会予)"]
+
+
+def _transform(values, transform):
+    """特徴量の変換（定義できない値は NaN）"""
+    values = values.astype("float64")
+    if transform == "log":
+        return np.log(values.where(values > 0))
+    if transform == "inverse":
+        return 1 / values.where(values != 0)
+    return values
+
+
+def _robust_scale(values):
+    """中央値・四分位範囲による標準化（四分位範囲が0の場合は標準偏差）"""
+    median = values.median()
+    q1, q3 = values.quantile([0.25, 0.75])
+    scale = (q3 - q1) / 1.349
+    if not scale or np.isnan(scale):
+        scale = values.std()
+    if not scale or np.isnan(scale):
+        return values * 0
+    return (values - median) / scale
+
+
+def build_feature_matrix(df, features=FEATURES, weights=None):
+    """
+    結合済みデータから標準化した特徴量行列を作成
+
+    Args:
+        df (pd.DataFrame): load_snapshot の戻り値
+        features (dict): 特徴量名 -> (列名, 変換)
+        weights (dict, optional): 特徴量名 -> 重み（未指定の特徴量は1）
+
+    Returns:
+        tuple: (float32 の行列（銘柄数 × 特徴量数、欠損は0 = 中央値）, 有効な特徴量の数の配列)
+    """
+    markets = df["市場タイプ"] if "市場タイプ" in df.columns else pd.Series("JP", index=df.index)
+    columns = []
+    for name, (column, transform) in features.items():
+        if column not in df.columns:
+            columns.append(pd.Series(np.nan, index=df.index))
+            continue
+        values = _transform(df[column], transform)
+        if name in PER_MARKET_FEATURES:
+            scaled = values.groupby(markets, dropna=False).transform(_robust_scale)
+        else:
+            scaled = _robust_scale(values)
+        columns.append(scaled.clip(-CLIP, CLIP) * (weights or {}).get(name, 1.0))
+
+    matrix = np.column_stack([column.to_numpy(dtype="float64") for column in columns])
+    valid = np.count_nonzero(~np.isnan(matrix), axis=1)
+    return np.nan_to_num(matrix, nan=0.0).astype(np.float32), valid
+
+
+class SimilarityIndex:
+    """標準化した特徴量行列による類似企業の k 近傍検索
+
+    Args:
+        df (pd.DataFrame): load_snapshot の戻り値（行番号は df の行の位置）
+        features (dict): 特徴量名 -> (列名, 変換)
+        weights (dict, optional): 特徴量名 -> 重み
+    """
+
+    def __init__(self, df, features=FEATURES, weights=None):
+        self.df = df.reset_index(drop=True)
+        self.features = list(features)
+        self.matrix, valid = build_feature_matrix(self.df, features, weights)
+        self.searchable = valid >= min(MIN_FEATURES, len(self.features))
+        self._norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self._rows = {str(code): i for i, code in enumerate(self.df["銘柄コード"])}
+        self._industries = self.df["業種"].to_numpy() if "業種" in self.df.columns else None
+        self._markets = self.df["市場タイプ"].to_numpy() if "市場タイプ" in self.df.columns else None
+
+    @classmethod
+    def from_csv(cls, path, weights=None):
+        """結合済みCSVから作成"""
+        return cls(load_snapshot(path), weights=weights)
+
+    def row_of(self, code):
+        """銘柄コードの行番号（見つからない場合は KeyError）"""
+        code = str(code).strip()
+        if code in self._rows:
+            return self._rows[code]
+        if code.upper() in self._rows:
+            return self._rows[code.upper()]
+        if code.endswith(".T") and code[:-2] in self._rows:
+            return self._rows[code[:-2]]
+        raise KeyError(f"銘柄コードが見つかりません: {code}")
+
+    def _candidate_mask(self, rows, same_industry=False, market_type=None):
+        """検索対象の銘柄のマスク（行数 × 銘柄数、または全行共通の1次元）"""
+        mask = self.searchable.copy()
+        if market_type and self._markets is not None:
+            mask &= self._markets == market_type
+        if same_industry and self._industries is not None:
+            return mask[np.newaxis, :] & (self._industries[rows][:, np.newaxis] == self._industries[np.newaxis, :])
+        return mask
+
+    def neighbors_of_rows(self, rows, k=DEFAULT_K, same_industry=False, market_type=None):
+        """
+        複数の銘柄の k 近傍を一括計算
+
+        Args:
+            rows (array-like): 基準銘柄の行番号
+            k (int): 返す近傍の数（基準銘柄自身は含まない）
+            same_industry (bool): Trueの場合、基準銘柄と同じ業種に限定
+            market_type (str, optional): 近傍の市場タイプ（"JP" / "US"、未指定時は両方）
+
+        Returns:
+            tuple: (近傍の行番号 (len(rows) × k、該当が k 未満の場合は -1), 距離 (float32、該当なしは inf))
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        k = min(k, self.matrix.shape[0])
+        indices = np.full((len(rows), k), -1, dtype=np.int64)
+        distances = np.full((len(rows), k), np.inf, dtype=np.float32)
+
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start : start + BATCH_SIZE]
+            # ||a - b||^2 = ||a||^2 + ||b||^2 - 2a・b（負の丸め誤差は0に）
+            squared = self._norms[batch][:, np.newaxis] + self._norms[np.newaxis, :] - 2 * (self.matrix[batch] @ self.matrix.T)
+            np.maximum(squared, 0, out=squared)
+            squared[~np.broadcast_to(self._candidate_mask(batch, same_industry, market_type), squared.shape)] = np.inf
+            squared[np.arange(len(batch)), batch] = np.inf
+
+            part = np.argpartition(squared, k - 1, axis=1)[:, :k] if k < squared.shape[1] else np.argsort(squared, axis=1)
+            part_distances = np.take_along_axis(squared, part, axis=1)
+            order = np.argsort(part_distances, axis=1, kind="stable")
+            nearest = np.take_along_axis(part, order, axis=1)
+            nearest_distances = np.sqrt(np.take_along_axis(part_distances, order, axis=1))
+            nearest[np.isinf(nearest_distances)] = -1
+
+            indices[start : start + len(batch)] = nearest[:, :k]
+            distances[start : start + len(batch)] = nearest_distances[:, :k]
+        return indices, distances
+
+    def neighbors(self, code, k=DEFAULT_K, same_industry=False, market_type=None):
+        """
+        銘柄に近い銘柄を距離の昇順で返す
+
+        Args:
+            code (str): 基準銘柄の銘柄コード（"7203", "7203.T", "AAPL"）
+            k (int): 返す銘柄数
+            same_industry (bool): Trueの場合、同じ業種に限定
+            market_type (str, optional): 近傍の市場タイプ（未指定時は日米の両方）
+
+        Returns:
+            pd.DataFrame: 近傍の銘柄の行（df の列 + "距離"）
+
+        Raises:
+            KeyError: 銘柄コードが見つからない
+        """
+        row = self.row_of(code)
+        if not self.searchable[row]:
+            logger.warning(f"⚠️ {code} は有効な財務指標が少ないため、欠損を中央値として比較します")
+        indices, distances = self.neighbors_of_rows([row], k, same_industry, market_type)
+        found = indices[0] >= 0
+        result = self.df.iloc[indices[0][found]].reset_index(drop=True)
+        result.insert(0, "距離", np.round(distances[0][found].astype("float64"), 4))
+        return result
+
+    def all_neighbors(self, k=DEFAULT_K, same_industry=False, market_type=None):
+        """
+        検索対象の全銘柄の類似企業を縦持ちで返す
+
+        Returns:
+            pd.DataFrame: 銘柄コード, 順位, 類似銘柄コード, 距離
+        """
+        rows = np.flatnonzero(self.searchable)
+        indices, distances = self.neighbors_of_rows(rows, k, same_industry, market_type)
+        codes = self.df["銘柄コード"].astype(str).to_numpy()
+        found = indices >= 0
+        return pd.DataFrame(
+            {
+                "銘柄コード": np.repeat(codes[rows], indices.shape[1])[found.ravel()],
+                "順位": np.tile(np.arange(1, indices.shape[1] + 1), len(rows))[found.ravel()],
+                "類似銘柄コード": codes[indices[found]],
+                "距離": np.round(distances[found].astype("float64"), 4),
+            }
+        )
+
+
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: 成功した場合True
+    """
+    parser = argparse.ArgumentParser(
+        description="財務指標が近い類似企業を検索します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python similar.py Export/20251020_combined.csv 7203                 # トヨタに近い日米の企業
+  python similar.py --market-type JP 7203 -k 20 --same-industry       # 最新の日本株の結合ファイル・同業種
+  python similar.py Export/20251020_combined.csv AAPL --target-market JP
+  python similar.py Export/20251020_combined.csv --all -o Export/20251020_peers.csv
+        """,
+    )
+    parser.add_argument("args", nargs="*", help="[結合済みCSV] 銘柄コード（CSV 未指定時は Export の最新の結合ファイル）")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help=f"表示する銘柄数 (デフォルト: {DEFAULT_K})")
+    parser.add_argument("--same-industry", action="store_true", help="同じ業種に限定")
+    parser.add_argument("--target-market", choices=["JP", "US"], default=None, help="類似企業の市場タイプ（未指定: 両方）")
+    parser.add_argument("--market-type", choices=["JP", "US"], default=None, help="最新ファイルを探す市場タイプ")
+    parser.add_argument("--export-dir", default="Export", help="最新ファイルを探すディレクトリ (デフォルト: Export)")
+    parser.add_argument("--all", action="store_true", help="全銘柄の類似企業を一括計算（-o に縦持ちCSVで保存）")
+    parser.add_argument("-o", "--output", default=None, help="出力CSV（--all 指定時）")
+    args = parser.parse_args(argv)
+
+    csv_file = args.args[0] if args.args and args.args[0].endswith(".csv") else None
+    codes = args.args[1:] if csv_file else args.args
+    if not args.all and len(codes) != 1:
+        parser.error("銘柄コードを1つ指定してください（全銘柄は --all）")
+    if args.k <= 0:
+        parser.error("-k は正の整数である必要があります")
+
+    setup_logging()
+    csv_file = csv_file or find_latest_snapshot(args.export_dir, args.market_type)
+    if csv_file is None:
+        logger.error(f"❌ 結合済みCSVが見つかりません: {args.export_dir}")
+        return False
+
+    index = SimilarityIndex.from_csv(csv_file)
+
+    if args.all:
+        start = time.perf_counter()
+        peers = index.all_neighbors(args.k, args.same_industry, args.target_market)
+        logger.info(f"類似企業を計算: {int(index.searchable.sum())}社 ({time.perf_counter() - start:.2f}秒)")
+        if args.output:
+            peers.to_csv(args.output, index=False, encoding="utf-8-sig")
+            logger.info(f"✅ 保存しました: {args.output} ({len(peers)}行)")
+        else:
+            print(peers.to_string(index=False))
+        return True
+
+    start = time.perf_counter()
+    try:
+        result = index.neighbors(codes[0], args.k, args.same_industry, args.target_market)
+    except KeyError as e:
+        logger.error(f"❌ {e.args[0]}")
+        return False
+    elapsed = (time.perf_counter() - start) * 1000
+
+    base = index.df.iloc[[index.row_of(codes[0])]]
+    columns = [c for c in DISPLAY_COLUMNS if c in index.df.columns]
+    print(base[columns].to_string(index=False))
+    print()
+    print(result[["距離"] + columns].to_string(index=False))
+    print(f"{len(result)}件 / {int(index.searchable.sum())}社 ({elapsed:.1f}ms)", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,128 @@
+"""
+重複リクエストの集約（singleflight）モジュール
+
+同じキーの呼び出しが同時に・繰り返し発生した場合に、実際の処理を1回だけ
+実行して結果を共有します。本社が同じ郵便番号の銘柄や、銘柄リスト内で
+重複したコードに対するネットワーク呼び出しを1回にまとめるために使用します。
+
+主な機能:
+- 実行中の呼び出しへの相乗り（後から来たスレッドは先行する呼び出しの完了を待って結果を受け取る）
+- 完了した結果の保持（同じ実行内の2回目以降の呼び出しは即座に結果を返す）
+- 保持件数の上限（古い結果から破棄）
+- 完了したキーのみの保持（結果を使わない呼び出し元向けに、結果のオブジェクトを保持しない）
+- 例外時は結果を保持しない（待機中の呼び出し元には同じ例外を送出し、次回は再実行）
+
+使用例:
+    >>> lookups = SingleFlight()
+    >>> lookups.do("1000001", fetch_prefecture, "1000001")   # API呼び出し
+    >>> lookups.do("1000001", fetch_prefecture, "1000001")   # 保持した結果を返す
+"""
+
+import collections
+import threading
+
+
+class _Call:
+    """実行中の呼び出し（完了通知・結果・例外）"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """同じキーの呼び出しを1回の実行にまとめる
+
+    Args:
+        maxsize (int, optional): 完了した結果を保持する最大件数（None: 上限なし、0: 保持しない）
+        keep_values (bool): Falseの場合、完了したキーのみを保持し、結果のオブジェクトは保持しない
+            （保持したキーの呼び出しは fn を実行せずに (None, True) を返す。実行中の呼び出しに
+            相乗りした呼び出し元には結果を返す）
+
+    Note:
+        - スレッドセーフ（pipeline.py の --workers による並列取得で共有可能）
+        - 関数は呼び出し元スレッドのロック外で実行するため、異なるキーの呼び出しは並行して進む
+    """
+
+    def __init__(self, maxsize=None, keep_values=True):
+        self.maxsize = maxsize
+        self.keep_values = keep_values
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """key の結果を返す（未取得の場合のみ fn(*args, **kwargs) を実行）
+
+        Args:
+            key: 呼び出しを識別するキー（ハッシュ可能な値）
+            fn (callable): 実際の処理
+
+        Returns:
+            fn の戻り値（相乗り・保持した結果の場合は同じオブジェクト）
+
+        Raises:
+            Exception: fn が送出した例外（相乗りした呼び出し元にも同じ例外を送出）
+        """
+        return self.do_shared(key, fn, *args, **kwargs)[0]
+
+    def do_shared(self, key, fn, *args, **kwargs):
+        """do と同じだが、結果が他の呼び出しと共有されたものかどうかも返す
+
+        Returns:
+            tuple: (fn の戻り値, shared)
+                - shared: 相乗り・保持した結果の場合True（この呼び出しで fn を実行した場合False）
+
+        Note:
+            - 結果を出力に追記する呼び出し元が、同じ結果を2回追記しないために使用する
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key], True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.maxsize != 0:
+                    self._results[key] = call.value if self.keep_values else None
+                    if self.maxsize is not None and len(self._results) > self.maxsize:
+                        self._results.popitem(last=False)
+            call.done.set()
+        return call.value, False
+
+    def forget(self, key):
+        """保持した結果を破棄（次回の呼び出しで再実行）"""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def clear(self):
+        """保持した全ての結果と統計を破棄"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
@@ -8,15 +8,42 @@ import argparse
 import sys
 import logging
 
-# ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
+from log_setup import setup_logging
+
 logger = logging.getLogger(__name__)
 
 
+def write_chunks(stock_data, chunk_size=1000, output_prefix="stocks"):
+    """
+    株式リストを指定されたサイズのチャンクに分割してJSONファイルに保存
+
+    Args:
+        stock_data (list): 株式情報の辞書のリスト
+        chunk_size (int): 1ファイルあたりの企業数
+        output_prefix (str): 出力ファイル名の接頭辞（"stocks" または "us_stocks"）
+
+    Returns:
+        list: 作成したファイル名のリスト（{output_prefix}_1.json, {output_prefix}_2.json, ...）
+    """
+    total_companies = len(stock_data)
+    output_files = []
+
+    for i in range(math.ceil(total_companies / chunk_size)):
+        start_idx = i * chunk_size
+        end_idx = min((i + 1) * chunk_size, total_companies)
+        chunk_data = stock_data[start_idx:end_idx]
+        output_filename = f"{output_prefix}_{i + 1}.json"
+
+        # JSON形式で保存
+        with open(output_filename, "w", encoding="utf-8") as f:
+            json.dump(chunk_data, f, ensure_ascii=False, indent=2)
+
+        output_files.append(output_filename)
+        logger.info(f"✅ {output_filename}: {len(chunk_data)}社 (#{start_idx + 1}-#{end_idx})")
+
+    return output_files
+
+
 def split_stocks_json(input_file="stocks_all.json", chunk_size=1000):
     """
     stocks_all.jsonまたはus_stocks_all.jsonを指定されたサイズのチャンクに分割
@@ -24,7 +51,11 @@ def split_stocks_json(input_file="stocks_all.json", chunk_size=1000):
     Args:
         input_file (str): 入力JSONファイル名（stocks_all.json または us_stocks_all.json）
         chunk_size (int): 1ファイルあたりの企業数
+
+    Returns:
+        list: 作成したファイル名のリスト（エラー時は空リスト）
     """
+    output_files = []
     try:
         # 元のJSONファイルを読み込み
         with open(input_file, "r", encoding="utf-8") as f:
@@ -38,44 +69,39 @@ def split_stocks_json(input_file="stocks_all.json", chunk_size=1000):
         logger.info(f"1ファイルあたり: 最大{chunk_size}社")
         logger.info("-" * 50)
 
-        # チャンクに分割して保存
-        for i in range(total_files):
-            start_idx = i * chunk_size
-            end_idx = min((i + 1) * chunk_size, total_companies)
-            chunk_data = stock_data[start_idx:end_idx]
-
-            # ファイル名を生成（市場タイプに応じて変更）
-            if "us_stocks" in input_file.lower():
-                output_filename = f"us_stocks_{i + 1}.json"
-            else:
-                output_filename = f"stocks_{i + 1}.json"
-
-            # JSON形式で保存
-            with open(output_filename, "w", encoding="utf-8") as f:
-                json.dump(chunk_data, f, ensure_ascii=False, indent=2)
-
-            logger.info(f"✅ {output_filename}: {len(chunk_data)}社 (#{start_idx + 1}-#{end_idx})")
+        # チャンクに分割して保存（ファイル名は市場タイプに応じて変更）
+        output_prefix = "us_stocks" if "us_stocks" in input_file.lower() else "stocks"
+        output_files = write_chunks(stock_data, chunk_size, output_prefix)
 
         logger.info("-" * 50)
         logger.info(f"分割完了: {total_files}個のファイルを作成しました")
 
         # 各ファイルの情報を表示
         logger.info("\n作成されたファイル:")
-        for i in range(total_files):
-            filename = f"stocks_{i + 1}.json"
+        for filename in output_files:
             with open(filename, "r", encoding="utf-8") as f:
                 data = json.load(f)
             logger.info(f"  {filename}: {len(data)}社")
 
+        return output_files
+
     except FileNotFoundError:
         logger.error(f"❌ エラー: {input_file}が見つかりません")
     except json.JSONDecodeError:
         logger.error(f"❌ エラー: {input_file}の形式が正しくありません")
     except Exception as e:
         logger.error(f"❌ エラー: {e}")
+    return []
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    """コマンドラインから実行
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+    """
+    setup_logging()
+
     parser = argparse.ArgumentParser(
         description="株式リストJSONファイルを指定されたサイズのチャンクに分割します（日本株・米国株対応）",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -105,7 +131,7 @@ if __name__ == "__main__":
 
     parser.add_argument("-v", "--verbose", action="store_true", help="詳細な出力を表示")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # バリデーション
     if args.size <= 0:
@@ -122,3 +148,7 @@ if __name__ == "__main__":
     logger.info("=" * 60)
 
     split_stocks_json(input_file=args.input, chunk_size=args.size)
+
+
+if __name__ == "__main__":
+    main()
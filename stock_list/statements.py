@@ -0,0 +1,152 @@
+"""
+財務諸表の複数期間データ抽出モジュール
+
+yfinanceが返す年度別・四半期別財務諸表（全期間分）から、追跡対象の項目を
+縦持ち形式（銘柄コード, 頻度, 決算期, 項目, 値）のレコードとして抽出します。
+
+主な機能:
+- 追跡対象項目（売上高、営業利益、当期純利益、バランスシート項目など）の定義
+- 財務諸表DataFrameから全決算期分のレコードを抽出（追加のAPIリクエストなし）
+- 年次決算の鮮度に応じた四半期データ取得要否の判定
+- 縦持ちレコードのCSV保存・読み込み
+
+出力データ項目:
+- 銘柄コード: 銘柄コード（例: 7203, "AAPL"）
+- 頻度: "annual"（年次）または "quarterly"（四半期）
+- 決算期: 決算期末日（例: "2025-03-31"）
+- 項目: 日本語の項目名（例: "売上高"）
+- 値: 数値
+"""
+
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 縦持ちテーブルの列
+STATEMENT_COLUMNS = ["銘柄コード", "頻度", "決算期", "項目", "値"]
+
+# 最新の年次決算期末からこの日数が経過していれば四半期データを取得する
+# （決算期末直後は年次データが最新のため、四半期の追加リクエストは不要）
+QUARTERLY_STALE_DAYS = 100
+
+# 追跡対象項目: 項目名 -> (財務諸表タイプ, yfinanceの項目名リスト（先頭を優先し、以降はフォールバック）)
+# financials はフロー項目（期間合計）、balance_sheet はストック項目（期末残高）
+TRACKED_ITEMS = {
+    "売上高": ("financials", ["Total Revenue"]),
+    "営業利益": ("financials", ["Operating Income"]),
+    "当期純利益": ("financials", ["Net Income"]),
+    "希薄化後平均株式数": ("financials", ["Diluted Average Shares"]),
+    "総資産": ("balance_sheet", ["Total Assets"]),
+    "自己資本": ("balance_sheet", ["Stockholders Equity", "Total Stockholder Equity"]),
+    "負債": ("balance_sheet", ["Total Liabilities Net Minority Interest", "Total Liab"]),
+    "流動資産": ("balance_sheet", ["Current Assets", "Total Current Assets"]),
+    "流動負債": ("balance_sheet", ["Current Liabilities", "Total Current Liabilities"]),
+    "総負債": ("balance_sheet", ["Total Debt"]),
+}
+
+# フロー項目（TTMは直近4四半期の合計）とストック項目（直近四半期末の値）
+FLOW_ITEMS = [item for item, (statement_type, _) in TRACKED_ITEMS.items() if statement_type == "financials"]
+STOCK_ITEMS = [item for item, (statement_type, _) in TRACKED_ITEMS.items() if statement_type == "balance_sheet"]
+
+
+def format_period(period):
+    """決算期の列ラベルを "YYYY-MM-DD" 形式の文字列に変換
+
+    Args:
+        period: 財務諸表の列ラベル（Timestamp, datetime, 文字列など）
+
+    Returns:
+        str: 日付部分のみの文字列（例: "2025-03-31"）
+    """
+    if hasattr(period, "strftime"):
+        return period.strftime("%Y-%m-%d")
+    return str(period).split(" ")[0]
+
+
+def extract_statement_records(code, statement, statement_type, frequency="annual"):
+    """財務諸表DataFrameから追跡対象項目の全期間レコードを抽出
+
+    Args:
+        code (str or int): 銘柄コード
+        statement (pd.DataFrame): yfinanceの財務諸表（行: 項目, 列: 決算期）
+        statement_type (str): 財務諸表タイプ（"financials" または "balance_sheet"）
+        frequency (str): 頻度（"annual" または "quarterly"、デフォルト: "annual"）
+
+    Returns:
+        list: (銘柄コード, 頻度, 決算期, 項目, 値) のタプルのリスト
+            - 値が欠損の決算期は含めない
+            - 空のDataFrameの場合は空リスト
+
+    Note:
+        - 取得済みのDataFrameを読むだけなので追加のAPIリクエストは発生しない
+        - 項目名はフォールバックリストの先頭から順に存在するものを使用
+
+    Examples:
+        >>> records = extract_statement_records(7203, ticker.financials, "financials")
+        >>> records[0]
+        (7203, 'annual', '2025-03-31', '売上高', 48036704000000.0)
+    """
+    if statement is None or statement.empty:
+        return []
+
+    periods = [format_period(p) for p in statement.columns]
+    records = []
+
+    for item, (item_statement_type, candidates) in TRACKED_ITEMS.items():
+        if item_statement_type != statement_type:
+            continue
+
+        source = next((c for c in candidates if c in statement.index), None)
+        if source is None:
+            continue
+
+        values = pd.to_numeric(statement.loc[source], errors="coerce").tolist()
+        records.extend(
+            (code, frequency, period, item, value) for period, value in zip(periods, values) if pd.notna(value)
+        )
+
+    return records
+
+
+def needs_quarterly_refresh(annual_statement, today=None, stale_days=QUARTERLY_STALE_DAYS):
+    """四半期データを追加取得すべきかを判定
+
+    Args:
+        annual_statement (pd.DataFrame): 取得済みの年次財務諸表（列: 決算期）
+        today (datetime, optional): 判定基準日（デフォルト: 現在日時）
+        stale_days (int): 年次決算期末からの経過日数のしきい値
+
+    Returns:
+        bool: 四半期データを取得すべき場合True
+            - 年次データが無い場合はTrue（四半期データが唯一の情報源）
+            - 最新の年次決算期末から stale_days 以上経過している場合はTrue
+
+    Note:
+        - 決算期末直後は四半期TTMと年次がほぼ一致するため、追加リクエストを省略する
+    """
+    if annual_statement is None or annual_statement.empty:
+        return True
+
+    latest = pd.to_datetime(format_period(annual_statement.columns[0]), errors="coerce")
+    if pd.isna(latest):
+        return True
+
+    today = today or datetime.now()
+    return (today - latest.to_pydatetime()).days >= stale_days
+
+
+def load_statements(path):
+    """縦持ち財務諸表CSVを読み込み
+
+    Args:
+        path (str): *_stocks_statements_*.csv のパス
+
+    Returns:
+        pd.DataFrame: STATEMENT_COLUMNS の列を持つDataFrame（銘柄コードは文字列）
+    """
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype={"銘柄コード": str, "決算期": str})
+    logger.info(f"財務諸表データを読み込みました: {path} ({len(df)}行)")
+    return df
@@ -6,8 +6,12 @@ yfinance APIを使用して日本株式市場の財務データを自動収集
 主な機能:
 - yfinance APIによる株式財務データの取得
 - 郵便番号から都道府県名の自動取得（digital-address API使用）
+- 共有HTTPセッション（http_client.py）による接続の再利用（郵便番号API・yfinance）
+- 重複した郵便番号・銘柄の問い合わせの集約（singleflight.py）
+- 出力列に応じた取得エンドポイントの選択（fetch_plan.py、--profile / --columns）
+- 外部サービスごとのサーキットブレーカー（circuit_breaker.py、障害中は呼び出しを遮断）
 - 財務諸表データの安全な取得とフォールバック機能
-- ネットキャッシュ比率の自動計算
+- ネットキャッシュ比率等の派生指標をベクトル演算で一括計算（metrics.py）
 - タイムスタンプ付きCSVファイルの自動生成
 - 詳細なログ出力とエラーハンドリング
 
@@ -31,32 +35,40 @@ from datetime import datetime
 from urllib.error import HTTPError
 import warnings
 import logging
-import requests
 import sys
 import os
 
 # utilsモジュールをインポート（同じディレクトリから）
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from utils import detect_market_type, format_ticker_for_market
+from schema import CATEGORICAL_COLUMNS, RAW_COLUMNS, STRING_COLUMNS
+from columnar import ColumnarBuffer
+from metrics import build_output_frame
+from statements import STATEMENT_COLUMNS, extract_statement_records, needs_quarterly_refresh
+from log_setup import setup_logging
+from http_client import configure as configure_http, get_session, install_yf_session
+from singleflight import SingleFlight
+from circuit_breaker import CircuitOpenError, get_breaker, log_summary as log_breaker_summary
+import timeouts
+from timeouts import CallTimeout
+from export_manifest import register_files
+from technicals import add_technical_columns
+from fetch_plan import ALL_ENDPOINTS, BALANCE_SHEET, FINANCIALS, HISTORY, QUARTERLY, ZIP, plan_endpoints, resolve_columns
 
 
-warnings.filterwarnings("ignore")
+logger = logging.getLogger(__name__)
 
-# ログ設定
-# Exportフォルダが存在しない場合は作成
-import os
 
-os.makedirs("Export", exist_ok=True)
+# 同じ実行内の重複した呼び出しを1回にまとめる（郵便番号は結果を保持、銘柄は取得済みのキーのみ保持）
+_zip_lookups = SingleFlight()
+_ticker_fetches = SingleFlight(keep_values=False)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("Export/stock_data_log.txt", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
-logger = logging.getLogger(__name__)
+# 外部サービスごとのサーキットブレーカー（タイムアウトの半分以上かかる呼び出しは失敗として数える）
+_zip_breaker = get_breaker("digital-address", slow_call_seconds=5)
+_yahoo_breaker = get_breaker("yahoo", slow_call_seconds=15)
+
+# Yahoo のサーキットブレーカーがこの回数 open になったら障害が続いているとみなして取得を打ち切る
+CIRCUIT_MAX_OPENS = 3
 
 
 def get_prefecture_from_zip(zip_code):
@@ -73,6 +85,10 @@ def get_prefecture_from_zip(zip_code):
         - digital-address APIを使用してリアルタイム取得
         - 郵便番号の前処理（ハイフン・空白除去）を自動実行
         - タイムアウト設定: 10秒
+        - 共有セッションの接続プールを使用（銘柄ごとに TLS 接続を張り直さない）
+        - 同じ郵便番号の問い合わせは実行中に1回だけ行い、結果を共有（本社所在地が同じ銘柄が多いため）
+        - 取得に失敗した郵便番号は結果を保持せず、次回の呼び出しで再取得
+        - APIの障害中（サーキットブレーカーが open）は問い合わせずに None を返す
     """
     try:
         if not zip_code:
@@ -84,26 +100,30 @@ def get_prefecture_from_zip(zip_code):
         if len(clean_zip) < 7:  # 郵便番号として短すぎる場合
             return None
 
-        # digital-address APIにリクエスト
-        url = f"https://digital-address.app/{clean_zip}"
+        prefecture = _zip_lookups.do(clean_zip, _zip_breaker.call, _lookup_prefecture, clean_zip)
+        if prefecture:
+            logger.debug("  🏢 都道府県: %s", prefecture)
+        return prefecture
 
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+    except Exception as e:
+        logger.debug("    郵便番号変換エラー (%s): %s", zip_code, e)
+        return None
 
-        data = response.json()
 
-        if data.get("addresses") and len(data["addresses"]) > 0:
-            # addressesの最初の要素からpref_nameを取得
-            address = data["addresses"][0]
-            prefecture = address.get("pref_name")
-            logger.debug(f"  🏢 都道府県: {prefecture}")
-            return prefecture
+def _lookup_prefecture(clean_zip):
+    """digital-address APIで郵便番号（前処理済み）の都道府県名を取得（失敗時は例外を送出）"""
+    url = f"https://digital-address.app/{clean_zip}"
 
-        return None
+    response = get_session().get(url, timeout=10)
+    response.raise_for_status()
 
-    except Exception as e:
-        logger.debug(f"    郵便番号変換エラー ({zip_code}): {e}")
-        return None
+    data = response.json()
+
+    if data.get("addresses") and len(data["addresses"]) > 0:
+        # addressesの最初の要素からpref_nameを取得
+        return data["addresses"][0].get("pref_name")
+
+    return None
 
 
 def format_duration(seconds):
@@ -258,98 +278,63 @@ def safe_get_financial_data(ticker, statement_type, item, fallback_items=None):
 
         return None
     except Exception as e:
-        logger.debug(f"    データ取得エラー ({item}): {e}")
-        return None
-
-
-def calculate_net_cash(current_assets, investments, total_liabilities):
-    """ネットキャッシュを計算: 流動資産 + 投資有価証券×70% - 負債
-
-    Args:
-        current_assets (float): 流動資産
-        investments (float): 投資有価証券
-        total_liabilities (float): 総負債
-
-    Returns:
-        float: ネットキャッシュ額
-        None: 必須データが不足している場合
-
-    Note:
-        - 投資有価証券は70%で評価（保守的な見積もり）
-        - 流動資産と総負債は必須、投資有価証券はオプション
-        - ネットキャッシュ = 流動資産 + (投資有価証券 × 0.7) - 総負債
-
-    Examples:
-        >>> calculate_net_cash(10000000, 5000000, 3000000)
-        10500000.0
-        >>> calculate_net_cash(10000000, None, 3000000)
-        7000000.0
-    """
-    try:
-        if current_assets is not None and total_liabilities is not None:
-            inv_value = (investments * 0.7) if investments is not None else 0
-            return current_assets + inv_value - total_liabilities
-        return None
-    except:
+        logger.debug("    データ取得エラー (%s): %s", item, e)
         return None
 
 
-def calculate_previous_year_per(ticker, financials):
-    """前年度のPERとEPSを計算
+def get_previous_year_inputs(ticker, financials, fetch_price=True):
+    """前年度EPS・PERの計算に必要な生データを取得
 
     Args:
         ticker (yfinance.Ticker): yfinanceのTickerオブジェクト
         financials (pd.DataFrame): 年度別損益計算書
+        fetch_price (bool): Falseの場合、前年度末株価（history呼び出し）を取得しない
 
     Returns:
-        tuple: (前年度のPER, 前年度のEPS) のタプル
-        None: データが不足している場合
+        dict: 前年度の生データ（取得できない項目はNone）
+            - 当期純利益(前年度): 前年度のNet Income
+            - 希薄化後平均株式数(前年度): 前年度のDiluted Average Shares
+            - 株価(前年度末): 前年度末の終値
 
     Note:
         - 最新年度（financials.columns[0]）の次の年度を前年度として使用
-        - 前年度のNet IncomeとDiluted Average SharesからEPSを計算
-        - 前年度末の株価を取得してPERを計算
-        - ハードコードを避けるため、動的に前年度を取得
-
-    Examples:
-        >>> result = calculate_previous_year_per(ticker, financials)
-        >>> if result:
-        ...     per, eps = result
-        ...     print(f"PER: {per}, EPS: {eps}")
+        - 純利益・株式数が揃わない場合は株価取得（history呼び出し）を省略
+        - EPS・PERの計算は metrics.compute_derived_metrics で一括実行
     """
+    inputs = {
+        "当期純利益(前年度)": None,
+        "希薄化後平均株式数(前年度)": None,
+        "株価(前年度末)": None,
+    }
+
     try:
         if financials.empty:
-            return None
+            return inputs
 
         # 年度の列を取得（最新年度が最初、前年度が2番目）
         cols = financials.columns.tolist()
         if len(cols) < 2:
             # 前年度のデータが存在しない場合
-            return None
+            return inputs
 
         # 前年度の決算期を取得（2番目の列）
         previous_year_period = cols[1]
 
-        # 前年度のNet Incomeを取得
-        net_income_key = "Net Income"
-        if net_income_key not in financials.index:
-            return None
+        # 前年度のNet IncomeとDiluted Average Sharesを取得
+        if "Net Income" not in financials.index or "Diluted Average Shares" not in financials.index:
+            return inputs
 
-        net_income_last_year = financials.loc[net_income_key, previous_year_period]
+        net_income_last_year = financials.loc["Net Income", previous_year_period]
+        shares_last_year = financials.loc["Diluted Average Shares", previous_year_period]
         if pd.isna(net_income_last_year) or net_income_last_year == 0:
-            return None
-
-        # 前年度のDiluted Average Sharesを取得
-        shares_key = "Diluted Average Shares"
-        if shares_key not in financials.index:
-            return None
-
-        shares_last_year = financials.loc[shares_key, previous_year_period]
+            return inputs
         if pd.isna(shares_last_year) or shares_last_year == 0:
-            return None
+            return inputs
 
-        # 前年度EPSを計算
-        eps_last_year = net_income_last_year / shares_last_year
+        inputs["当期純利益(前年度)"] = net_income_last_year
+        inputs["希薄化後平均株式数(前年度)"] = shares_last_year
+        if not fetch_price:
+            return inputs
 
         # 前年度末の日付を取得（決算期の日付から）
         if hasattr(previous_year_period, "to_pydatetime"):
@@ -362,7 +347,7 @@ def calculate_previous_year_per(ticker, financials):
             try:
                 previous_year_date = pd.to_datetime(previous_year_period).to_pydatetime()
             except:
-                return None
+                return inputs
 
         # 前年度末の株価を取得（決算期の前後数日で取得）
         from datetime import timedelta
@@ -371,52 +356,107 @@ def calculate_previous_year_per(ticker, financials):
         end_date = previous_year_date + timedelta(days=3)
 
         try:
-            price_history = ticker.history(start=start_date.strftime("%Y-%m-%d"), end=end_date.strftime("%Y-%m-%d"))
-            if price_history.empty:
-                return None
-
-            # 決算期に最も近い日付のClose価格を取得
-            price_last_year = price_history["Close"].iloc[0]
-            if pd.isna(price_last_year) or price_last_year == 0:
-                return None
+            price_history = _call_yahoo(
+                "history", ticker.history, start=start_date.strftime("%Y-%m-%d"), end=end_date.strftime("%Y-%m-%d")
+            )
+            if not price_history.empty:
+                # 決算期に最も近い日付のClose価格を取得
+                price_last_year = price_history["Close"].iloc[0]
+                if pd.notna(price_last_year) and price_last_year != 0:
+                    inputs["株価(前年度末)"] = price_last_year
+        except CallTimeout as e:
+            # 前年度末株価は任意の項目のため、取得済みの項目で続行
+            logger.warning("    ⏱️ %s", e)
         except Exception as e:
-            logger.debug(f"    前年度株価取得エラー: {e}")
-            return None
+            logger.debug("    前年度株価取得エラー: %s", e)
+
+        return inputs
+
+    except Exception as e:
+        logger.debug("    前年度データ取得エラー: %s", e)
+        return inputs
+
+
+def _is_not_found(error):
+    """404（銘柄がYahooに存在しない）のエラーか（yfinanceが __cause__ でラップする場合を含む）"""
+    for e in (error, getattr(error, "__cause__", None)):
+        if isinstance(e, HTTPError) and getattr(e, "code", None) == 404:
+            return True
+    return False
 
-        # 前年度PERを計算
-        per_last_year = price_last_year / eps_last_year
 
-        return (per_last_year, eps_last_year)
+def _call_yahoo(name, fn, *args, **kwargs):
+    """yfinance の呼び出しを期限付きで実行（timeouts.run）
 
+    Raises:
+        CallTimeout: 呼び出しの上限または銘柄ごとの期限を過ぎた（Yahoo のサーキットブレーカーに失敗として記録）
+    """
+    try:
+        return timeouts.run(fn, *args, name=name, **kwargs)
+    except CallTimeout:
+        _yahoo_breaker.record(False)
+        raise
+
+
+def _fetch_info(ticker):
+    """ticker.info を Yahoo のサーキットブレーカー経由で、期限付きで取得
+
+    Note:
+        - 404 は正常な応答として、空の info・タイムアウトは失敗（レート制限など）として記録する
+
+    Raises:
+        CircuitOpenError: Yahoo への呼び出しを遮断中
+        CallTimeout: 呼び出しの上限または銘柄ごとの期限を過ぎた
+    """
+    _yahoo_breaker.before_call()
+    start = time.monotonic()
+    try:
+        info = timeouts.run(lambda: ticker.info, name="info")
     except Exception as e:
-        logger.debug(f"    前年度PER計算エラー: {e}")
-        return None
+        _yahoo_breaker.record(_is_not_found(e))
+        raise
+    _yahoo_breaker.record(bool(info), time.monotonic() - start)
+    return info
 
 
-def get_stock_data(stock_info):
-    """個別銘柄の財務データを取得
+def get_stock_data(stock_info, statement_records=None, quarterly=False, endpoints=None):
+    """個別銘柄の財務データ（生データ）を取得
 
     Args:
         stock_info (dict): 株式情報（コード、銘柄名、業種など）
             - 必須キー: "コード", "銘柄名"
             - オプションキー: "市場・商品区分", "33業種区分", "市場タイプ"
+        statement_records (list, optional): 指定時、財務諸表の全期間分の縦持ちレコード
+            （銘柄コード, 頻度, 決算期, 項目, 値）を追記するリスト
+        quarterly (bool): Trueの場合、四半期財務諸表も縦持ちレコードに追記する
+            - 年次決算が新しい（期末から100日未満）銘柄は四半期の追加リクエストを省略
+        endpoints (frozenset, optional): 呼び出すエンドポイント（fetch_plan.plan_endpoints）
+            - 未指定時は全エンドポイント。含まれないエンドポイントに由来する項目は None
 
     Returns:
-        dict: 財務データ辞書（以下の項目を含む）
+        dict: 生データ辞書（schema.RAW_COLUMNS の項目を含む）
             - 基本情報: 会社名、銘柄コード、業種、優先市場、決算月、都道府県（日本株のみ）、市場タイプ
-            - 市場データ: 時価総額、PBR、PER(会予)
+            - 市場データ: 時価総額、PBR、PER(会予)、PER(過去12ヶ月)
             - 収益性: 売上高、営業利益、営業利益率、当期純利益、純利益率、ROE
-            - 財務健全性: 自己資本比率、負債、流動負債、流動資産、総負債
-            - キャッシュ: 現金及び現金同等物、投資有価証券、ネットキャッシュ、ネットキャッシュ比率
-        None: データ取得失敗時
+            - 財務健全性: 負債、流動負債、流動資産、総負債、自己資本、総資産
+            - キャッシュ: 現金及び現金同等物、投資有価証券
+            - 前年度: 当期純利益(前年度)、希薄化後平均株式数(前年度)、株価(前年度末)
+        None: データ取得失敗時、または同じ銘柄を重複して要求した2回目以降の呼び出し
+
+    Raises:
+        CircuitOpenError: Yahoo への呼び出しを遮断中（サーキットブレーカーが open）
 
     Note:
         - yfinance APIを使用してリアルタイムデータ取得
         - API制限回避のため0.5秒のスリープを実施
         - 日本株の場合のみ郵便番号から都道府県を自動取得
         - 市場タイプが未指定の場合、ティッカー形式から自動判定
+        - 自己資本比率・ネットキャッシュ・前年度PER等の派生指標は含まない
+          （metrics.compute_derived_metrics で一括計算）
         - 詳細なログ出力（開始時刻、終了時刻、実行時間）
         - エラー時も詳細なログを記録
+        - 同じ実行内で同じ銘柄を重複して要求した場合は、API呼び出しは1回だけ行い（singleflight.py）、
+          生データ・縦持ちレコードも実際に取得した呼び出しのみが返す（出力行・財務諸表の重複を防ぐ）
 
     Examples:
         >>> stock_info = {"コード": 7203, "銘柄名": "トヨタ自動車"}
@@ -428,6 +468,28 @@ def get_stock_data(stock_info):
         >>> data_us['市場タイプ']
         'US'
     """
+    endpoints = ALL_ENDPOINTS if endpoints is None else frozenset(endpoints)
+    key = (str(stock_info["コード"]), stock_info.get("市場タイプ"), quarterly, endpoints)
+    value, shared = _ticker_fetches.do_shared(key, _fetch_stock_data_with_records, stock_info, quarterly, endpoints)
+    if shared:
+        logger.info(f"  ↩️ {stock_info['コード']} - 同じ実行内で取得済みのため省略します")
+        return None
+    result, records = value
+    if statement_records is not None and records:
+        statement_records.extend(records)
+    return result
+
+
+def _fetch_stock_data_with_records(stock_info, quarterly, endpoints):
+    """_fetch_stock_data を実行し、(生データ, 縦持ち財務諸表レコード) を返す（重複要求で共有する単位）"""
+    records = []
+    # 1銘柄の取得全体の期限（timeouts.configure の ticker_timeout）
+    with timeouts.ticker_deadline():
+        return _fetch_stock_data(stock_info, records, quarterly=quarterly, endpoints=endpoints), records
+
+
+def _fetch_stock_data(stock_info, statement_records=None, quarterly=False, endpoints=ALL_ENDPOINTS):
+    """個別銘柄の財務データ（生データ）をyfinanceから取得（get_stock_data の本体）"""
     code = stock_info["コード"]
     
     # 市場タイプを取得（stock_infoから、または自動判定）
@@ -438,35 +500,67 @@ def get_stock_data(stock_info):
     ticker_symbol = format_ticker(code, market_type)
 
     start_time = time.time()
-    start_datetime = datetime.now()
+    # 構造化ログ（JSON）用の銘柄ごとの項目
+    log_fields = {"ticker": ticker_symbol, "code": str(code)}
 
-    logger.info(f"取得中: {stock_info['銘柄名']} ({ticker_symbol})")
-    logger.debug(
-        f"データ取得開始: {stock_info['銘柄名']} ({ticker_symbol}) - 開始時刻: {start_datetime.strftime('%Y-%m-%d %H:%M:%S')}"
-    )
+    logger.info("取得中: %s (%s)", stock_info["銘柄名"], ticker_symbol, extra=log_fields)
 
     try:
         # yfinanceでティッカー作成
+        install_yf_session()
         ticker = yf.Ticker(ticker_symbol)
 
         # 基本情報取得
-        info = ticker.info
+        info = _fetch_info(ticker)
         if not info:
-            logger.warning(f"  ⚠️ 基本情報が取得できませんでした: {ticker_symbol}")
+            logger.warning(
+                "  ⚠️ 基本情報が取得できませんでした: %s",
+                ticker_symbol,
+                extra=dict(log_fields, status="no_info", duration=round(time.time() - start_time, 3)),
+            )
             return None
 
-        # 時間を置いてAPIレート制限を回避
-        time.sleep(0.5)
+        # 時間を置いてAPIレート制限を回避（info 以外のエンドポイントを呼び出す場合のみ）
+        if endpoints & {FINANCIALS, BALANCE_SHEET, HISTORY}:
+            time.sleep(0.5)
 
-        # 財務諸表データ取得
+        # 財務諸表データ取得（取得計画に含まれないものは空のDataFrame）
         try:
-            financials = ticker.financials
-            balance_sheet = ticker.balance_sheet
+            financials = _call_yahoo("financials", lambda: ticker.financials) if FINANCIALS in endpoints else pd.DataFrame()
+            balance_sheet = (
+                _call_yahoo("balance_sheet", lambda: ticker.balance_sheet) if BALANCE_SHEET in endpoints else pd.DataFrame()
+            )
+        except CallTimeout:
+            raise
         except Exception as e:
-            logger.warning(f"  ⚠️ 財務諸表取得エラー: {e}")
+            logger.warning("  ⚠️ 財務諸表取得エラー: %s", e, extra=log_fields)
             financials = pd.DataFrame()
             balance_sheet = pd.DataFrame()
 
+        # 全決算期分の財務諸表を縦持ちで保持（取得済みデータのため追加リクエストなし）
+        if statement_records is not None:
+            statement_records.extend(extract_statement_records(code, financials, "financials"))
+            statement_records.extend(extract_statement_records(code, balance_sheet, "balance_sheet"))
+
+            # 四半期財務諸表（年次決算が古くなっている銘柄のみ追加取得）
+            if quarterly and QUARTERLY in endpoints and needs_quarterly_refresh(balance_sheet):
+                try:
+                    time.sleep(0.5)
+                    quarterly_financials = _call_yahoo("quarterly_financials", lambda: ticker.quarterly_financials)
+                    statement_records.extend(
+                        extract_statement_records(code, quarterly_financials, "financials", "quarterly")
+                    )
+                    quarterly_balance_sheet = _call_yahoo(
+                        "quarterly_balance_sheet", lambda: ticker.quarterly_balance_sheet
+                    )
+                    statement_records.extend(
+                        extract_statement_records(code, quarterly_balance_sheet, "balance_sheet", "quarterly")
+                    )
+                except CallTimeout:
+                    raise
+                except Exception as e:
+                    logger.warning("  ⚠️ 四半期財務諸表取得エラー: %s", e, extra=log_fields)
+
         # 決算月を取得（バランスシートの最新期から）
         settlement_period = None
         if not balance_sheet.empty:
@@ -497,13 +591,8 @@ def get_stock_data(stock_info):
         trailing_eps = safe_get_value(info, "trailingEps")  # 過去12ヶ月のEPS
         forward_eps = safe_get_value(info, "forwardEps")  # 予想EPS
 
-        # 前年度PERとEPSを計算
-        previous_year_pe = None
-        previous_year_eps = None
-        if not financials.empty:
-            previous_year_data = calculate_previous_year_per(ticker, financials)
-            if previous_year_data:
-                previous_year_pe, previous_year_eps = previous_year_data
+        # 前年度PER・EPSの計算用データを取得（計算は metrics で一括実行）
+        previous_year_inputs = get_previous_year_inputs(ticker, financials, fetch_price=HISTORY in endpoints)
 
         # 市場区分のマッピング（米国株の場合）
         market = stock_info.get("市場・商品区分", "")
@@ -530,20 +619,24 @@ def get_stock_data(stock_info):
             "決算月": settlement_period,
             # "会計基準": None,  # yfinanceでは詳細不明 - コメントアウト
             "市場タイプ": market_type,
-            "都道府県": get_prefecture_from_zip(safe_get_value(info, "zip")) or None if market_type == "JP" else None,
+            "都道府県": (
+                get_prefecture_from_zip(safe_get_value(info, "zip")) or None
+                if market_type == "JP" and ZIP in endpoints
+                else None
+            ),
             "時価総額": safe_get_value(info, "marketCap"),
             "PBR": safe_get_value(info, "priceToBook"),
             "PER(会予)": forward_pe,
             "PER(過去12ヶ月)": trailing_pe,
-            "PER(前年度)": previous_year_pe,
             "配当方向性": dividend_direction,
             "配当利回り": dividend_yield,
             "EPS(過去12ヶ月)": trailing_eps,
             "EPS(予想)": forward_eps,
-            "EPS(前年度)": previous_year_eps,
             "ROE": safe_get_value(info, "returnOnEquity"),
             "営業利益率": safe_get_value(info, "operatingMargins"),
             "純利益率": safe_get_value(info, "profitMargins"),
+            "株価": safe_get_value(info, "currentPrice") or safe_get_value(info, "regularMarketPrice"),
+            **previous_year_inputs,
         }
 
         # 財務諸表からのデータ取得
@@ -598,6 +691,7 @@ def get_stock_data(stock_info):
                 ],
             )
 
+            # 自己資本比率・ネットキャッシュ等の派生指標は metrics で一括計算するため生データのみ保持
             result.update({
                 "負債": total_liabilities,
                 "流動負債": current_liabilities,
@@ -605,30 +699,9 @@ def get_stock_data(stock_info):
                 "総負債": total_debt,
                 "現金及び現金同等物": cash_and_equivalents,
                 "投資有価証券": investments,
+                "自己資本": total_equity,
+                "総資産": total_assets,
             })
-
-            # 自己資本比率の計算
-            if total_equity and total_assets:
-                result["自己資本比率"] = total_equity / total_assets
-            else:
-                result["自己資本比率"] = None
-
-            # ネットキャッシュの計算（流動資産 + 投資有価証券×70% - 負債）
-            net_cash = calculate_net_cash(current_assets, investments, total_liabilities)
-            result["ネットキャッシュ"] = net_cash
-
-            # デバッグ用: ネットキャッシュ計算の詳細を表示
-            if any(x is not None for x in [current_assets, investments, total_liabilities]):
-                inv_70 = (investments * 0.7) if investments is not None else 0
-                logger.debug(
-                    f"  📊 ネットキャッシュ計算: {current_assets} + {inv_70:.0f} - {total_liabilities} = {net_cash}"
-                )
-
-            # ネットキャッシュ比率の計算
-            if net_cash and result["時価総額"]:
-                result["ネットキャッシュ比率"] = net_cash / result["時価総額"]
-            else:
-                result["ネットキャッシュ比率"] = None
         else:
             result.update({
                 "負債": None,
@@ -637,48 +710,271 @@ def get_stock_data(stock_info):
                 "総負債": None,
                 "現金及び現金同等物": None,
                 "投資有価証券": None,
-                "自己資本比率": None,
-                "ネットキャッシュ": None,
-                "ネットキャッシュ比率": None,
+                "自己資本": None,
+                "総資産": None,
             })
 
-        end_time = time.time()
-        end_datetime = datetime.now()
-        duration = end_time - start_time
-
-        logger.info(f"  ✅ 取得完了: {result['会社名']}")
-        logger.debug(
-            f"データ取得完了: {result['会社名']} ({ticker_symbol}) - 終了時刻: {end_datetime.strftime('%Y-%m-%d %H:%M:%S')} - 実行時間: {format_duration(duration)}"
+        duration = time.time() - start_time
+        logger.info(
+            "  ✅ 取得完了: %s (%.2f秒)",
+            result["会社名"],
+            duration,
+            extra=dict(log_fields, status="ok", duration=round(duration, 3)),
         )
         return result
 
+    except CircuitOpenError:
+        raise
+    except CallTimeout as e:
+        # 応答の無い呼び出しは放棄し、この銘柄を失敗として次の銘柄へ進む
+        logger.warning(
+            "  ⏱️ タイムアウト: %s (%s) - %s",
+            stock_info["銘柄名"],
+            ticker_symbol,
+            e,
+            extra=dict(log_fields, status="timeout", duration=round(time.time() - start_time, 3)),
+        )
+        return None
     except HTTPError as e:
         # 404 = 銘柄がYahooに存在しない（上場廃止・シンボル変更等）→ スキップして続行
+        duration = round(time.time() - start_time, 3)
         if e.code == 404:
-            logger.warning(f"  ⚠️ 銘柄が見つかりません (404): {ticker_symbol} - スキップします")
+            logger.warning(
+                "  ⚠️ 銘柄が見つかりません (404): %s - スキップします",
+                ticker_symbol,
+                extra=dict(log_fields, status="not_found", duration=duration),
+            )
         else:
-            logger.error(f"  ❌ HTTPエラー: {ticker_symbol} - {e}")
+            logger.error(
+                "  ❌ HTTPエラー: %s - %s", ticker_symbol, e, extra=dict(log_fields, status="http_error", duration=duration)
+            )
         return None
     except Exception as e:
         # yfinanceがHTTPErrorをラップする場合、__cause__をチェックして404を判定
+        duration = time.time() - start_time
         if isinstance(getattr(e, "__cause__", None), HTTPError) and getattr(e.__cause__, "code", None) == 404:
-            logger.warning(f"  ⚠️ 銘柄が見つかりません (wrapped 404): {ticker_symbol} - スキップします")
+            logger.warning(
+                "  ⚠️ 銘柄が見つかりません (wrapped 404): %s - スキップします",
+                ticker_symbol,
+                extra=dict(log_fields, status="not_found", duration=round(duration, 3)),
+            )
             return None
-        end_time = time.time()
-        end_datetime = datetime.now()
-        duration = end_time - start_time
-        logger.error(f"  ❌ エラー: {ticker_symbol} - {e}")
         logger.error(
-            f"データ取得エラー: {stock_info['銘柄名']} ({ticker_symbol}) - 終了時刻: {end_datetime.strftime('%Y-%m-%d %H:%M:%S')} - 実行時間: {format_duration(duration)} - エラー: {e}"
+            "  ❌ エラー: %s (%s) - 実行時間: %.2f秒 - %s",
+            stock_info["銘柄名"],
+            ticker_symbol,
+            duration,
+            e,
+            extra=dict(log_fields, status="error", duration=round(duration, 3)),
         )
         return None
 
 
-def main(json_filename="stocks_sample.json"):
+def create_result_buffers(capacity):
+    """取得結果と縦持ち財務諸表を書き込む列バッファを作成
+
+    Args:
+        capacity (int): 想定する銘柄数（容量不足時はバッファ側で自動拡張）
+
+    Returns:
+        tuple: (結果バッファ, 財務諸表レコードバッファ) の ColumnarBuffer
+    """
+    results = ColumnarBuffer(
+        RAW_COLUMNS,
+        capacity=capacity,
+        string_columns=STRING_COLUMNS,
+        categorical_columns=CATEGORICAL_COLUMNS,
+    )
+    statement_records = ColumnarBuffer(
+        STATEMENT_COLUMNS,
+        capacity=capacity * 40,
+        string_columns=["銘柄コード"],
+        categorical_columns=["頻度", "決算期", "項目"],
+    )
+    return results, statement_records
+
+
+def save_results(df, raw_df, statements_df, base_name, export_dir="Export"):
+    """出力CSV・生データ・縦持ち財務諸表を Export フォルダに保存
+
+    Args:
+        df (pd.DataFrame): 出力データ（派生指標計算済み）
+        raw_df (pd.DataFrame): 生データスナップショット
+        statements_df (pd.DataFrame): 縦持ち財務諸表
+        base_name (str): ファイル名に含める識別子（例: "1"）
+        export_dir (str): 保存先ディレクトリ（デフォルト: "Export"）
+
+    Returns:
+        str: 保存した出力CSVのパス
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # ファイル名を市場タイプに応じて変更
+    # 最初のデータから市場タイプを判定
+    market_type = raw_df["市場タイプ"].iloc[0] if pd.notna(raw_df["市場タイプ"].iloc[0]) else "JP"
+    prefix = "us_stocks" if market_type == "US" else "japanese_stocks"
+    filename = os.path.join(export_dir, f"{prefix}_data_{base_name}_{timestamp}.csv")
+    raw_filename = os.path.join(export_dir, f"{prefix}_raw_{base_name}_{timestamp}.csv")
+    statements_filename = os.path.join(export_dir, f"{prefix}_statements_{base_name}_{timestamp}.csv")
+    df.to_csv(filename, index=False, encoding="utf-8-sig")
+    logger.info(f"\nデータをCSVファイルに保存しました: {filename}")
+
+    # 生データスナップショットを保存（metrics.py でネットワークなしに派生指標を再計算可能）
+    raw_df.to_csv(raw_filename, index=False, encoding="utf-8-sig")
+    logger.info(f"生データを保存しました: {raw_filename}")
+
+    # 全決算期分の財務諸表を縦持ちで保存
+    statements_df.to_csv(statements_filename, index=False, encoding="utf-8-sig")
+    logger.info(f"財務諸表データを保存しました: {statements_filename} ({len(statements_df)}行)")
+
+    # Export/manifest.json に登録（combine_latest_csv.py はマニフェストから結合対象を検索）
+    register_files(
+        {filename: len(df), raw_filename: len(raw_df), statements_filename: len(statements_df)},
+        export_dir,
+    )
+
+    return filename
+
+
+# --deadline 指定時、保存処理のために残しておく時間（秒）
+DEADLINE_MARGIN_SECONDS = 120
+
+# 1社あたりの処理時間の指数移動平均の重み（新しい観測値の比重）
+THROUGHPUT_EWMA_ALPHA = 0.2
+
+
+class RunBudget:
+    """実行時間の上限に対する残り時間と、観測した処理速度（1社あたりの秒数）を管理
+
+    Args:
+        seconds (float): 実行時間の上限（秒、start_time からの経過時間）
+        margin (float): 結果の保存などのために残しておく時間（秒）
+        alpha (float): 処理時間の指数移動平均の重み
+        start_time (float, optional): 計測開始時刻（time.time()、未指定時は現在時刻）
+
+    Note:
+        - 次の1社の処理（指数移動平均）と保存の余裕を合わせて残り時間を超える場合に打ち切る
+    """
+
+    def __init__(self, seconds, margin=DEADLINE_MARGIN_SECONDS, alpha=THROUGHPUT_EWMA_ALPHA, start_time=None):
+        self.deadline = (start_time or time.time()) + seconds
+        self.margin = margin
+        self.alpha = alpha
+        self.ewma = 0.0
+
+    def record(self, seconds):
+        """1社分の処理時間（待機時間を含む）を記録"""
+        self.ewma = seconds if self.ewma == 0.0 else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def remaining(self):
+        """上限までの残り時間（秒）"""
+        return self.deadline - time.time()
+
+    def should_stop(self):
+        """次の1社を処理すると上限（保存の余裕を含む）を超える見込みの場合True"""
+        return self.remaining() < self.ewma + self.margin
+
+
+def remaining_filename(base_name, export_dir="Export"):
+    """未処理の銘柄リスト（前回の打ち切り分）のファイル名"""
+    return os.path.join(export_dir, f"remaining_{base_name}.json")
+
+
+def load_remaining(path):
+    """前回打ち切った未処理の銘柄リストを読み込み（無い場合は空リスト）"""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            remaining = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️ 未処理リストを読み込めませんでした: {path} - {e}")
+        return []
+    logger.info(f"前回の未処理分 {len(remaining)}社を先に処理します: {path}")
+    return remaining
+
+
+def save_remaining(stocks, path):
+    """未処理の銘柄リストを保存（全件処理した場合は既存のファイルを削除）"""
+    if stocks:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stocks, f, ensure_ascii=False, indent=2)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _seen_before(stock, seen):
+    """銘柄コードが seen に含まれていればTrue（含まれていなければ seen に追加してFalse）"""
+    code = str(stock.get("コード"))
+    if code in seen:
+        return True
+    seen.add(code)
+    return False
+
+
+def prioritize_stocks(stock_list, carried=(), state_file=None):
+    """処理順を決定（前回の未処理分 → 前回取得が古い銘柄の順）
+
+    Args:
+        stock_list (list): 株式情報の辞書のリスト
+        carried (list): 前回打ち切った未処理の銘柄（最初に処理）
+        state_file (str, optional): 取得状態ファイル（scheduler.py）。指定時は未取得・前回取得が
+            古い銘柄から処理（未指定時は元の順序）
+
+    Returns:
+        list: 並べ替えた株式情報のリスト（コードの重複は除き、最初に現れたものを残す）
+    """
+    seen = set()
+    carried = [stock for stock in carried if not _seen_before(stock, seen)]
+    rest = [stock for stock in stock_list if not _seen_before(stock, seen)]
+
+    if state_file and os.path.exists(state_file):
+        from scheduler import load_fetch_state
+
+        state = load_fetch_state(state_file)
+        # 未取得（""）が最も古い扱い。sorted は安定ソートのため同じ日時の銘柄は元の順序を保つ
+        rest = sorted(rest, key=lambda stock: state.get(str(stock.get("コード")), {}).get("last_fetch", ""))
+
+    return list(carried) + rest
+
+
+def get_stock_data_or_defer(stock, statement_records, quarterly, endpoints):
+    """get_stock_data を実行し、Yahoo のサーキットブレーカーが open の場合は待たずに後回しにする
+
+    Returns:
+        tuple: (get_stock_data の戻り値, deferred)
+            - deferred: 遮断中のため取得しなかった場合True（呼び出し元が未処理リストに回す）
+
+    Raises:
+        CircuitOpenError: open が CIRCUIT_MAX_OPENS 回に達した（障害が続いている）場合
+    """
+    try:
+        return get_stock_data(stock, statement_records, quarterly=quarterly, endpoints=endpoints), False
+    except CircuitOpenError as e:
+        if _yahoo_breaker.open_count >= CIRCUIT_MAX_OPENS:
+            raise
+        logger.warning(f"  🔌 {e} - {stock.get('コード')} は後回しにします")
+        return None, True
+
+
+def main(
+    json_filename="stocks_sample.json", quarterly=False, deadline=None, state_file=None, endpoints=None, technicals=False
+):
     """メイン処理
 
     Args:
         json_filename (str): 処理対象のJSONファイル名
+        quarterly (bool): Trueの場合、四半期財務諸表を取得してTTM列を出力に追加
+        deadline (float, optional): 実行時間の上限（分）。指定時は時間切れ前に取得を打ち切り、
+            取得済みの結果を保存して未処理の銘柄を Export/remaining_{base_name}.json に書き出す
+        state_file (str, optional): 取得状態ファイル（scheduler.py）。指定時は前回取得が古い銘柄から処理
+        endpoints (frozenset, optional): 呼び出すエンドポイント（fetch_plan.plan_endpoints、未指定時は全て）
+        technicals (bool): Trueの場合、日足の一括ダウンロードからテクニカル指標の列を追加（technicals.py）
+
+    Note:
+        - Export/remaining_{base_name}.json がある場合、その銘柄を最初に処理する（前回の打ち切り分）
     """
     overall_start_time = time.time()
     overall_start_datetime = datetime.now()
@@ -700,65 +996,71 @@ def main(json_filename="stocks_sample.json"):
         logger.error(f"❌ {json_filename}ファイルの形式が正しくありません")
         return None
 
+    base_name = json_filename.replace(".json", "").replace("stocks_", "").replace("us_stocks_", "")
+    remaining_path = remaining_filename(base_name)
+    stock_list = prioritize_stocks(stock_list, load_remaining(remaining_path), state_file)
+    budget = RunBudget(deadline * 60, start_time=overall_start_time) if deadline else None
+
     logger.info("=" * 60)
     logger.info("株式財務データ取得開始")
     logger.info("=" * 60)
 
-    results = []
+    # 結果は行辞書のリストではなく、事前確保した列配列に直接書き込む
+    results, statement_records = create_result_buffers(len(stock_list))
 
+    processed_count = 0
+    deferred = []
     for i, stock in enumerate(stock_list, 1):
-        logger.info(f"\n[{i}/{len(stock_list)}]")
-        result = get_stock_data(stock)
+        if budget is not None and budget.should_stop():
+            logger.warning(
+                f"⏱️ 実行時間の上限が近いため取得を打ち切ります: 残り{budget.remaining():.0f}秒 / "
+                f"1社あたり{budget.ewma:.1f}秒 - 未処理 {len(stock_list) - processed_count}社"
+            )
+            break
+
+        iteration_start = time.time()
+        logger.info("\n[%d/%d]", i, len(stock_list))
+        try:
+            result, was_deferred = get_stock_data_or_defer(stock, statement_records, quarterly, endpoints)
+        except CircuitOpenError as e:
+            logger.error(
+                f"🔌 Yahoo Finance の障害が続いているため取得を打ち切ります（{e}）- "
+                f"未処理 {len(stock_list) - processed_count}社"
+            )
+            break
 
         if result:
             results.append(result)
+        elif was_deferred:
+            # Yahoo の遮断中は待たずに次の銘柄へ進み、この銘柄は未処理リストに回す
+            deferred.append(stock)
+        # 書き込み済みの行辞書は保持しない（Ticker・財務諸表DataFrameは get_stock_data の終了時に解放される）
+        del result
+        processed_count = i
 
         # API制限回避のため少し待機
         if i < len(stock_list):
             time.sleep(2)
+        if budget is not None and not was_deferred:
+            budget.record(time.time() - iteration_start)
+
+    if deferred:
+        logger.warning(f"🔌 Yahoo Finance の遮断中に後回しにした銘柄: {len(deferred)}社 → {remaining_path}")
+    save_remaining(deferred + stock_list[processed_count:], remaining_path)
+    log_breaker_summary()
+    timeouts.log_summary()
 
     # 結果をDataFrameに変換
-    if results:
-        df = pd.DataFrame(results)
-
-        # 列の順序を指定
-        columns_order = [
-            "会社名",
-            "銘柄コード",
-            "業種",
-            "優先市場",
-            "市場タイプ",
-            "決算月",
-            # "会計基準",  # コメントアウト
-            "都道府県",
-            "時価総額",
-            "PBR",
-            "PER(会予)",
-            "PER(過去12ヶ月)",
-            "PER(前年度)",
-            "配当方向性",
-            "配当利回り",
-            "EPS(過去12ヶ月)",
-            "EPS(予想)",
-            "EPS(前年度)",
-            "売上高",
-            "営業利益",
-            "営業利益率",
-            "当期純利益",
-            "純利益率",
-            "ROE",
-            "自己資本比率",
-            "負債",
-            "流動負債",
-            "流動資産",
-            "総負債",
-            "現金及び現金同等物",
-            "投資有価証券",
-            "ネットキャッシュ",
-            "ネットキャッシュ比率",
-        ]
-
-        df = df.reindex(columns=columns_order)
+    if len(results) > 0:
+        raw_df = results.to_frame()
+        statements_df = statement_records.to_frame()
+        del results, statement_records
+
+        # 派生指標・成長率をベクトル演算で一括計算し、出力列の順序に揃える
+        df = build_output_frame(raw_df, statements_df, quarterly=quarterly)
+        if technicals:
+            # 銘柄ごとの history() ではなく、全銘柄の日足を数回の一括ダウンロードで取得
+            df = add_technical_columns(df)
 
         overall_end_time = time.time()
         overall_end_datetime = datetime.now()
@@ -768,22 +1070,15 @@ def main(json_filename="stocks_sample.json"):
         logger.info("\n" + "=" * 60)
         logger.info("取得結果サマリー")
         logger.info("=" * 60)
-        logger.info(f"取得成功: {len(results)}社")
-        logger.info(f"取得失敗: {len(stock_list) - len(results)}社")
+        success_count = len(raw_df)
+        # 遮断中に後回しにした銘柄は未処理として数える
+        attempted_count = processed_count - len(deferred)
+        unprocessed_count = len(stock_list) - attempted_count
+        logger.info(f"取得成功: {success_count}社")
+        logger.info(f"取得失敗: {attempted_count - success_count}社")
 
         # CSVファイルに保存（Export フォルダに直接保存）
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = json_filename.replace(".json", "").replace("stocks_", "").replace("us_stocks_", "")
-
-        # ファイル名を市場タイプに応じて変更
-        # 最初のデータから市場タイプを判定
-        market_type = results[0].get("市場タイプ", "JP") if results else "JP"
-        if market_type == "US":
-            filename = f"Export/us_stocks_data_{base_name}_{timestamp}.csv"
-        else:
-            filename = f"Export/japanese_stocks_data_{base_name}_{timestamp}.csv"
-        df.to_csv(filename, index=False, encoding="utf-8-sig")
-        logger.info(f"\nデータをCSVファイルに保存しました: {filename}")
+        filename = save_results(df, raw_df, statements_df, base_name)
 
         # データの一部を表示
         logger.info("\n取得データ（最初の3列）:")
@@ -796,9 +1091,11 @@ def main(json_filename="stocks_sample.json"):
         logger.info(f"終了時刻: {overall_end_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info(f"総実行時間: {format_duration(overall_duration)}")
         logger.info(
-            f"処理結果: 成功 {len(results)}社 / 失敗 {len(stock_list) - len(results)}社 / 合計 {len(stock_list)}社"
+            f"処理結果: 成功 {success_count}社 / 失敗 {attempted_count - success_count}社 / 合計 {attempted_count}社"
         )
-        logger.info(f"平均処理時間: {format_duration(overall_duration / len(stock_list))}（1社あたり）")
+        if unprocessed_count:
+            logger.info(f"未処理: {unprocessed_count}社 → {remaining_path}")
+        logger.info(f"平均処理時間: {format_duration(overall_duration / attempted_count)}（1社あたり）")
         logger.info(f"保存ファイル: {filename}")
         logger.info("=" * 80)
 
@@ -819,9 +1116,12 @@ def main(json_filename="stocks_sample.json"):
         return None
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """コマンドライン引数を解析
 
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
     Returns:
         argparse.Namespace: 解析された引数オブジェクト
             - json_file: 処理対象のJSONファイル名（位置引数）
@@ -845,6 +1145,11 @@ def parse_arguments():
   python sumalize.py                    # stocks_sample.jsonを処理（デフォルト）
   python sumalize.py stocks_1.json     # stocks_1.jsonを処理
   python sumalize.py --json stocks_2.json  # stocks_2.jsonを処理
+  python sumalize.py stocks_1.json --quarterly  # 四半期TTM列も出力
+  python sumalize.py stocks_1.json --async-log --json-log Export/stock_data_log.jsonl  # 非同期・構造化ログ
+  python sumalize.py stocks_1.json --yf-cache-dir Export/.yf_cache  # yfinance の Cookie を実行間で再利用
+  python sumalize.py stocks_1.json --deadline 110  # 110分で打ち切り、未処理分は次回に持ち越し
+  python sumalize.py stocks_1.json --profile valuation  # info のみで取得できる指標だけを取得（高速）
   
 利用可能なファイル:
   stocks_1.json, stocks_2.json, stocks_3.json, stocks_4.json
@@ -866,12 +1171,111 @@ def parse_arguments():
         help="処理対象のJSONファイル名（--jsonオプション）",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--quarterly",
+        action="store_true",
+        help="四半期財務諸表を取得し、TTM（直近4四半期合計）・直近四半期の列を追加",
+    )
+
+    parser.add_argument(
+        "--technicals",
+        action="store_true",
+        help="日足の一括ダウンロードから52週高値乖離率・移動平均乖離率・騰落率・ボラティリティ・"
+        "平均売買代金の列を追加（数百銘柄/リクエスト）",
+    )
 
+    parser.add_argument(
+        "--async-log",
+        action="store_true",
+        help="ログの書き込みをバックグラウンドスレッドで行う（取得処理をログI/Oで待たせない）",
+    )
+
+    parser.add_argument(
+        "--json-log",
+        default=None,
+        help="銘柄ごとの構造化ログ（JSON Lines）の出力先（例: Export/stock_data_log.jsonl）",
+    )
+
+    parser.add_argument(
+        "--profile",
+        default="full",
+        choices=["full", "no-history", "valuation"],
+        help="取得する列のプロファイル（no-history: 前年度PER/EPSを除き株価履歴を省略、"
+        "valuation: info のみで取得できる指標）。省いたエンドポイントの列は空になる",
+    )
+
+    parser.add_argument(
+        "--columns",
+        default=None,
+        help="取得する出力列（カンマ区切り、--profile より優先）。例: PBR,ROE,時価総額",
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="実行時間の上限（分）。上限前に取得を打ち切って結果を保存し、未処理の銘柄を "
+        "Export/remaining_*.json に書き出す（次回の実行で最初に処理）",
+    )
+
+    parser.add_argument(
+        "--state-file",
+        default=None,
+        help="取得状態ファイル（scheduler.py の Export/fetch_state.json）。指定時は前回取得が古い銘柄から処理",
+    )
+
+    parser.add_argument(
+        "--call-timeout",
+        type=float,
+        default=timeouts.DEFAULT_CALL_TIMEOUT,
+        help="yfinance の1回の呼び出し（info・財務諸表・株価履歴）の上限秒数。超えた呼び出しは放棄して"
+        f"その銘柄を失敗とする（0 で無効、デフォルト: {timeouts.DEFAULT_CALL_TIMEOUT:.0f}）",
+    )
+
+    parser.add_argument(
+        "--ticker-timeout",
+        type=float,
+        default=timeouts.DEFAULT_TICKER_TIMEOUT,
+        help=f"1銘柄の取得全体の上限秒数（0 で無効、デフォルト: {timeouts.DEFAULT_TICKER_TIMEOUT:.0f}）",
+    )
+
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="HTTP接続プールの1ホストあたりの最大接続数（デフォルト: http_client.POOL_MAXSIZE）",
+    )
+
+    parser.add_argument(
+        "--yf-cache-dir",
+        default=None,
+        help="yfinance の Cookie キャッシュの保存先（同じ保存先を使う実行・ジョブ間で再利用）",
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_cli(argv=None):
+    """コマンドラインから実行（ログ設定・引数解析・メイン処理）
+
+    Args:
+        argv (list, optional): 引数リスト（未指定時は sys.argv[1:]）
+
+    Returns:
+        bool: データを取得できた場合True（列の指定が不正・取得0件の場合False）
+
+    Note:
+        - ログは Export/stock_data_log.txt（サイズ上限でローテーション）と標準エラー出力に出力
+        - インポート時には副作用がなく、この関数の呼び出し時にのみログ設定を行う
+    """
+    warnings.filterwarnings("ignore")
 
-if __name__ == "__main__":
     # コマンドライン引数を解析
-    args = parse_arguments()
+    args = parse_arguments(argv)
+
+    setup_logging("Export/stock_data_log.txt", json_file=args.json_log, queued=args.async_log)
+    configure_http(pool_maxsize=args.pool_size, yf_cache_dir=args.yf_cache_dir)
+    timeouts.configure(call_timeout=args.call_timeout, ticker_timeout=args.ticker_timeout)
 
     # ファイル名を決定（--jsonオプションが優先）
     json_filename = args.json_file_alt if args.json_file_alt else args.json_file
@@ -881,9 +1285,30 @@ if __name__ == "__main__":
     logger.info(f"処理対象ファイル: {json_filename}")
     logger.info("=" * 60)
 
+    # 出力列から呼び出すエンドポイントを決定
+    try:
+        columns = resolve_columns(args.profile, args.columns.split(",") if args.columns else None)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return False
+    endpoints = plan_endpoints(columns, quarterly=args.quarterly)
+    logger.info(f"取得エンドポイント: {', '.join(sorted(endpoints))}")
+
     # メイン処理実行
-    df_result = main(json_filename)
+    df_result = main(
+        json_filename,
+        quarterly=args.quarterly,
+        deadline=args.deadline,
+        state_file=args.state_file,
+        endpoints=endpoints,
+        technicals=args.technicals,
+    )
 
     logger.info("\n" + "=" * 60)
     logger.info("処理完了")
     logger.info("=" * 60)
+    return df_result is not None
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_cli() else 1)
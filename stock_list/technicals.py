@@ -0,0 +1,222 @@
+"""
+日次株価の一括ダウンロードによるテクニカル指標の計算
+
+全銘柄の日次株価（終値・出来高）を yfinance の複数銘柄一括ダウンロードで取得し、
+（日数 × 銘柄）の行列に対する NumPy のベクトル演算でテクニカル指標をまとめて計算します。
+銘柄ごとに history() を呼び出す代わりに、数百銘柄/リクエストの数回のリクエストで
+モメンタム・流動性によるスクリーニング用の列を出力CSVに追加できます。
+
+主な機能:
+- 複数銘柄の日足の一括取得（--batch-size 銘柄ずつ、price_refresh.py と共用）
+- 52週高値・安値からの乖離率、50日・200日移動平均からの乖離率
+- 1・3・12ヶ月の騰落率、年率換算の実現ボラティリティ、20日平均売買代金
+
+使用例:
+    # sumalize.py / pipeline.py の出力CSVにテクニカル指標の列を追加
+    $ python sumalize.py stocks_1.json --technicals
+    $ python pipeline.py --market JP --part 1 --technicals
+
+Note:
+    - 列は schema.TECHNICAL_COLUMNS。乖離率・騰落率・ボラティリティは小数（例: 0.05 = 5%）
+    - 株価は分割・配当調整済み（auto_adjust）の終値を使う
+    - 上場からの日数が足りない銘柄の長期の指標は欠損（NaN）
+
+依存関係:
+    - yfinance: 日足の一括取得
+    - numpy / pandas: ベクトル演算
+"""
+
+import logging
+import time
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from circuit_breaker import CircuitOpenError, get_breaker
+from http_client import install_yf_session
+from schema import TECHNICAL_COLUMNS
+from utils import format_ticker_for_market
+
+logger = logging.getLogger(__name__)
+
+# 1リクエストで取得する銘柄数と、リクエスト間の待ち時間（秒）
+DEFAULT_BATCH_SIZE = 200
+BATCH_INTERVAL_SECONDS = 1.0
+
+# 取得する期間（暦日）。12ヶ月騰落率・52週高値安値に必要な252営業日 + 休場日の余裕
+HISTORY_DAYS = 400
+
+TRADING_DAYS_PER_YEAR = 252
+
+# 移動平均の期間（営業日）。期間内の有効な終値がこの割合未満の銘柄は欠損
+MOVING_AVERAGE_WINDOWS = {"50日移動平均乖離率": 50, "200日移動平均乖離率": 200}
+MIN_WINDOW_COVERAGE = 0.8
+
+# 騰落率の期間（営業日）
+RETURN_WINDOWS = {"騰落率(1ヶ月)": 21, "騰落率(3ヶ月)": 63, "騰落率(12ヶ月)": 252}
+
+# 平均売買代金の期間（営業日）
+TRADED_VALUE_WINDOW = 20
+
+# ボラティリティの計算に必要な日次リターンの最小数
+MIN_VOLATILITY_OBSERVATIONS = 20
+
+# price_refresh.py と共用する一括ダウンロード用のサーキットブレーカー
+_download_breaker = get_breaker("yahoo-download")
+
+
+def download_bars(tickers, batch_size=DEFAULT_BATCH_SIZE, fields=("Close", "Volume"), **download_kwargs):
+    """
+    複数銘柄の日足を一括取得し、項目ごとの（日付 × ティッカー）の DataFrame を返す
+
+    Args:
+        tickers (list): yfinance のティッカー（例: ["7203.T", "6758.T"]）
+        batch_size (int): 1リクエストで取得する銘柄数
+        fields (tuple): 取得する項目（"Close", "Volume" など）
+        **download_kwargs: yf.download に渡す引数（period / start / auto_adjust など）
+
+    Returns:
+        dict: 項目 -> DataFrame（行: 日付の昇順、列: ティッカー。取得できなかった銘柄の列は含まない）
+
+    Note:
+        - 1リクエストの失敗はログに残して次のリクエストへ進む
+        - サーキットブレーカーが open になった場合は残りのリクエストを中止
+    """
+    install_yf_session()
+    frames = {field: [] for field in fields}
+    batches = [tickers[i : i + batch_size] for i in range(0, len(tickers), batch_size)]
+    for i, batch in enumerate(batches, start=1):
+        if i > 1:
+            time.sleep(BATCH_INTERVAL_SECONDS)
+        try:
+            data = _download_breaker.call(
+                yf.download,
+                batch,
+                interval="1d",
+                progress=False,
+                threads=True,
+                **download_kwargs,
+            )
+        except CircuitOpenError as e:
+            logger.error(f"❌ {e}。残り {len(batches) - i + 1} リクエストを中止します")
+            break
+        except Exception as e:
+            logger.warning(f"⚠️ 株価の取得に失敗 ({i}/{len(batches)}): {e}")
+            continue
+        if data is None or data.empty:
+            logger.warning(f"⚠️ 株価を取得できませんでした ({i}/{len(batches)})")
+            continue
+
+        received = 0
+        for field in fields:
+            if field not in data.columns.get_level_values(0):
+                continue
+            values = data[field]
+            if isinstance(values, pd.Series):
+                values = values.to_frame(batch[0])
+            values = values.dropna(axis=1, how="all")
+            frames[field].append(values)
+            received = max(received, values.shape[1])
+        logger.info(f"[{i}/{len(batches)}] 株価を取得: {received}/{len(batch)}銘柄")
+
+    bars = {}
+    for field, parts in frames.items():
+        combined = pd.concat(parts, axis=1).sort_index() if parts else pd.DataFrame(dtype="float64")
+        bars[field] = combined.loc[:, ~combined.columns.duplicated(keep="last")]
+    return bars
+
+
+def compute_technicals(close, volume=None):
+    """
+    終値・出来高の行列からテクニカル指標を一括計算
+
+    Args:
+        close (pd.DataFrame): 終値（行: 日付の昇順、列: 銘柄）
+        volume (pd.DataFrame, optional): 出来高（close と同じ形、未指定時は平均売買代金を計算しない）
+
+    Returns:
+        pd.DataFrame: 行: 銘柄（close の列）、列: TECHNICAL_COLUMNS
+
+    Note:
+        - 基準の株価は各銘柄の最新の終値（取引の無い日は直前の終値）
+        - 52週高値・安値は直近252営業日、ボラティリティは直近252営業日の対数リターンの標準偏差 × √252
+    """
+    close = close.sort_index()
+    prices = close.to_numpy(dtype="float64")
+    filled = close.ffill().to_numpy(dtype="float64")
+    days = len(prices)
+    result = pd.DataFrame(np.nan, index=close.columns, columns=TECHNICAL_COLUMNS)
+    if days == 0:
+        return result
+
+    last = filled[-1]
+    year = prices[-TRADING_DAYS_PER_YEAR:]
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        # 全て欠損の列に対する nanmax / nanmean の警告は欠損（NaN）として扱う
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        result["52週高値乖離率"] = last / np.nanmax(year, axis=0) - 1
+        result["52週安値乖離率"] = last / np.nanmin(year, axis=0) - 1
+
+        for column, window in MOVING_AVERAGE_WINDOWS.items():
+            recent = prices[-window:]
+            average = np.nanmean(recent, axis=0)
+            enough = np.count_nonzero(~np.isnan(recent), axis=0) >= window * MIN_WINDOW_COVERAGE
+            result[column] = np.where(enough & (days >= window), last / average - 1, np.nan)
+
+        for column, window in RETURN_WINDOWS.items():
+            if days > window:
+                result[column] = last / filled[-1 - window] - 1
+
+        log_returns = np.diff(np.log(prices[-(TRADING_DAYS_PER_YEAR + 1) :]), axis=0)
+        observations = np.count_nonzero(~np.isnan(log_returns), axis=0)
+        volatility = np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        result["ボラティリティ(年率)"] = np.where(observations >= MIN_VOLATILITY_OBSERVATIONS, volatility, np.nan)
+
+        if volume is not None:
+            volumes = volume.reindex(index=close.index, columns=close.columns).to_numpy(dtype="float64")
+            traded_value = (prices * volumes)[-TRADED_VALUE_WINDOW:]
+            result["平均売買代金(20日)"] = np.nanmean(traded_value, axis=0)
+
+    return result.replace([np.inf, -np.inf], np.nan)
+
+
+def add_technical_columns(df, batch_size=DEFAULT_BATCH_SIZE, today=None):
+    """
+    出力データの銘柄の日足を一括取得し、テクニカル指標の列を追加
+
+    Args:
+        df (pd.DataFrame): 出力データ（銘柄コード・市場タイプ列を含む）
+        batch_size (int): 1リクエストで取得する銘柄数
+        today (datetime, optional): 基準日（未指定時は現在時刻）
+
+    Returns:
+        pd.DataFrame: TECHNICAL_COLUMNS を末尾に追加した新しいDataFrame（取得できなかった銘柄は NaN）
+    """
+    today = today or datetime.now()
+    market_types = df["市場タイプ"].fillna("JP") if "市場タイプ" in df.columns else pd.Series("JP", index=df.index)
+    tickers = pd.Series(
+        [format_ticker_for_market(code, market) for code, market in zip(df["銘柄コード"], market_types)],
+        index=df.index,
+    )
+
+    start_time = time.time()
+    bars = download_bars(
+        tickers.drop_duplicates().tolist(),
+        batch_size,
+        start=(today - timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d"),
+        auto_adjust=True,
+    )
+    technicals = compute_technicals(bars["Close"], bars["Volume"])
+
+    df = df.copy()
+    for column in TECHNICAL_COLUMNS:
+        df[column] = tickers.map(technicals[column])
+    logger.info(
+        f"テクニカル指標を追加: {int(df[TECHNICAL_COLUMNS[0]].notna().sum())}/{len(df)}銘柄 "
+        f"({time.time() - start_time:.1f}秒)"
+    )
+    return df
@@ -0,0 +1,11 @@
+"""
+テスト共通設定
+
+stock_list/ のモジュールはパッケージではなく、スクリプトと同じディレクトリから
+モジュール名のまま import する構成のため、親ディレクトリを import パスに追加する。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
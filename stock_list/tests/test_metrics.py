@@ -0,0 +1,113 @@
+"""metrics.compute_derived_metrics と、行ごとに計算していた頃の式（sumalize.py）との一致"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import compute_derived_metrics
+
+
+def _scalar_baseline(row):
+    """sumalize.get_stock_data の行ごとの計算（ベクトル化前）をそのまま再現"""
+    total_equity, total_assets = row.get("自己資本"), row.get("総資産")
+    equity_ratio = total_equity / total_assets if total_equity and total_assets else None
+
+    current_assets, investments, liabilities = row.get("流動資産"), row.get("投資有価証券"), row.get("負債")
+    net_cash = None
+    if current_assets is not None and liabilities is not None:
+        net_cash = current_assets + (investments * 0.7 if investments is not None else 0) - liabilities
+    market_cap = row.get("時価総額")
+    net_cash_ratio = net_cash / market_cap if net_cash and market_cap else None
+
+    # calculate_previous_year_per: 純利益・株式数・株価が欠損または0なら計算しない
+    net_income, shares, price = (
+        row.get("当期純利益(前年度)"),
+        row.get("希薄化後平均株式数(前年度)"),
+        row.get("株価(前年度末)"),
+    )
+    eps = per = None
+    if net_income and shares and price:
+        eps = net_income / shares
+        per = price / eps
+    return {
+        "自己資本比率": equity_ratio,
+        "ネットキャッシュ": net_cash,
+        "ネットキャッシュ比率": net_cash_ratio,
+        "EPS(前年度)": eps,
+        "PER(前年度)": per,
+    }
+
+
+BASE = {
+    "時価総額": 5e9,
+    "自己資本": 2e9,
+    "総資産": 8e9,
+    "流動資産": 3e9,
+    "投資有価証券": 1e9,
+    "負債": 2.5e9,
+    "当期純利益(前年度)": 4e8,
+    "希薄化後平均株式数(前年度)": 1e7,
+    "株価(前年度末)": 1200.0,
+}
+
+CASES = {
+    "通常": {},
+    "自己資本が0": {"自己資本": 0.0},
+    "自己資本が欠損": {"自己資本": None},
+    "総資産が0": {"総資産": 0.0},
+    "時価総額が0": {"時価総額": 0.0},
+    "時価総額が欠損": {"時価総額": None},
+    "投資有価証券が欠損": {"投資有価証券": None},
+    "流動資産が欠損": {"流動資産": None},
+    "ネットキャッシュが0": {"流動資産": 1.8e9, "投資有価証券": 1e9, "負債": 2.5e9},
+    "ネットキャッシュが負": {"負債": 9e9},
+    "前年度が赤字（EPSが負）": {"当期純利益(前年度)": -3e8},
+    "前年度の純利益が0": {"当期純利益(前年度)": 0.0},
+    "前年度の株式数が欠損": {"希薄化後平均株式数(前年度)": None},
+    "前年度末の株価が0": {"株価(前年度末)": 0.0},
+}
+
+
+@pytest.fixture(scope="module")
+def derived():
+    rows = [{**BASE, **overrides} for overrides in CASES.values()]
+    raw_df = pd.DataFrame(rows, index=list(CASES), dtype="float64")
+    return raw_df, compute_derived_metrics(raw_df)
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_matches_scalar_baseline(derived, case):
+    raw_df, df = derived
+    row = {key: (None if pd.isna(value) else value) for key, value in raw_df.loc[case].items()}
+    expected = _scalar_baseline(row)
+    for column, value in expected.items():
+        actual = df.loc[case, column]
+        if value is None:
+            assert pd.isna(actual), column
+        else:
+            assert actual == pytest.approx(value), column
+
+
+def test_ratios_require_nonzero_inputs(derived):
+    _, df = derived
+    assert pd.isna(df.loc["自己資本が0", "自己資本比率"])
+    assert pd.isna(df.loc["総資産が0", "自己資本比率"])
+    assert pd.isna(df.loc["時価総額が0", "ネットキャッシュ比率"])
+    assert df.loc["ネットキャッシュが0", "ネットキャッシュ"] == pytest.approx(0.0)
+    assert pd.isna(df.loc["ネットキャッシュが0", "ネットキャッシュ比率"])
+    assert not np.isinf(df[["自己資本比率", "ネットキャッシュ比率", "PER(前年度)"]].to_numpy()).any()
+
+
+def test_negative_eps_gives_negative_per(derived):
+    _, df = derived
+    eps = df.loc["前年度が赤字（EPSが負）", "EPS(前年度)"]
+    assert eps == pytest.approx(-30.0)
+    assert df.loc["前年度が赤字（EPSが負）", "PER(前年度)"] == pytest.approx(1200.0 / -30.0)
+
+
+def test_missing_columns_give_nan():
+    df = compute_derived_metrics(pd.DataFrame({"時価総額": [1e9]}))
+    for column in ["自己資本比率", "ネットキャッシュ", "ネットキャッシュ比率", "EPS(前年度)", "PER(前年度)"]:
+        assert math.isnan(df.loc[0, column])
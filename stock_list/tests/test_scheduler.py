@@ -0,0 +1,81 @@
+"""scheduler.refresh_intervals / build_fetch_plan の更新間隔の判定"""
+
+import pandas as pd
+import pytest
+
+from scheduler import (
+    FILING_SEASON_INTERVAL_DAYS,
+    OFF_SEASON_INTERVAL_DAYS,
+    QUARTERLY_SEASON_INTERVAL_DAYS,
+    STALE_INTERVAL_DAYS,
+    UNKNOWN_INTERVAL_DAYS,
+    build_fetch_plan,
+    refresh_intervals,
+)
+
+
+def _interval(period, today, quarterly=True):
+    result = refresh_intervals(pd.Series([period]), pd.Timestamp(today), quarterly=quarterly)
+    return result.loc[0, "区分"], result.loc[0, "更新間隔"], result.loc[0, "経過日数"]
+
+
+@pytest.mark.parametrize(
+    "today, quarterly, label, interval",
+    [
+        ("2025-04-15", True, "シーズン外", OFF_SEASON_INTERVAL_DAYS),  # 期末から15日: 発表前
+        ("2025-05-15", True, "決算発表シーズン", FILING_SEASON_INTERVAL_DAYS),  # 期末から45日
+        ("2025-07-09", True, "決算発表シーズン", FILING_SEASON_INTERVAL_DAYS),  # 期末から100日
+        ("2025-08-10", True, "四半期決算", QUARTERLY_SEASON_INTERVAL_DAYS),  # 6月末から41日
+        ("2025-08-10", False, "シーズン外", OFF_SEASON_INTERVAL_DAYS),
+        ("2025-09-20", True, "シーズン外", OFF_SEASON_INTERVAL_DAYS),  # 6月末から82日
+        ("2025-11-10", True, "四半期決算", QUARTERLY_SEASON_INTERVAL_DAYS),  # 9月末から41日
+    ],
+)
+def test_refresh_intervals_by_days_since_period_end(today, quarterly, label, interval):
+    assert _interval("2025-03-31", today, quarterly)[:2] == (label, interval)
+
+
+def test_elapsed_days_follow_quarter_or_annual_period():
+    assert _interval("2025-03-31", "2025-08-10", quarterly=True)[2] == 41  # 6月末から
+    assert _interval("2025-03-31", "2025-08-10", quarterly=False)[2] == 132  # 3月末から
+
+
+def test_stale_and_unknown():
+    # 2025年3月期が発表済みのはずなのに、データが2024年3月期のまま
+    assert _interval("2024-03-31", "2025-08-10")[:2] == ("未反映", STALE_INTERVAL_DAYS)
+    assert _interval(None, "2025-08-10")[:2] == ("不明", UNKNOWN_INTERVAL_DAYS)
+
+
+@pytest.mark.parametrize("quarterly, share", [(True, 0.20), (False, 0.14)])
+def test_filing_season_does_not_cover_most_of_the_year(quarterly, share):
+    days = pd.date_range("2025-01-01", "2025-12-31", freq="3D")
+    periods = pd.Series(["2024-12-31"] * len(days))
+    intervals = [
+        refresh_intervals(periods.iloc[[i]].reset_index(drop=True), day, quarterly=quarterly).loc[0, "更新間隔"]
+        for i, day in enumerate(days)
+    ]
+    # 1日あたりに取り直す銘柄の割合の期待値（1 / 更新間隔 の平均）
+    assert (1 / pd.Series(intervals)).mean() < share
+
+
+def test_build_fetch_plan_defaults_to_annual_only_for_jp():
+    stocks = [{"コード": "7203", "市場タイプ": "JP"}, {"コード": "AAPL", "市場タイプ": "US"}]
+    state = {
+        "7203": {"last_fetch": "2025-08-01T00:00:00", "決算月": "2025-03-31"},
+        "AAPL": {"last_fetch": "2025-08-01T00:00:00", "決算月": "2025-03-31"},
+    }
+    due, prices, plan = build_fetch_plan(stocks, state, today=pd.Timestamp("2025-08-10"))
+    assert plan["区分"].tolist() == ["シーズン外", "四半期決算"]
+    assert [stock["コード"] for stock in due] == ["AAPL"]
+    assert [stock["コード"] for stock in prices] == ["7203"]
+
+    _, _, plan = build_fetch_plan(stocks, state, today=pd.Timestamp("2025-08-10"), quarterly=True)
+    assert plan["区分"].tolist() == ["四半期決算", "四半期決算"]
+
+
+def test_build_fetch_plan_puts_unfetched_first():
+    stocks = [{"コード": "1001"}, {"コード": "1002"}]
+    state = {"1001": {"last_fetch": "2025-05-01T00:00:00", "決算月": "2025-03-31"}}
+    due, _, plan = build_fetch_plan(stocks, state, today=pd.Timestamp("2025-05-15"), max_stocks=1)
+    assert [stock["コード"] for stock in due] == ["1002"]
+    assert plan["取得対象"].tolist() == [False, True]
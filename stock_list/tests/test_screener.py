@@ -0,0 +1,84 @@
+"""screener.ScreeningEngine.screen の条件評価と、フロントエンド（useFilters.ts）との範囲条件の一致"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screener import MILLION, PERCENT, RANGE_PARAMS, ScreeningEngine, load_snapshot
+
+FRONTEND_SRC = os.path.join(os.path.dirname(__file__), "..", "..", "stock_search", "src")
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    df = pd.DataFrame(
+        {
+            "会社名": ["トヨタ自動車", "ソニーグループ", "任天堂", "Apple Inc.", "Microsoft"],
+            "銘柄コード": ["7203", "6758", "7974", "AAPL", "MSFT"],
+            "業種": ["輸送用機器", "電気機器", "その他製品", "Technology", "Technology"],
+            "市場タイプ": ["JP", "JP", "JP", "US", "US"],
+            "都道府県": ["愛知県", "東京都", "京都府", "", ""],
+            "時価総額": [4.0e13, 1.5e13, "", 3.0e12, 2.8e12],
+            "PBR": [1.1, 2.5, "", 40.0, 12.0],
+            "ROE": [0.12, 0.14, 0.20, 1.5, 0.35],
+        }
+    )
+    path = tmp_path_factory.mktemp("snapshot") / "20251020_combined.csv"
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    return ScreeningEngine(load_snapshot(str(path)))
+
+
+def _codes(engine, query):
+    return engine.df.loc[engine.screen(query), "銘柄コード"].tolist()
+
+
+def test_range_keeps_missing_values(engine):
+    # PBR が欠損の任天堂は除外しない（useFilters.ts と同じ）
+    assert _codes(engine, "pbrMax=2") == ["7203", "7974"]
+    assert _codes(engine, "pbrMin=2&pbrMax=12") == ["6758", "7974", "MSFT"]
+
+
+def test_range_units(engine):
+    assert _codes(engine, "roeMin=14") == ["6758", "7974", "AAPL", "MSFT"]  # ％ → 0.14
+    assert _codes(engine, "mcMin=10000000") == ["7203", "6758", "7974"]  # 百万円 → 1e13
+
+
+def test_prefecture_applies_to_jp_only(engine):
+    assert _codes(engine, "prefecture=東京都,愛知県") == ["7203", "6758", "AAPL", "MSFT"]
+
+
+def test_sets_and_company(engine):
+    assert _codes(engine, "marketType=US&industries=Technology") == ["AAPL", "MSFT"]
+    assert _codes(engine, {"company": "ｿﾆｰ"}) == ["6758"]
+    assert not engine.screen("industries=存在しない業種").any()
+
+
+def test_empty_query_matches_all(engine):
+    assert np.array_equal(engine.screen(""), np.ones(engine.size, dtype=bool))
+
+
+def _frontend_ranges():
+    """useFilters.ts の数値範囲フィルター（列・倍率）を urlParams.ts のパラメータ名で取得"""
+    with open(os.path.join(FRONTEND_SRC, "hooks", "useFilters.ts"), encoding="utf-8") as f:
+        filters_src = f.read()
+    with open(os.path.join(FRONTEND_SRC, "utils", "urlParams.ts"), encoding="utf-8") as f:
+        params_src = f.read()
+
+    params = dict(re.findall(r'\{ key: "(\w+)Min", param: "(\w+)Min" \}', params_src))
+    pattern = re.compile(
+        r'^\s*(?:stock\.(\S+)|stock\["([^"]+)"\]|(netCashValue)) < filters\.(\w+)Min(?: (/ 100|\* 1000000))?$',
+        re.MULTILINE,
+    )
+    ranges = {}
+    for attr, quoted, net_cash, key, scale in pattern.findall(filters_src):
+        column = attr or quoted or "ネットキャッシュ"
+        ranges[params[key]] = (column, {"/ 100": PERCENT, "* 1000000": MILLION}.get(scale, 1))
+    return ranges
+
+
+@pytest.mark.skipif(not os.path.isdir(FRONTEND_SRC), reason="stock_search のソースが無い")
+def test_range_params_match_frontend():
+    assert _frontend_ranges() == RANGE_PARAMS
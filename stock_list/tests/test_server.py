@@ -0,0 +1,35 @@
+"""server.normalize_request の正規化（キャッシュキー・ETag の元になる）"""
+
+from screener import MILLION, PERCENT
+from server import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, normalize_request
+
+COLUMNS = ["会社名", "銘柄コード", "PBR", "時価総額"]
+
+
+def test_equivalent_requests_normalize_to_same_value():
+    a = normalize_request({"pbrMax": "1", "industries": "電気機器,輸送用機器", "sort": "PBR"}, COLUMNS)
+    b = normalize_request({"industries": "輸送用機器,電気機器,電気機器", "pbrMax": "1.0", "sort": "PBR"}, COLUMNS)
+    assert a == b
+    assert a["query"]["sets"] == {"業種": ["輸送用機器", "電気機器"]}
+
+
+def test_range_units_follow_frontend():
+    query = normalize_request({"mcMin": "1000", "roeMin": "8", "ncrMax": "50%"}, COLUMNS)["query"]
+    assert query["ranges"]["時価総額"] == (1000 * MILLION, None)
+    assert query["ranges"]["ROE"] == (8 * PERCENT, None)
+    assert query["ranges"]["ネットキャッシュ比率"] == (None, 50 * PERCENT)
+
+
+def test_invalid_values_fall_back_to_defaults():
+    request = normalize_request({"sort": "存在しない列", "page": "0", "pageSize": "abc", "pbrMin": "x"}, COLUMNS)
+    assert request["sort"] is None
+    assert request["descending"] is False
+    assert request["page"] == 1
+    assert request["pageSize"] == DEFAULT_PAGE_SIZE
+    assert "PBR" not in request["query"]["ranges"]
+
+
+def test_page_size_is_capped():
+    request = normalize_request({"pageSize": str(MAX_PAGE_SIZE * 10), "order": "desc"}, COLUMNS)
+    assert request["pageSize"] == MAX_PAGE_SIZE
+    assert request["descending"] is True
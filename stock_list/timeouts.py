@@ -0,0 +1,226 @@
+"""
+外部呼び出しのタイムアウト監視（ウォッチドッグ）
+
+yfinance の ticker.info / financials / history などには全体のタイムアウトが無く、
+応答の無いソケットが1つあるだけで sumalize.py の逐次ループが数分止まることがあります。
+このモジュールは呼び出しを監視用のワーカースレッドで実行し、呼び出しごとのタイムアウトと
+銘柄ごとの期限（deadline）のうち早い方を過ぎたら待つのをやめて CallTimeout を送出します。
+
+ワーカースレッドは呼び出し元スレッド（取得スレッド）ごとに1つを使い回すため、
+curl_cffi のスレッドごとの接続（TLS）も呼び出しをまたいで再利用されます。
+
+Python のスレッドは外部から停止できないため、期限を過ぎた呼び出しは中断せずに
+ワーカーごと放棄し、次の呼び出しからは新しいワーカーを使います（デーモンスレッドのため、
+プロセスの終了は妨げない）。放棄したワーカーは応答が返るかソケットのタイムアウトで終了します。
+
+使用例:
+    >>> configure(call_timeout=30, ticker_timeout=90)
+    >>> with ticker_deadline():                      # 銘柄ごとの期限（90秒）
+    ...     info = run(lambda: ticker.info, name="info")          # 最大30秒（残り時間が短ければそれまで）
+    ...     financials = run(lambda: ticker.financials, name="financials")
+    >>> log_summary()                                # タイムアウトの件数をログ出力
+"""
+
+import collections
+import contextlib
+import contextvars
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 既定値（秒）: 1回の呼び出しの上限と、1銘柄の取得全体の上限
+DEFAULT_CALL_TIMEOUT = 30.0
+DEFAULT_TICKER_TIMEOUT = 90.0
+
+_call_timeout = DEFAULT_CALL_TIMEOUT
+_ticker_timeout = DEFAULT_TICKER_TIMEOUT
+
+# 現在の期限（time.monotonic() の時刻、未設定は None）
+_deadline = contextvars.ContextVar("timeouts_deadline", default=None)
+
+# 待機中のワーカーが終了するまでの秒数（取得スレッドの終了後に残らないようにする）
+WORKER_IDLE_TIMEOUT = 60.0
+
+# 呼び出し元スレッドごとのワーカー
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_timeouts = collections.Counter()
+_abandoned = []
+
+
+class CallTimeout(TimeoutError):
+    """呼び出しが期限内に終わらなかった（呼び出しは放棄した）"""
+
+    def __init__(self, name, seconds):
+        super().__init__(f"{name} が {seconds:.1f}秒以内に終わらなかったため放棄しました")
+        self.name = name
+        self.seconds = seconds
+
+
+class _Worker:
+    """run() の呼び出しを順に実行する長寿命のデーモンスレッド
+
+    Note:
+        - 期限を過ぎた呼び出しがあった場合は abandoned を立て、その呼び出しの終了後にスレッドも終了する
+        - WORKER_IDLE_TIMEOUT 秒呼び出しが無ければ終了する（以降の submit は False を返す）
+    """
+
+    def __init__(self):
+        self.tasks = queue.SimpleQueue()
+        self.abandoned = False
+        self.closed = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self._loop, name=f"watchdog-{threading.current_thread().name}", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, task):
+        """task（(context, callable, done) のタプル）を実行待ちに追加（終了済みの場合False）"""
+        with self._lock:
+            if self.closed:
+                return False
+            self.tasks.put(task)
+            return True
+
+    def _loop(self):
+        while not self.abandoned:
+            try:
+                context, target, done = self.tasks.get(timeout=WORKER_IDLE_TIMEOUT)
+            except queue.Empty:
+                with self._lock:
+                    if self.tasks.empty():
+                        self.closed = True
+                        return
+                continue
+            context.run(target)
+            done.set()
+
+
+def _submit(task):
+    """呼び出し元スレッドのワーカーに task を渡す（無い・終了済みの場合は作成）"""
+    worker = getattr(_local, "worker", None)
+    if worker is None or not worker.submit(task):
+        worker = _local.worker = _Worker()
+        worker.submit(task)
+    return worker
+
+
+def configure(call_timeout=None, ticker_timeout=None):
+    """タイムアウトを設定（0 以下で無効）
+
+    Args:
+        call_timeout (float, optional): 1回の呼び出しの上限（秒、未指定時は変更しない）
+        ticker_timeout (float, optional): 1銘柄の取得全体の上限（秒、未指定時は変更しない）
+    """
+    global _call_timeout, _ticker_timeout
+    if call_timeout is not None:
+        _call_timeout = call_timeout if call_timeout > 0 else None
+    if ticker_timeout is not None:
+        _ticker_timeout = ticker_timeout if ticker_timeout > 0 else None
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """with ブロック内の run() に期限を設定（外側の期限の方が早ければそちらを優先）
+
+    Args:
+        seconds (float, optional): 期限までの秒数（None の場合は期限を追加しない）
+    """
+    if seconds is None:
+        yield
+        return
+    outer = _deadline.get()
+    end = time.monotonic() + seconds
+    token = _deadline.set(end if outer is None else min(outer, end))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def ticker_deadline():
+    """1銘柄の取得全体の期限（configure の ticker_timeout）"""
+    return deadline(_ticker_timeout)
+
+
+def remaining():
+    """現在の期限までの残り秒数（期限が無い場合は None）"""
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+def run(fn, *args, name=None, timeout=None, **kwargs):
+    """fn(*args, **kwargs) を期限付きで実行
+
+    Args:
+        fn (callable): 実行する処理
+        name (str, optional): ログ・統計に表示する呼び出し名（例: "info"）
+        timeout (float, optional): この呼び出しの上限（秒、未指定時は configure の call_timeout）
+
+    Returns:
+        fn の戻り値
+
+    Raises:
+        CallTimeout: 呼び出しの上限、または with deadline() の期限を過ぎた
+        Exception: fn が送出した例外
+    """
+    name = name or getattr(fn, "__name__", "call")
+    limit = _call_timeout if timeout is None else timeout
+    left = remaining()
+    if left is not None:
+        limit = left if limit is None else min(limit, left)
+    if limit is None:
+        return fn(*args, **kwargs)
+    if limit <= 0:
+        _record_timeout(name)
+        raise CallTimeout(name, 0)
+
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome["value"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    # 呼び出し元の contextvars（期限など）を引き継いで、呼び出し元スレッドのワーカーで実行
+    worker = _submit((contextvars.copy_context(), target, done))
+    if not done.wait(limit):
+        # 応答待ちのワーカーは放棄し、次の呼び出しは新しいワーカーで実行する
+        worker.abandoned = True
+        _local.worker = None
+        _record_timeout(name, worker.thread)
+        raise CallTimeout(name, limit)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+def _record_timeout(name, thread=None):
+    with _stats_lock:
+        _timeouts[name] += 1
+        if thread is not None:
+            _abandoned.append(thread)
+            _abandoned[:] = [t for t in _abandoned if t.is_alive()]
+
+
+def summary():
+    """タイムアウトの件数（呼び出し名ごと）と、応答待ちのまま残っている放棄したワーカー数"""
+    with _stats_lock:
+        _abandoned[:] = [t for t in _abandoned if t.is_alive()]
+        return dict(_timeouts), len(_abandoned)
+
+
+def log_summary(log=logger):
+    """タイムアウトがあった場合に件数をログ出力"""
+    timeouts, alive = summary()
+    if not timeouts:
+        return
+    detail = ", ".join(f"{name} {count}件" for name, count in sorted(timeouts.items()))
+    log.warning(f"⏱️ タイムアウトで放棄した呼び出し: {detail}（応答待ちのスレッド {alive}）")
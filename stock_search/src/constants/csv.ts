@@ -48,6 +48,12 @@ export const CSV_NUMERIC_FIELDS = [
   "ネットキャッシュ（流動資産-負債）",
   "ネットキャッシュ",
   "ネットキャッシュ比率",
+  "売上高成長率(前年比)",
+  "営業利益成長率(前年比)",
+  "当期純利益成長率(前年比)",
+  "売上高CAGR(3年)",
+  "営業利益CAGR(3年)",
+  "当期純利益CAGR(3年)",
 ] as const;
 
 /** CSVファイル検証設定 */
@@ -47,6 +47,12 @@ export const getDefaultColumns = (
     営業利益率: { label: "営業利益率", category: "performance" },
     当期純利益: { label: "当期純利益", category: "performance" },
     純利益率: { label: "純利益率", category: "performance" },
+    "売上高成長率(前年比)": { label: "売上高成長率(前年比)", category: "performance" },
+    "営業利益成長率(前年比)": { label: "営業利益成長率(前年比)", category: "performance" },
+    "当期純利益成長率(前年比)": { label: "当期純利益成長率(前年比)", category: "performance" },
+    "売上高CAGR(3年)": { label: "売上高CAGR(3年)", category: "performance" },
+    "営業利益CAGR(3年)": { label: "営業利益CAGR(3年)", category: "performance" },
+    "当期純利益CAGR(3年)": { label: "当期純利益CAGR(3年)", category: "performance" },
 
     // バランスシート
     負債: { label: "負債", category: "balance" },